@@ -0,0 +1,287 @@
+from .game import Game
+from .encoder import Encoder, ColumnBuffer
+from .eventLog import NO_SIDE, NO_TILE, SIDE_LEFT, SIDE_RIGHT
+from .enums.orientations import Orientation
+from .tileTable import TILE_COUNT
+
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# Snake of a record: oriented Tile indices from left to right (see compact.orientedIndex()), padded with EMPTY
+EMPTY = 0xff
+SNAKE = ('u1', TILE_COUNT)
+
+MATCH_FIELDS = (
+    ('matchId', 'i4'),
+    ('initialTurn', 'i1'),
+    ('player1DrawCount', 'i2'),
+    ('player2DrawCount', 'i2'),
+    ('player1PassCount', 'i2'),
+    ('player2PassCount', 'i2'),
+    ('roundCount', 'i2'),
+    ('winner', 'i1'),
+)
+ROUND_FIELDS = (
+    ('matchId', 'i4'),
+    ('roundId', 'i2'),
+    ('initialTurn', 'i1'),
+    ('player1Points', 'i2'),
+    ('player2Points', 'i2'),
+    ('initialTile', 'i1'),
+    ('winner', 'i1'),
+    ('turnCount', 'i2'),
+    ('snakeLeftKey', 'i1'),
+    ('snakeLength', 'i1'),
+    ('snake', SNAKE),
+)
+# A turn holds the masks at its start and the full state at its end
+TURN_FIELDS = (
+    ('matchId', 'i4'),
+    ('roundId', 'i2'),
+    ('turnId', 'i2'),
+    ('playerTurn', 'i1'),
+    ('tilesDrawnCount', 'i1'),
+    ('passedTurn', '?'),
+    ('tilePlayed', 'i1'),
+    ('side', 'i1'),
+    ('startDeckMask', 'u4'),
+    ('startPlayer1Mask', 'u4'),
+    ('startPlayer2Mask', 'u4'),
+    ('deckMask', 'u4'),
+    ('player1Mask', 'u4'),
+    ('player2Mask', 'u4'),
+    ('boardMask', 'u4'),
+    ('snakeLeftKey', 'i1'),
+    ('snakeLength', 'i1'),
+    ('snake', SNAKE),
+)
+
+# Record dtype of each table, for numpy.memmap(path, dtype, mode='r')
+MATCH_DTYPE = np.dtype(list(MATCH_FIELDS))
+ROUND_DTYPE = np.dtype(list(ROUND_FIELDS))
+TURN_DTYPE = np.dtype(list(TURN_FIELDS))
+
+ARCHIVE_TABLES = ("match", "round", "turn")
+ARCHIVE_DTYPES = {"match": MATCH_DTYPE, "round": ROUND_DTYPE, "turn": TURN_DTYPE}
+ARCHIVE_COLUMN_TYPES = dict(MATCH_FIELDS + ROUND_FIELDS + TURN_FIELDS)
+
+
+def encodeSnake(snake) -> bytes:
+    """The oriented indices of a Snake's Tiles from left to right, padded to a fixed 28 bytes.
+    """
+
+    encoded = bytes.fromhex(snake.encodedIndices)
+    return encoded + bytes([EMPTY]) * (TILE_COUNT - len(encoded))
+
+
+class ArchiveEncoder(Encoder):
+    """Encoder that records matches, rounds and turns as fixed-size binary records, one file per table,
+    to be read back with Archive. Only streams to the 'bin' format (see sinks.RecordSink).
+
+    Every record is keyed by its matchId, roundId and turnId, and matches and rounds hold how many rounds
+    and turns follow them, which Archive turns into an offset index. Shards concatenated by mergeShards() stay
+    valid archives.
+    """
+
+    tables = ARCHIVE_TABLES
+    maxPips = (6,)
+
+    def __init__(self):
+        super().__init__()
+
+        self.matchBuffer = ColumnBuffer(tuple(name for name, _ in MATCH_FIELDS))
+        self.roundBuffer = ColumnBuffer(tuple(name for name, _ in ROUND_FIELDS))
+        self.turnBuffer = ColumnBuffer(tuple(name for name, _ in TURN_FIELDS))
+        self.columnTypes = ARCHIVE_COLUMN_TYPES
+
+        self.matchId = 0
+        self.roundId = 0
+        self.turnCount = 0
+        self.startMasks = (0, 0, 0)
+
+
+    @property
+    def turnDf(self) -> pd.DataFrame:
+        return self.turnBuffer.toDataFrame()
+
+
+    def stream(self, directory: str, fileFormat: str = "bin", flushEvery: int = 10000):
+        """Stream the records to directory, see Encoder.stream().
+
+        Raises:
+            ValueError: If fileFormat is not 'bin'.
+        """
+
+        if fileFormat != "bin":
+            raise ValueError("ArchiveEncoder only writes the bin format, not '{}'".format(fileFormat))
+
+        super().stream(directory, fileFormat, flushEvery)
+
+
+    def startMatch(self, matchId: int):
+        self.matchId = matchId
+        self.roundId = 0
+
+
+    def recordMatchData(self, game: Game, matchId: int):
+        self.appendRow(
+            "match",
+            matchId,
+            game.initialTurn,
+            game.playerDrawCountsTotal['1'],
+            game.playerDrawCountsTotal['2'],
+            game.playerPassCountsTotal['1'],
+            game.playerPassCountsTotal['2'],
+            game.roundCounter,
+            int(game.getMatchWinner().id),
+        )
+
+
+    def recordRoundData(self, game: Game, roundId: int):
+        snake = game.snake
+
+        self.appendRow(
+            "round",
+            self.matchId,
+            roundId,
+            game.initialTurn,
+            game.player1.points,
+            game.player2.points,
+            snake.getStartTile().index,
+            int(game.getRoundWinner().player.id),
+            self.turnCount,
+            snake.leftKey,
+            len(snake),
+            encodeSnake(snake),
+        )
+
+        self.roundId = roundId + 1
+        self.turnCount = 0
+
+
+    def recordTurnStartData(self, game: Game, turnId: int):
+        self.startMasks = (game.deck.deckMask, game.player1.handMask, game.player2.handMask)
+
+
+    def recordTurnEndData(self, game: Game, turnId: int):
+        snake = game.snake
+        placed = game.tilePlayedCurrent
+
+        if placed is None:
+            tilePlayed, side = NO_TILE, NO_SIDE
+        else:
+            tilePlayed = placed.orientedIndex
+            side = SIDE_LEFT if game.sidePlayedCurrent is Orientation.LEFT else SIDE_RIGHT
+
+        self.appendRow(
+            "turn",
+            self.matchId,
+            self.roundId,
+            turnId,
+            game.turn,
+            game.drawCountCurrent,
+            game.hasPassedThisTurn,
+            tilePlayed,
+            side,
+            *self.startMasks,
+            game.deck.deckMask,
+            game.player1.handMask,
+            game.player2.handMask,
+            snake.boardMask,
+            snake.leftKey,
+            len(snake),
+            encodeSnake(snake),
+        )
+
+        self.turnCount += 1
+
+
+def openRecords(path: str, dtype: np.dtype) -> np.ndarray:
+    """Memory-map a file of fixed-size records. An empty file gives an empty array.
+    """
+
+    if os.path.getsize(path) <= 0:
+        return np.zeros(0, dtype=dtype)
+
+    return np.memmap(path, dtype=dtype, mode='r')
+
+
+class Archive:
+    """Random access to an archive written by ArchiveEncoder. The three tables are memory-mapped, so only the
+    records that are read are loaded from disk.
+
+    Opening builds the offset index, the position of each match's first round and each round's first turn,
+    from the round and turn counts of the match and round tables. Turns are never scanned.
+
+    Usage:
+        archive = Archive('out')
+        archive.turn(matchId=12, roundId=3, turnId=5)['player1Mask']
+    """
+
+    def __init__(self, directory: str):
+        self.matches = openRecords(os.path.join(directory, 'match.bin'), MATCH_DTYPE)
+        self.rounds = openRecords(os.path.join(directory, 'round.bin'), ROUND_DTYPE)
+        self.turns = openRecords(os.path.join(directory, 'turn.bin'), TURN_DTYPE)
+
+        self.matchIds = np.asarray(self.matches['matchId'])
+        self.roundOffsets = np.concatenate(([0], np.cumsum(self.matches['roundCount'], dtype=np.int64)))
+        self.turnOffsets = np.concatenate(([0], np.cumsum(self.rounds['turnCount'], dtype=np.int64)))
+
+        if self.roundOffsets[-1] != len(self.rounds) or self.turnOffsets[-1] != len(self.turns):
+            raise ValueError('Archive in {} is incomplete: the match and round counts do not add up to the '
+                             'number of round and turn records'.format(directory))
+
+
+    def matchIndex(self, matchId: int) -> int:
+        """Get the position of a match in the match table. Match IDs are increasing.
+        """
+
+        i = int(np.searchsorted(self.matchIds, matchId))
+        if i >= len(self.matchIds) or self.matchIds[i] != matchId:
+            raise KeyError('No match {} in the archive'.format(matchId))
+
+        return i
+
+
+    def roundIndex(self, matchId: int, roundId: int) -> int:
+        i = self.matchIndex(matchId)
+        if not 0 <= roundId < self.matches[i]['roundCount']:
+            raise KeyError('Match {} has no round {}'.format(matchId, roundId))
+
+        return int(self.roundOffsets[i]) + roundId
+
+
+    def match(self, matchId: int) -> np.void:
+        return self.matches[self.matchIndex(matchId)]
+
+
+    def roundsOf(self, matchId: int) -> np.ndarray:
+        i = self.matchIndex(matchId)
+        return self.rounds[self.roundOffsets[i]:self.roundOffsets[i + 1]]
+
+
+    def round(self, matchId: int, roundId: int) -> np.void:
+        return self.rounds[self.roundIndex(matchId, roundId)]
+
+
+    def turnsOf(self, matchId: int, roundId: int) -> np.ndarray:
+        r = self.roundIndex(matchId, roundId)
+        return self.turns[self.turnOffsets[r]:self.turnOffsets[r + 1]]
+
+
+    def turn(self, matchId: int, roundId: int, turnId: int) -> np.void:
+        r = self.roundIndex(matchId, roundId)
+        if not 0 <= turnId < self.rounds[r]['turnCount']:
+            raise KeyError('Round {} of match {} has no turn {}'.format(roundId, matchId, turnId))
+
+        return self.turns[self.turnOffsets[r] + turnId]
+
+
+def snakeIndices(record: np.void) -> List[int]:
+    """Get the oriented indices of the snake of a round or turn record, from left to right.
+    """
+
+    return record['snake'][:record['snakeLength']].tolist()
@@ -0,0 +1,406 @@
+from .game import Game
+from .computer import Computer, HighestPipComputer
+from .simulator import Simulator, matchSeed
+from .tileTable import TILE_PIPS, TILE_COUNT
+
+import argparse
+import random
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+PIP1 = np.array([pips[0] for pips in TILE_PIPS], dtype=np.int8)
+PIP2 = np.array([pips[1] for pips in TILE_PIPS], dtype=np.int8)
+PIP_SUM = (PIP1 + PIP2).astype(np.int16)
+
+# HAS_PIP[pip, i] is True if the Tile with index i has the pip value
+HAS_PIP = np.zeros((7, TILE_COUNT), dtype=bool)
+HAS_PIP[PIP1, np.arange(TILE_COUNT)] = True
+HAS_PIP[PIP2, np.arange(TILE_COUNT)] = True
+
+HAND_SIZE = 7
+BONEYARD_SIZE = TILE_COUNT - 2 * HAND_SIZE - 1  # Tiles left in the Deck after the deal and the start Tile
+
+NOT_IN_HAND = np.iinfo(np.int16).max
+
+LEFT = 0
+RIGHT = 1
+
+# Vectorized policies and the Computer each one agrees with. The random policy uses a numpy
+# Generator, so it is not move-for-move equal to RandomComputer.
+POLICIES = ('first', 'greedy', 'random')
+POLICY_COMPUTERS = {
+    'first': Computer,
+    'greedy': HighestPipComputer,
+}
+
+
+class BatchRoundResult(NamedTuple):
+    """Per-game results of a batch of rounds. Players are 1 and 2, like Player.id.
+    """
+
+    winner: np.ndarray
+    points: np.ndarray
+    turnCount: np.ndarray
+    player1DrawCount: np.ndarray
+    player2DrawCount: np.ndarray
+    player1PassCount: np.ndarray
+    player2PassCount: np.ndarray
+
+
+class Deal(NamedTuple):
+    player1Hand: List[int]
+    player2Hand: List[int]
+    startTile: int
+    firstTurn: int
+    drawOrder: List[int]
+
+
+def dealFromSeed(seed: int) -> Deal:
+    """Deal the first round of Game(random.Random(seed)) with Tile indices instead of Tile objects. 
+    Makes the same RNG calls as Game.__init__() and Game.startRound(), then draws the rest of the Deck 
+    up front, which is the order Game would draw it in. findMismatches() checks this against Game.
+
+    Args:
+        seed (int): The seed of the Game's random.Random.
+
+    Returns:
+        Deal: Hands in the order they were dealt, the start Tile, the first Player (1 or 2) and the boneyard draw order.
+    """
+
+    rng = random.Random(seed)
+
+    # Game.__init__() deals hands from a Deck that startRound() replaces
+    deck = list(range(TILE_COUNT))
+    for _ in range(2 * HAND_SIZE):
+        deck.pop(rng.randint(0, len(deck) - 1))
+
+    deck = list(range(TILE_COUNT))
+    player1Hand = [deck.pop(rng.randint(0, len(deck) - 1)) for _ in range(HAND_SIZE)]
+    player2Hand = [deck.pop(rng.randint(0, len(deck) - 1)) for _ in range(HAND_SIZE)]
+    startTile = deck.pop(rng.randint(0, len(deck) - 1))
+
+    # Game.getInitialTurn()
+    tile1Sum = PIP_SUM[deck[rng.randint(0, len(deck) - 1)]]
+    tile2Sum = PIP_SUM[deck[rng.randint(0, len(deck) - 1)]]
+    if tile1Sum > tile2Sum:
+        firstTurn = 1
+    elif tile2Sum > tile1Sum:
+        firstTurn = 2
+    else:
+        firstTurn = rng.randint(1, 2)
+
+    drawOrder = [deck.pop(rng.randint(0, len(deck) - 1)) for _ in range(len(deck))]
+
+    return Deal(player1Hand, player2Hand, startTile, firstTurn, drawOrder)
+
+
+class BatchEngine:
+    """Play K rounds of two-Player block-draw Dominoes in lockstep with numpy state arrays instead of
+    Tile, Deck, Player and Snake objects. Each call to step() plays one turn of every unfinished round.
+
+    State of game k:
+    - hands[k, p]: 28 bools, the Tiles in Player p's hand (p = 0 for Player 1, 1 for Player 2)
+    - handOrder[k, p]: the order each Tile arrived in the hand, for "first Tile in hand" tie-breaks
+    - ends[k]: the open pips of the left and right end of the snake
+    - drawOrder[k], drawCount[k]: the order the boneyard will be drawn in and how much of it has been drawn
+    - turn[k]: the Player whose turn it is
+
+    Rounds are dealt by dealFromSeed() with the same RNG calls as Game, so for the 'first' and 'greedy'
+    policies every round ends exactly as it does for Game with Computer or HighestPipComputer.
+    """
+
+    def __init__(self, hands: np.ndarray, handOrder: np.ndarray, ends: np.ndarray, drawOrder: np.ndarray,
+                 turn: np.ndarray, policy: str = 'first', rng: Optional[np.random.Generator] = None):
+        assert policy in POLICIES, 'Policy must be one of {}'.format(', '.join(POLICIES))
+
+        self.gameCount = len(hands)
+        self.policy = policy
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self.hands = hands
+        self.handOrder = handOrder
+        self.arrivals = hands.sum(axis=2).astype(np.int16)  # Next handOrder value of each Player
+        self.ends = ends
+        self.drawOrder = drawOrder
+        self.drawCount = np.zeros(self.gameCount, dtype=np.int16)
+        self.turn = turn
+
+        self.active = np.ones(self.gameCount, dtype=bool)
+        self.turnCount = np.zeros(self.gameCount, dtype=np.int32)
+        self.draws = np.zeros((self.gameCount, 2), dtype=np.int32)
+        self.passes = np.zeros((self.gameCount, 2), dtype=np.int32)
+
+
+    @classmethod
+    def fromSeeds(cls, seeds: Sequence[int], policy: str = 'first', rng: Optional[np.random.Generator] = None):
+        """Deal one round per seed with dealFromSeed().
+
+        Args:
+            seeds (Sequence[int]): One seed per round, e.g. simulator.matchSeed() values.
+            policy (str, optional): 'first', 'greedy' or 'random'. Defaults to 'first'.
+            rng (Optional[np.random.Generator], optional): RNG of the random policy.
+
+        Returns:
+            BatchEngine: The engine, ready to step().
+        """
+
+        gameCount = len(seeds)
+        hands = np.zeros((gameCount, 2, TILE_COUNT), dtype=bool)
+        handOrder = np.full((gameCount, 2, TILE_COUNT), NOT_IN_HAND, dtype=np.int16)
+        ends = np.zeros((gameCount, 2), dtype=np.int8)
+        drawOrder = np.zeros((gameCount, BONEYARD_SIZE), dtype=np.int8)
+        turn = np.zeros(gameCount, dtype=np.int8)
+
+        engine = cls(hands, handOrder, ends, drawOrder, turn, policy, rng)
+        for k, seed in enumerate(seeds):
+            engine.dealRound(k, dealFromSeed(seed))
+
+        return engine
+
+
+    def dealRound(self, k: int, deal: Deal):
+        """Start a new round in game k, e.g. to reuse a finished game's slot.
+        """
+
+        self.hands[k] = False
+        self.handOrder[k] = NOT_IN_HAND
+        for p, hand in enumerate((deal.player1Hand, deal.player2Hand)):
+            self.hands[k, p, hand] = True
+            self.handOrder[k, p, hand] = np.arange(len(hand), dtype=np.int16)
+            self.arrivals[k, p] = len(hand)
+
+        self.ends[k] = TILE_PIPS[deal.startTile]
+        self.drawOrder[k] = deal.drawOrder
+        self.drawCount[k] = 0
+        self.turn[k] = deal.firstTurn - 1
+
+        self.active[k] = True
+        self.turnCount[k] = 0
+        self.draws[k] = 0
+        self.passes[k] = 0
+
+
+    def legalTiles(self, games: np.ndarray, players: np.ndarray):
+        """Get the Tiles each Player can play on the left and on the right end, as two (n, 28) bool arrays.
+        """
+
+        hands = self.hands[games, players]
+        return hands & HAS_PIP[self.ends[games, LEFT]], hands & HAS_PIP[self.ends[games, RIGHT]]
+
+
+    def chooseMoves(self, games: np.ndarray, players: np.ndarray):
+        """Pick the Tile and side each Player plays with this engine's policy. Every Player must have a legal move.
+        """
+
+        legalLeft, legalRight = self.legalTiles(games, players)
+        legal = legalLeft | legalRight
+        rows = np.arange(len(games))
+
+        if self.policy == 'random':
+            moves = np.concatenate((legalLeft, legalRight), axis=1)
+            scores = np.where(moves, self.rng.random(moves.shape), -1.0)
+            move = scores.argmax(axis=1)
+            return move % TILE_COUNT, move // TILE_COUNT
+
+        order = self.handOrder[games, players].astype(np.int32)
+        if self.policy == 'first':
+            scores = np.where(legal, -order, np.iinfo(np.int32).min)
+        else:
+            # Most pips first, then first in hand. handOrder is always < 256
+            scores = np.where(legal, PIP_SUM.astype(np.int32) * 256 - order, np.iinfo(np.int32).min)
+
+        tiles = scores.argmax(axis=1)
+        sides = np.where(legalLeft[rows, tiles], LEFT, RIGHT)
+
+        return tiles, sides
+
+
+    def step(self) -> bool:
+        """Play one turn of every unfinished round: draw until a Tile can be played or the boneyard is
+        empty, then play a Tile or pass, then end the round or pass the turn to the other Player.
+
+        Returns:
+            bool: True if any round is still unfinished.
+        """
+
+        games = np.flatnonzero(self.active)
+        if len(games) <= 0:
+            return False
+
+        players = self.turn[games].astype(np.intp)
+
+        playing = self.drawOrPass(games, players)
+        g = games[playing]
+        p = players[playing]
+        if len(g) > 0:
+            self.playMoves(g, p, *self.chooseMoves(g, p))
+
+        self.endTurns(games, players)
+
+        return bool(self.active.any())
+
+
+    def drawOrPass(self, games: np.ndarray, players: np.ndarray) -> np.ndarray:
+        """Draw for each Player until they can play or the boneyard is empty, and count a pass for those
+        who still cannot play.
+
+        Returns:
+            np.ndarray: True for the Players that can play.
+        """
+
+        legalLeft, legalRight = self.legalTiles(games, players)
+        mustDraw = ~(legalLeft | legalRight).any(axis=1)
+
+        while True:
+            drawing = mustDraw & (self.drawCount[games] < BONEYARD_SIZE)
+            if not drawing.any():
+                break
+
+            g = games[drawing]
+            p = players[drawing]
+            tiles = self.drawOrder[g, self.drawCount[g]].astype(np.intp)
+
+            self.hands[g, p, tiles] = True
+            self.handOrder[g, p, tiles] = self.arrivals[g, p]
+            self.arrivals[g, p] += 1
+            self.drawCount[g] += 1
+            self.draws[g, p] += 1
+
+            # Only the drawn Tile can have changed whether the Player can play
+            mustDraw[drawing] = ~(HAS_PIP[self.ends[g, LEFT], tiles] | HAS_PIP[self.ends[g, RIGHT], tiles])
+
+        self.passes[games[mustDraw], players[mustDraw]] += 1
+
+        return ~mustDraw
+
+
+    def playMoves(self, games: np.ndarray, players: np.ndarray, tiles: np.ndarray, sides: np.ndarray):
+        """Play a legal Tile for each Player on the given side.
+        """
+
+        self.hands[games, players, tiles] = False
+        self.handOrder[games, players, tiles] = NOT_IN_HAND
+        # The new open pip is the other pip of the played Tile
+        self.ends[games, sides] = PIP_SUM[tiles] - self.ends[games, sides]
+
+
+    def endTurns(self, games: np.ndarray, players: np.ndarray):
+        """End the turn of each Player: finish the round if their hand is empty or neither Player can play
+        with an empty boneyard, else pass the turn to the other Player.
+        """
+
+        self.turnCount[games] += 1
+
+        handEmpty = ~self.hands[games, players].any(axis=1)
+        boneyardEmpty = self.drawCount[games] >= BONEYARD_SIZE
+        blocked = boneyardEmpty & ~self.canPlay(games, 0) & ~self.canPlay(games, 1)
+
+        done = handEmpty | blocked
+        self.active[games[done]] = False
+        self.turn[games[~done]] ^= 1
+
+
+    def canPlay(self, games: np.ndarray, player: int) -> np.ndarray:
+        players = np.full(len(games), player, dtype=np.intp)
+        legalLeft, legalRight = self.legalTiles(games, players)
+
+        return (legalLeft | legalRight).any(axis=1)
+
+
+    def run(self) -> BatchRoundResult:
+        """Step until every round is finished and score them like Game.getRoundWinner(). The Player with
+        an empty hand wins, else the Player with fewer pips. The winner gains the other Player's pips.
+        """
+
+        while self.step():
+            pass
+
+        winner, points = self.score(np.arange(self.gameCount))
+
+        return BatchRoundResult(winner, points, self.turnCount,
+                                self.draws[:, 0], self.draws[:, 1], self.passes[:, 0], self.passes[:, 1])
+
+
+    def score(self, games: np.ndarray):
+        """Get the winner (1 or 2) and the points they gain for each finished round, like Game.getRoundWinner().
+        """
+
+        pips = (self.hands[games] * PIP_SUM).sum(axis=2)
+        handSizes = self.hands[games].sum(axis=2)
+
+        player1Wins = (handSizes[:, 0] == 0) | ((handSizes[:, 1] != 0) & (pips[:, 0] < pips[:, 1]))
+        winner = np.where(player1Wins, 1, 2)
+        points = np.where(player1Wins, pips[:, 1], pips[:, 0])
+
+        return winner, points
+
+
+def playRoundsWithGame(seeds: Sequence[int], policy: str = 'first') -> BatchRoundResult:
+    """Play the same rounds as BatchEngine.fromSeeds() with Game and the Computer matching the policy.
+    Used to check the batch engine against the object engine.
+    """
+
+    computer = POLICY_COMPUTERS[policy]
+    simulator = Simulator(computer, computer)
+    rows = []
+
+    for seed in seeds:
+        game = Game(random.Random(seed))
+        simulator.turnCount = 0
+        simulator.playRound(game, 0)
+
+        rows.append((int(game.lastRoundWinner.player.id), game.lastRoundWinner.pointsToGain, simulator.turnCount,
+                     game.playerDrawCountsTotal['1'], game.playerDrawCountsTotal['2'],
+                     game.playerPassCountsTotal['1'], game.playerPassCountsTotal['2']))
+
+    return BatchRoundResult(*(np.array(column) for column in zip(*rows)))
+
+
+def findMismatches(seeds: Sequence[int], policy: str = 'first') -> List[int]:
+    """Get the seeds whose round results differ between BatchEngine and Game.
+    """
+
+    batch = BatchEngine.fromSeeds(seeds, policy).run()
+    reference = playRoundsWithGame(seeds, policy)
+
+    same = np.ones(len(seeds), dtype=bool)
+    for batchColumn, referenceColumn in zip(batch, reference):
+        same &= batchColumn == referenceColumn
+
+    return [seed for seed, isSame in zip(seeds, same) if not isSame]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate rounds of Dominoes in lockstep batches.')
+    parser.add_argument('-n', '--rounds', type=int, default=100000, help='Number of rounds to play.')
+    parser.add_argument('-b', '--batch-size', type=int, default=10000, help='Number of rounds per batch.')
+    parser.add_argument('--seed', type=int, default=0, help='Master seed. Round i is dealt from matchSeed(seed, i).')
+    parser.add_argument('--policy', choices=POLICIES, default='first', help='Policy of both Players.')
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help='Also play the first N rounds with Game and report any that differ.')
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    player1Wins = 0
+
+    start = time.perf_counter()
+    for first in range(0, args.rounds, args.batch_size):
+        seeds = [matchSeed(args.seed, i) for i in range(first, min(first + args.batch_size, args.rounds))]
+        result = BatchEngine.fromSeeds(seeds, args.policy, rng).run()
+        player1Wins += int((result.winner == 1).sum())
+    elapsed = time.perf_counter() - start
+
+    print("{} rounds in {:.2f}s ({:.0f} rounds/sec). Player 1 won {:.1%}".format(
+        args.rounds, elapsed, args.rounds / elapsed, player1Wins / args.rounds))
+
+    if args.check > 0:
+        if args.policy not in POLICY_COMPUTERS:
+            parser.error('--check needs a deterministic policy: {}'.format(', '.join(POLICY_COMPUTERS)))
+        mismatches = findMismatches([matchSeed(args.seed, i) for i in range(args.check)], args.policy)
+        print("{} of {} rounds differ from Game".format(len(mismatches), args.check))
+
+
+if __name__ == '__main__':
+    main()
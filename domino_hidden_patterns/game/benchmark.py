@@ -0,0 +1,472 @@
+from .deck import Deck
+from .game import Game
+from .snake import Snake
+from .tile import Tile
+from .computer import Computer
+from .enums.orientations import Orientation
+from .simulator import Simulator, ENCODERS, loadEncoder, matchSeed
+from .gameState import GameState, countTransitions
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarkBaseline.json')
+
+# A benchmark sample: runs some operations and returns (elapsed seconds, number of operations)
+Sample = Callable[[], Tuple[float, int]]
+
+
+class BenchmarkResult(NamedTuple):
+    """Timing of a single benchmark. Latencies are per operation, over the samples taken.
+    """
+
+    name: str
+    ops: int
+    opsPerSec: float
+    p50Us: float
+    p99Us: float
+    peakRssMb: Optional[float]
+
+
+def peakRssMb() -> Optional[float]:
+    """Peak resident set size of this process so far, in MB. None where the resource module is missing (Windows).
+    """
+
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return maxRss / (1024 * 1024) if sys.platform == 'darwin' else maxRss / 1024
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(name: str, sample: Sample, samples: int) -> BenchmarkResult:
+    """Take a number of samples of a benchmark. Each sample times a batch of operations, so timer overhead
+    stays small next to fast operations. The peak RSS is the process' peak after the benchmark ran.
+
+    Args:
+        name (str): The name the result is reported and compared under.
+        sample (Sample): Runs one sample and returns its elapsed time and number of operations.
+        samples (int): The number of samples to take.
+
+    Returns:
+        BenchmarkResult: Throughput over all samples and p50/p99 of the per-operation latency of each sample.
+    """
+
+    totalElapsed = 0.0
+    totalOps = 0
+    latencies = []
+
+    for _ in range(samples):
+        elapsed, ops = sample()
+        if ops <= 0:
+            continue
+
+        totalElapsed += elapsed
+        totalOps += ops
+        latencies.append(elapsed / ops * 1e6)
+
+    return BenchmarkResult(
+        name,
+        totalOps,
+        totalOps / totalElapsed if totalElapsed > 0 else float('inf'),
+        percentile(latencies, 0.5),
+        percentile(latencies, 0.99),
+        peakRssMb(),
+    )
+
+
+def startedGame(seed: int) -> Game:
+    game = Game(random.Random(seed))
+    game.startRound()
+    return game
+
+
+def benchGenerateDeck(samples: int, inner: int = 1000) -> BenchmarkResult:
+    deck = Deck(random.Random(0))
+
+    def sample():
+        start = time.perf_counter()
+        for _ in range(inner):
+            deck.generateDeck()
+        return time.perf_counter() - start, inner
+
+    return measure('Deck.generateDeck', sample, samples)
+
+
+def benchDrawRandomTile(samples: int) -> BenchmarkResult:
+    """Draw a whole fresh Deck per sample. Creating the Deck is not timed.
+    """
+
+    rng = random.Random(0)
+
+    def sample():
+        deck = Deck(rng)
+        count = len(deck.deck)
+        start = time.perf_counter()
+        for _ in range(count):
+            deck.drawRandomTile()
+        return time.perf_counter() - start, count
+
+    return measure('Deck.drawRandomTile', sample, samples)
+
+
+def longSnake(length: int) -> Snake:
+    """Build a Snake of the given length by adding the double of the open pip to the right.
+    A real double-six Snake never passes 28 Tiles, but the Snake does not check for repeats.
+    """
+
+    snake = Snake()
+    snake.setStartPiece(Deck(random.Random(0)))
+
+    while len(snake) < length:
+        snake.addTile(Tile(snake.rightPip, snake.rightPip), Orientation.RIGHT)
+
+    return snake
+
+
+def benchAddTile(length: int, samples: int, inner: int = 100) -> BenchmarkResult:
+    """Add doubles to both ends of a Snake of the given length. The Snake grows by inner Tiles per sample.
+    """
+
+    snake = longSnake(length)
+    leftDouble = Tile(snake.leftPip, snake.leftPip)
+    rightDouble = Tile(snake.rightPip, snake.rightPip)
+
+    def sample():
+        start = time.perf_counter()
+        for _ in range(inner // 2):
+            snake.addTile(leftDouble, Orientation.LEFT)
+            snake.addTile(rightDouble, Orientation.RIGHT)
+        return time.perf_counter() - start, inner // 2 * 2
+
+    return measure('Snake.addTile@len={}'.format(length), sample, samples)
+
+
+def benchMustDraw(samples: int, inner: int = 1000) -> BenchmarkResult:
+    seeds = iter(range(samples))
+
+    def sample():
+        game = startedGame(next(seeds))
+        player = game.player1 if game.turn == 1 else game.player2
+        start = time.perf_counter()
+        for _ in range(inner):
+            game.mustDraw(player)
+        return time.perf_counter() - start, inner
+
+    return measure('Game.mustDraw', sample, samples)
+
+
+def benchDrawUntilValidTile(samples: int) -> BenchmarkResult:
+    """Time drawUntilValidTile() whenever a Player has to draw while playing seeded rounds.
+    Each sample plays one round. Samples without a draw are skipped.
+    """
+
+    seeds = iter(range(samples))
+
+    def sample():
+        game = startedGame(next(seeds))
+        computers = {1: Computer(game.player1, game), 2: Computer(game.player2, game)}
+        elapsed = 0.0
+        draws = 0
+
+        while not game.checkRoundWin():
+            player = game.player1 if game.turn == 1 else game.player2
+            game.startTurn()
+
+            if game.mustDraw(player) and not game.deck.isDeckEmpty():
+                start = time.perf_counter()
+                game.drawUntilValidTile(player)
+                elapsed += time.perf_counter() - start
+                draws += 1
+
+            if game.mustSkipTurn(player):
+                game.passTurn()
+            else:
+                tile, side = computers[game.turn].getMove()
+                game.playTile(player, tile, side)
+
+            if game.isTie():
+                break
+            game.skipTurn()
+
+        return elapsed, draws
+
+    return measure('Game.drawUntilValidTile', sample, samples)
+
+
+def benchPlayRound(samples: int) -> BenchmarkResult:
+    """Play a full round of two first-playable-Tile Computers per sample, without an Encoder.
+    """
+
+    simulator = Simulator(seed=0)
+    seeds = iter(range(samples))
+
+    def sample():
+        game = Game(random.Random(matchSeed(0, next(seeds))))
+        start = time.perf_counter()
+        simulator.playRound(game, 0)
+        return time.perf_counter() - start, 1
+
+    return measure('Simulator.playRound', sample, samples)
+
+
+def benchGameStateTransitions(samples: int) -> BenchmarkResult:
+    """Play a random round per sample on a GameState and unmake it. Each move made and each move unmade
+    is an operation. Choosing the random moves is timed too.
+    """
+
+    seeds = iter(range(samples))
+
+    def sample():
+        seed = next(seeds)
+        state = GameState.fromGame(startedGame(seed))
+        rng = random.Random(seed)
+        start = time.perf_counter()
+        moves = countTransitions(state, rng, 1)
+        return time.perf_counter() - start, 2 * moves
+
+    return measure('GameState.makeUnmake', sample, samples)
+
+
+def benchGameStateCopy(samples: int, inner: int = 1000) -> BenchmarkResult:
+    state = GameState.fromGame(midRoundGame(0))
+
+    def sample():
+        start = time.perf_counter()
+        for _ in range(inner):
+            state.copy()
+        return time.perf_counter() - start, inner
+
+    return measure('GameState.copy', sample, samples)
+
+
+def midRoundGame(seed: int, turns: int = 4) -> Game:
+    """A Game part of the way through a round, so the recorded hands, deck and snake are typical.
+    """
+
+    game = startedGame(seed)
+    simulator = Simulator(seed=seed)
+    computers = {1: Computer(game.player1, game), 2: Computer(game.player2, game)}
+
+    for _ in range(turns):
+        player = game.player1 if game.turn == 1 else game.player2
+        simulator.playTurn(game, player, computers[game.turn])
+        if game.checkRoundWin():
+            break
+        game.skipTurn()
+
+    return game
+
+
+def benchEncoderRecord(encoding: str, method: str, rowCounts: Tuple[int, ...],
+                       window: int = 1000) -> Iterator[BenchmarkResult]:
+    """Record rows of one table into a single Encoder until it holds each of rowCounts rows,
+    timing each of the last window rows before every row count. A method that slows down as the
+    table grows shows up as falling ops/sec across the row counts.
+    """
+
+    encoderType = loadEncoder(encoding)
+    encoder = encoderType()
+    # Match data needs a finished match, the other tables a round in progress
+    game = Simulator(seed=0).playMatch(0) if method == 'recordMatchData' else midRoundGame(0)
+    record = getattr(encoder, method)
+    rows = 0
+    deal = None
+
+    if method == 'recordRoundData':
+        # EventLogEncoder writes the deal kept at the first turn along with the round
+        encoder.recordTurnStartData(game, 0)
+        deal = getattr(encoder, 'pendingDeal', None)
+
+    def recordRow():
+        nonlocal rows
+        if deal is not None:
+            encoder.pendingDeal = deal
+        start = time.perf_counter()
+        record(game, rows)
+        elapsed = time.perf_counter() - start
+        rows += 1
+        return elapsed, 1
+
+    for rowCount in rowCounts:
+        while rows < rowCount - window:
+            recordRow()
+
+        yield measure('{}.{}@rows={}'.format(encoderType.__name__, method, rowCount),
+                      recordRow, rowCount - rows)
+
+
+RECORD_METHODS = ('recordMatchData', 'recordRoundData', 'recordTurnStartData', 'recordTurnEndData')
+
+
+def runBenchmarks(quick: bool = False, only: Optional[str] = None) -> List[BenchmarkResult]:
+    """Run every benchmark, or those whose name contains only.
+
+    Args:
+        quick (bool, optional): Take fewer samples and stop the Encoder benchmarks at fewer rows. Defaults to False.
+        only (Optional[str], optional): Substring of the benchmark names to run. Defaults to None.
+
+    Returns:
+        List[BenchmarkResult]: The results in the order they ran.
+    """
+
+    samples = 50 if quick else 200
+    rowCounts = (1000, 10000) if quick else (1000, 10000, 100000)
+
+    benchmarks = [
+        ('Deck.generateDeck', lambda: [benchGenerateDeck(samples)]),
+        ('Deck.drawRandomTile', lambda: [benchDrawRandomTile(samples * 10)]),
+        ('Snake.addTile', lambda: [benchAddTile(length, samples) for length in (28, 1000, 100000)]),
+        ('Game.mustDraw', lambda: [benchMustDraw(samples)]),
+        ('Game.drawUntilValidTile', lambda: [benchDrawUntilValidTile(samples * 5)]),
+        ('Simulator.playRound', lambda: [benchPlayRound(samples * 5)]),
+        ('GameState.makeUnmake', lambda: [benchGameStateTransitions(samples * 5)]),
+        ('GameState.copy', lambda: [benchGameStateCopy(samples)]),
+    ]
+
+    for encoding in ENCODERS:
+        for method in RECORD_METHODS:
+            name = '{}.{}'.format(ENCODERS[encoding][1], method)
+            benchmarks.append((name, lambda encoding=encoding, method=method:
+                               benchEncoderRecord(encoding, method, rowCounts)))
+
+    results = []
+    for name, run in benchmarks:
+        if only is not None and only not in name:
+            continue
+        results.extend(run())
+
+    return results
+
+
+def toJson(results: List[BenchmarkResult]) -> Dict:
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [result._asdict() for result in results],
+    }
+
+
+def mergeBaseline(results: List[BenchmarkResult], baseline: Optional[Dict]) -> Dict:
+    """Replace the entries of a baseline with the results of this run, keeping the ones it did not run. This way
+    --save-baseline with -k only refreshes the benchmarks a change touched.
+
+    Args:
+        results (List[BenchmarkResult]): The results of this run.
+        baseline (Optional[Dict]): The current baseline JSON, None to start a new one.
+
+    Returns:
+        Dict: The baseline JSON to save, in the order of the current baseline with new benchmarks appended.
+    """
+
+    merged = toJson(results)
+    if baseline is None:
+        return merged
+
+    fresh = {result['name']: result for result in merged['results']}
+    entries = [fresh.pop(entry['name'], entry) for entry in baseline['results']]
+    merged['results'] = entries + [result for result in merged['results'] if result['name'] in fresh]
+    return merged
+
+
+def relativeSpeed(result: BenchmarkResult, entry: Dict) -> float:
+    """Speed of a result relative to its baseline entry, from the median latencies. One preempted sample can halve
+    the ops/sec of a benchmark timing single rows on a busy machine, but leaves the median as it is.
+    """
+
+    return entry['p50Us'] / result.p50Us if result.p50Us > 0 else float('inf')
+
+
+def compareToBaseline(results: List[BenchmarkResult], baseline: Dict, tolerance: float) -> List[Tuple[str, float]]:
+    """Compare median speed against a baseline written by --save-baseline, see relativeSpeed(). A benchmark without
+    a baseline entry counts as a regression with a ratio of 0, so new benchmarks can't go unchecked until the
+    baseline is refreshed.
+
+    Args:
+        results (List[BenchmarkResult]): The results of this run.
+        baseline (Dict): The baseline JSON.
+        tolerance (float): Allowed slowdown, e.g. 0.3 flags benchmarks below 70% of the baseline speed.
+
+    Returns:
+        List[Tuple[str, float]]: (name, speed relative to the baseline) of every regressed benchmark.
+    """
+
+    entries = {entry['name']: entry for entry in baseline['results']}
+    regressions = []
+
+    for result in results:
+        if result.name not in entries:
+            regressions.append((result.name, 0.0))
+            continue
+
+        ratio = relativeSpeed(result, entries[result.name])
+        if ratio < 1 - tolerance:
+            regressions.append((result.name, ratio))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the game engine and Encoder hot paths.')
+    parser.add_argument('--quick', action='store_true', help='Take fewer samples and record fewer Encoder rows.')
+    parser.add_argument('-k', '--only', default=None, help='Only run benchmarks whose name contains this.')
+    parser.add_argument('-o', '--output', default=None, help='Write the results as JSON to this file.')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Baseline JSON to compare against.')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Write these results to the baseline, keeping the entries of benchmarks that did not run.')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Allowed drop in median speed relative to the baseline before a benchmark counts as a regression.')
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.quick, args.only)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    entries = {entry['name']: entry for entry in baseline['results']} if baseline else {}
+
+    print('{:<48} {:>14} {:>10} {:>10} {:>9} {:>9}'.format('benchmark', 'ops/sec', 'p50 us', 'p99 us', 'RSS MB', 'baseline'))
+    for result in results:
+        relative = '{:.2f}x'.format(relativeSpeed(result, entries[result.name])) if result.name in entries else '-'
+        rss = '{:.1f}'.format(result.peakRssMb) if result.peakRssMb is not None else '-'
+        print('{:<48} {:>14,.0f} {:>10.2f} {:>10.2f} {:>9} {:>9}'.format(
+            result.name, result.opsPerSec, result.p50Us, result.p99Us, rss, relative))
+
+    if args.output is not None:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(toJson(results), f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(mergeBaseline(results, baseline), f, indent=2)
+        print('Saved baseline to {}'.format(args.baseline))
+        return
+
+    if baseline is not None:
+        regressions = compareToBaseline(results, baseline, args.tolerance)
+        for name, ratio in regressions:
+            if name not in entries:
+                print('MISSING BASELINE {}: run with --save-baseline -k to record it'.format(name))
+            else:
+                print('REGRESSION {}: {:.0%} of baseline speed (median latency)'.format(name, ratio))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+from .game import Game
+from .tile import Tile
+from .snake import Snake
+from .encoder import Encoder, ColumnBuffer, COLUMN_TYPES, MATCH_COLUMNS
+from .sinks import INT, BOOL, MASK, INDICES
+from .tileTable import TILE_PIPS, TILE_COUNT, TILE_INDEX, PIP_MASKS, ORIENTED_OFFSET, tileIndex
+
+from typing import Iterable, List, Tuple
+
+
+def encodeTileIndex(tile: Tile) -> int:
+    return tile.index
+
+
+def tilesToMask(tiles: Iterable[Tile]) -> int:
+    """Encode a collection of Tiles, e.g. a hand or the deck, as a 28-bit mask of Tile indices.
+    """
+
+    mask = 0
+    for tile in tiles:
+        mask |= 1 << tile.index
+
+    return mask
+
+
+def maskToIndices(mask: int) -> List[int]:
+    """Get the Tile indices set in a mask, in ascending order.
+    """
+
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+
+    return indices
+
+
+def tileStringToIndex(encoded: str) -> int:
+    """E.g. '3|5' or '5|3' => 18"""
+
+    pip1, pip2 = encoded.split('|')
+    return TILE_INDEX[(int(pip1), int(pip2))]
+
+
+def indexToTileString(index: int) -> str:
+    """E.g. 18 => '3|5'"""
+
+    return '{}|{}'.format(*TILE_PIPS[index])
+
+
+def tilesStringToIndices(encoded: str, split=' ') -> List[int]:
+    """Convert a hand or deck string from Encoder.encodeHandContents()/encodeDeckContents() to Tile indices,
+    keeping their order. E.g. '3|5 6|6 2|5' => [18, 27, 15]
+    """
+
+    if not encoded:
+        return []
+
+    return [tileStringToIndex(t) for t in encoded.split(split)]
+
+
+def indicesToTilesString(indices: Iterable[int], split=' ') -> str:
+    """Inverse of tilesStringToIndices() for Tiles in their dealt orientation (pip1 <= pip2).
+    """
+
+    return split.join(indexToTileString(i) for i in indices)
+
+
+def tilesStringToMask(encoded: str, split=' ') -> int:
+    mask = 0
+    for index in tilesStringToIndices(encoded, split):
+        mask |= 1 << index
+
+    return mask
+
+
+def maskToTilesString(mask: int, split=' ') -> str:
+    """Convert a mask back to a hand or deck string. The Tiles are listed in index order,
+    since a mask does not keep the order they were drawn in.
+    """
+
+    return indicesToTilesString(maskToIndices(mask), split)
+
+
+def orientedIndex(pip1: int, pip2: int) -> int:
+    """Encode a placed Tile and its orientation. E.g. (3, 5) => 18, (5, 3) => 46, (6, 6) => 27
+    """
+
+    index = TILE_INDEX[(pip1, pip2)]
+    return index if pip1 <= pip2 else index + ORIENTED_OFFSET
+
+
+def orientedIndexToPips(oriented: int) -> Tuple[int, int]:
+    if oriented >= ORIENTED_OFFSET:
+        pip1, pip2 = TILE_PIPS[oriented - ORIENTED_OFFSET]
+        return pip2, pip1
+
+    return TILE_PIPS[oriented]
+
+
+def snakeToIndices(snake: Snake) -> Tuple[int, List[int]]:
+    """Encode a Snake as the key of its leftmost Tile and its oriented Tile indices from left to right.
+    """
+
+    return snake.leftKey, [orientedIndex(tile.pip1, tile.pip2) for tile in snake.tiles]
+
+
+def snakeLayoutToIndices(encoded: str, split=' ') -> Tuple[int, List[int]]:
+    """Convert a layout from Encoder.encodeSnakeLayout() to (leftKey, oriented indices).
+    E.g. '-1:4|3 0:3|6' => (-1, [45, 20])
+    """
+
+    if not encoded:
+        return 0, []
+
+    items = encoded.split(split)
+    leftKey = int(items[0].split(':')[0])
+    indices = []
+
+    for item in items:
+        pip1, pip2 = item.split(':')[1].split('|')
+        indices.append(orientedIndex(int(pip1), int(pip2)))
+
+    return leftKey, indices
+
+
+def indicesToSnakeLayout(leftKey: int, indices: Iterable[int], split=' ') -> str:
+    """Inverse of snakeLayoutToIndices(). The output is identical to Encoder.encodeSnakeLayout().
+    """
+
+    encoded = []
+    for key, oriented in enumerate(indices, leftKey):
+        encoded.append('{}:{}|{}'.format(key, *orientedIndexToPips(oriented)))
+
+    return split.join(encoded)
+
+
+def indicesToHex(indices: Iterable[int]) -> str:
+    """Pack Tile indices into a hex string, one byte per Tile. Decode with bytes.fromhex()
+    or numpy.frombuffer(bytes.fromhex(encoded), numpy.uint8).
+    """
+
+    return bytes(indices).hex()
+
+
+def hexToIndices(encoded: str) -> List[int]:
+    return list(bytes.fromhex(encoded))
+
+
+def masksToArray(masks: Iterable[int]):
+    """Unpack 28-bit masks into a (len(masks), 28) numpy uint8 array of 0/1. Requires numpy.
+    """
+
+    import numpy as np
+
+    masks = np.asarray(list(masks), dtype=np.uint32)
+    return ((masks[:, None] >> np.arange(TILE_COUNT, dtype=np.uint32)) & 1).astype(np.uint8)
+
+
+ROUND_COMPACT_COLUMNS = ("roundId", "initialTurn", "player1Points", "player2Points",
+                         "initialTileIndex", "snakeLeftKey", "snakeIndices", "boardLayout", "winner")
+TURN_START_COMPACT_COLUMNS = ("turnId", "playerTurn", "deckMask", "player1Mask", "player2Mask",
+                              "boardMask", "snakeLeftKey", "snakeIndices")
+TURN_END_COMPACT_COLUMNS = TURN_START_COMPACT_COLUMNS + ("tilesDrawnCount", "passedTurn")
+
+COMPACT_COLUMN_TYPES = dict(COLUMN_TYPES, **{
+    "initialTileIndex": INT,
+    "snakeLeftKey": INT,
+    "snakeIndices": INDICES,
+    "deckMask": MASK,
+    "player1Mask": MASK,
+    "player2Mask": MASK,
+    "boardMask": MASK,
+})
+
+
+class CompactEncoder(Encoder):
+    """Encoder that records Tiles by their fixed index instead of as strings.
+
+    - The deck, each hand and the Tiles on the board are 28-bit masks (see masksToArray())
+    - The snake is the key of its leftmost Tile plus a hex string of oriented Tile indices
+    from left to right (see hexToIndices())
+
+    Match data is the same as Encoder's. Use the converters in this module to get back
+    the string encodings of Encoder.
+    """
+
+    maxPips = (6,)
+
+    def __init__(self):
+        super().__init__()
+
+        self.matchBuffer = ColumnBuffer(MATCH_COLUMNS)
+        self.roundBuffer = ColumnBuffer(ROUND_COMPACT_COLUMNS)
+        self.turnStartBuffer = ColumnBuffer(TURN_START_COMPACT_COLUMNS)
+        self.turnEndBuffer = ColumnBuffer(TURN_END_COMPACT_COLUMNS)
+
+        self.columnTypes = COMPACT_COLUMN_TYPES
+
+
+    def encodeTurnTiles(self, game: Game) -> Tuple[int, int, int, int, int, str]:
+        """Encode the deck, hand and board masks and the snake of a Game. All of them are kept up to date
+        by the Deck, Players and Snake, so this is O(1).
+        """
+
+        snake = game.snake
+
+        return (
+            game.deck.deckMask,
+            game.player1.handMask,
+            game.player2.handMask,
+            snake.boardMask,
+            snake.leftKey,
+            snake.encodedIndices,
+        )
+
+
+    def recordRoundData(self, game: Game, roundId: int):
+        self.appendRow(
+            "round",
+            roundId,
+            game.initialTurn,
+            game.player1.points,
+            game.player2.points,
+            encodeTileIndex(game.snake.getStartTile()),
+            game.snake.leftKey,
+            game.snake.encodedIndices,
+            self.encodeBoardLayout(game.snake),
+            int(game.getRoundWinner().player.id),
+        )
+
+
+    def recordTurnStartData(self, game: Game, turnId: int):
+        self.appendRow("turnStart", turnId, game.turn, *self.encodeTurnTiles(game))
+
+
+    def recordTurnEndData(self, game: Game, turnId: int):
+        self.appendRow(
+            "turnEnd",
+            turnId,
+            game.turn,
+            *self.encodeTurnTiles(game),
+            game.drawCountCurrent,
+            game.hasPassedThisTurn,
+        )
@@ -1,27 +1,177 @@
-from player import Player
-from deck import Deck
-from game import Game
-from encoder import Encoder
-from tile import Tile
-from enums.orientations import Orientation
+from .player import Player
+from .deck import Deck
+from .game import Game
+from .tile import Tile, tilesOf
+from .enums.orientations import Orientation
+from .moves import Move, legalMoves
+from .gameListener import GameListener
+
+from typing import List, Tuple
 
 
 class Computer:
-    
+    """Computer-controlled policy for a Player. Subclasses override getMove() to choose
+    which Tile to play and which side of the Snake to play it on.
+    """
+
     def __init__(self, player: Player, game: Game):
         self.player = player
         self.game = game
+
+
+    def getMove(self) -> Tuple[Tile, Orientation]:
+        """Choose the Tile to play this turn and the side of the Snake to play it on.
+
+        Returns:
+            Tuple[Tile, Orientation]: The Tile to play and LEFT or RIGHT. None if there is no valid move.
+        """
+
+        return self.getFirstPlayableTile()
+
+
+    def getFirstPlayableTile(self) -> Tuple[Tile, Orientation]:
+        """Get the first Tile in hand that can be played, on the LEFT if it fits there, else on the RIGHT.
+        """
+
+        moves = legalMoves(self.player.hand, self.game.snake)
+
+        return moves[0] if moves else None
+
+
+class HighestPipComputer(Computer):
+    """Play the legal Tile with the most pips, to get rid of points. Ties go to the Tile that comes first in hand.
+    """
+
+    def getMove(self) -> Tuple[Tile, Orientation]:
+        moves = legalMoves(self.player.hand, self.game.snake)
+
+        if not moves:
+            return None
+
+        return max(moves, key=lambda move: move.tile.pip1 + move.tile.pip2)
+
+
+class RandomComputer(Computer):
+    """Play a uniformly random legal move, drawn from the Game's RNG.
+    """
+
+    def getMove(self) -> Tuple[Tile, Orientation]:
+        moves = legalMoves(self.player.hand, self.game.snake)
+
+        if not moves:
+            return None
+
+        return self.game.rng.choice(moves)
+
+
+class HeuristicComputer(Computer, GameListener):
+    """Rules based policy from docs/game_todo. Each legal move is scored by:
     
+    - Playing doubles and high pip Tiles
+    - Leaving an open pip this Player holds many other Tiles of
+    - Leaving an open pip the opponent drew or passed on
+    - Leaving an open pip with many Tiles already seen in hand or on the board
     
-    def getFirstPlayableTile(self):
-        for tile in self.player.hand:
-            if self.game.snake.canAddTileLeft(tile):
-                print(f"Can add {tile} to snake left")
-                return tile, Orientation.LEFT
-            elif self.game.snake.canAddTileRight(tile):
-                print(f"Can add {tile} to snake right")
-                return tile, Orientation.RIGHT
-            else:
-                continue
-
-        
\ No newline at end of file
+    The per-pip counts of held and played Tiles and the opponent's missing pips are kept up to date from the
+    Game's events (see GameListener), so a move only looks at the legal Tiles instead of rescanning the
+    hand and the Snake. The Computer stops listening once a new round starts.
+    """
+    
+    DOUBLE_BONUS = 6
+    PIP_WEIGHT = 1
+    SUIT_WEIGHT = 3
+    VOID_BONUS = 8
+    SEEN_WEIGHT = 1
+    
+    def __init__(self, player: Player, game: Game):
+        super().__init__(player, game)
+        
+        self.round = game.roundCounter
+        pipValues = game.tileSet.maxPip + 1
+        self.held = [0] * pipValues  # Tiles in hand with each pip value. A double counts once
+        self.played = [0] * pipValues  # Tiles on the Snake with each pip value
+        self.opponentVoid = 0  # Bit p is set if an opponent drew or passed with p open since they last played a p
+        self.tiles = tilesOf(game.tileSet)
+        
+        for tile in player.hand:
+            self.countTile(self.held, tile, 1)
+        for placed in game.snake.tiles:
+            self.countTile(self.played, placed.tile, 1)
+        
+        game.addListener(self)
+    
+    
+    @staticmethod
+    def countTile(counts: List[int], tile: Tile, change: int):
+        counts[tile.pip1] += change
+        if tile.pip2 != tile.pip1:
+            counts[tile.pip2] += change
+    
+    
+    def onRoundStart(self, game: Game):
+        if game.roundCounter != self.round:
+            game.removeListener(self)
+    
+    
+    def onTileDrawn(self, game: Game, player: Player, tile: Tile):
+        if player.id == self.player.id:
+            self.countTile(self.held, tile, 1)
+        else:
+            self.opponentVoid |= 1 << game.snake.leftPip | 1 << game.snake.rightPip
+    
+    
+    def onTilePlayed(self, game: Game, player: Player, placed, side: Orientation):
+        self.countTile(self.played, placed.tile, 1)
+        
+        if player.id == self.player.id:
+            self.countTile(self.held, placed.tile, -1)
+        else:
+            self.opponentVoid &= ~(1 << placed.pip1 | 1 << placed.pip2)
+    
+    
+    def onPass(self, game: Game, player: Player):
+        if player.id != self.player.id:
+            self.opponentVoid |= 1 << game.snake.leftPip | 1 << game.snake.rightPip
+    
+    
+    def scoreMove(self, tile: Tile, exposed: int) -> int:
+        """Score playing a Tile so that the given pip is left open at its end of the Snake.
+        """
+        
+        score = self.PIP_WEIGHT * (tile.pip1 + tile.pip2)
+        if tile.pip1 == tile.pip2:
+            score += self.DOUBLE_BONUS
+        
+        # The Tile itself still counts in held, so leave it out
+        score += self.SUIT_WEIGHT * (self.held[exposed] - 1)
+        score += self.SEEN_WEIGHT * (self.held[exposed] + self.played[exposed])
+        if self.opponentVoid >> exposed & 1:
+            score += self.VOID_BONUS
+        
+        return score
+    
+    
+    def getMove(self) -> Move:
+        snake = self.game.snake
+        left, right = snake.leftPip, snake.rightPip
+        pipMasks = snake.tileSet.pipMasks
+        legal = self.player.handMask & (pipMasks[left] | pipMasks[right])
+        
+        best = None
+        bestScore = None
+        
+        while legal:
+            low = legal & -legal
+            legal ^= low
+            tile = self.tiles[low.bit_length() - 1]
+            
+            for side, end in ((Orientation.LEFT, left), (Orientation.RIGHT, right)):
+                if tile.pip1 != end and tile.pip2 != end:
+                    continue
+                
+                exposed = tile.pip2 if tile.pip1 == end else tile.pip1
+                score = self.scoreMove(tile, exposed)
+                if bestScore is None or score > bestScore:
+                    best, bestScore = Move(tile, side), score
+        
+        return best
@@ -1,16 +1,26 @@
-from typing import Dict, List
-from itertools import combinations_with_replacement
-from random import shuffle, randint, choice
+from typing import Dict, List, Optional
+import random
 
-from tile import Tile
-from enums.orientations import Orientation
-from exceptions.gameExceptions import DeckEmptyException
+from .tile import Tile, tilesOf
+from .tileTable import DOUBLE_SIX, TileSet
+from .enums.orientations import Orientation
+from .exceptions.gameExceptions import DeckEmptyException
 
 class Deck:
     
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None, tileSet: TileSet = DOUBLE_SIX):
+        """
+        Args:
+            rng (Optional[random.Random], optional): The RNG of every draw. Defaults to the global random module.
+            tileSet (TileSet, optional): The double-N set to play with, see tileTable.tileSet(). Defaults to double-six.
+        """
+        
+        self.rng = rng if rng is not None else random  # Fall back to the global random module
+        self.tileSet = tileSet
+        self.allTiles = tilesOf(tileSet)  # Looked up once, generateDeck() copies it
         self.deckOrigin = self.generateDeck()
         self.deck = self.deckOrigin
+        self.deckMask = (1 << len(self.deck)) - 1  # Bit i is set if the Tile with index i is in the deck
         
     
     def printDeckDebug(self):
@@ -43,27 +53,18 @@ class Deck:
         except DeckEmptyException as e:
             print(e.args)
         
-        for t in self.deck:
-            if t == tile:
-                return True
-
-        return False
+        return bool(self.deckMask >> tile.index & 1)
     
     
     def generateDeck(self) -> List[Tile]:
-        """Generate the starting Dominoes deck with 28 Tiles. May add a parameter to allow for larger decks.
+        """Generate the starting Dominoes deck with every Tile of the Deck's set, e.g. 28 Tiles for double-six.
+        The Tiles are the shared instances from tile.tilesOf(), in index order, so no Tiles are allocated.
 
         Returns:
             List[Tile]: The populated deck list of Tiles.
         """
         
-        tiles = []
-        pipPairs = list(combinations_with_replacement(range(0, 7), 2))
-        
-        for pair in pipPairs:
-            tiles.append(Tile(pair[0], pair[1]))
-        
-        return tiles
+        return list(self.allTiles)
     
 
     def shuffleDeck(self) -> List[Tile]:
@@ -79,7 +80,7 @@ class Deck:
         except DeckEmptyException as e:
             print(e.args)
         
-        return shuffle(self.deck)
+        return self.rng.shuffle(self.deck)
     
     
     def isDeckEmpty(self) -> bool:
@@ -92,6 +93,20 @@ class Deck:
         return len(self.deck) <= 0
     
     
+    def removeTile(self, tile: Tile):
+        """Remove a given Tile from the deck list, e.g. to deal a chosen hand.
+
+        Args:
+            tile (Tile): The Tile to remove.
+
+        Raises:
+            ValueError: If the Tile is not in the deck.
+        """
+        
+        self.deck.remove(tile)
+        self.deckMask &= ~(1 << tile.index)
+    
+    
     def deleteTileByIndex(self, index: int):
         """Delete a Tile by index in the deck list if the key exists.
 
@@ -100,8 +115,9 @@ class Deck:
         """
         
         try:
-            self.deck.pop(index)
-        except KeyError as e:
+            tile = self.deck.pop(index)
+            self.deckMask &= ~(1 << tile.index)
+        except IndexError as e:
             print("No such key: {}".format(e.args))
     
     
@@ -118,12 +134,14 @@ class Deck:
         except DeckEmptyException as e:
             print(e.args)
         
-        randIndex = randint(0, len(self.deck) - 1)
+        randIndex = self.rng.randint(0, len(self.deck) - 1)
         return self.deck[randIndex]
     
     
     def drawRandomTile(self) -> Tile:
-        """Draws (returns and deletes) a randomly selected Tile from the deck list.
+        """Draws (returns and deletes) a randomly selected Tile from the deck list. The list is kept in index order,
+        so that a seeded Game draws the same Tiles whatever the set. Popping shifts at most 90 references, and the
+        membership queries use deckMask.
 
         Returns:
             Tile: The randomly selected Tile from the deck list.
@@ -135,5 +153,8 @@ class Deck:
         except DeckEmptyException as e:
             print(e.args)
         
-        return self.deck.pop(randint(0, len(self.deck) - 1))
+        tile = self.deck.pop(self.rng.randint(0, len(self.deck) - 1))
+        self.deckMask &= ~(1 << tile.index)
+        
+        return tile
         
@@ -0,0 +1,371 @@
+from .game import Game
+from .player import Player
+from .tile import TILES
+from .computer import Computer
+from .enums.orientations import Orientation
+from .simulator import COMPUTERS, matchSeed
+from .batchEngine import BatchEngine, POLICIES, dealFromSeed, BONEYARD_SIZE, LEFT, RIGHT
+from .tileTable import TILE_COUNT
+
+import random
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import gymnasium
+    from gymnasium import spaces
+except ImportError:  # The environments work without gymnasium, they just have no spaces
+    gymnasium = None
+
+# Action a plays Tile a % 28 on the LEFT if a < 28, else on the RIGHT. Drawing and passing are automatic.
+ACTION_COUNT = 2 * TILE_COUNT
+
+# Observation: hand mask (28), board mask (28), left pip one-hot (7), right pip one-hot (7),
+# boneyard Tiles left, opponent hand size
+OBSERVATION_SIZE = 2 * TILE_COUNT + 14 + 2
+BONEYARD_INDEX = 2 * TILE_COUNT + 14
+OPPONENT_HAND_INDEX = BONEYARD_INDEX + 1
+
+# Rewards from docs/game_todo
+PLACE_REWARD = 1.0
+DRAW_REWARD = -1.0  # Per Tile drawn
+PASS_REWARD = -5.0
+BLOCK_REWARD = 5.0  # The opponent had to draw or pass right after the agent's move
+WIN_REWARD = 10.0
+LOSE_REWARD = -10.0
+
+AGENT_ID = 1
+OPPONENT_ID = 2
+
+
+def spacesFor(shapePrefix: Tuple[int, ...] = ()):
+    """The observation and action spaces of the environments. Requires gymnasium.
+    """
+
+    if gymnasium is None:
+        raise ImportError('Spaces require gymnasium: pip install gymnasium')
+
+    observationSpace = spaces.Box(0, TILE_COUNT, shapePrefix + (OBSERVATION_SIZE,), dtype=np.float32)
+    if shapePrefix:
+        actionSpace = spaces.MultiDiscrete(np.full(shapePrefix, ACTION_COUNT))
+    else:
+        actionSpace = spaces.Discrete(ACTION_COUNT)
+
+    return observationSpace, actionSpace
+
+
+class DominoEnv(gymnasium.Env if gymnasium is not None else object):
+    """Gym-style environment of one round of Game. The agent is Player 1 and the opponent is a Computer.
+
+    The agent only acts when it has a legal move: its draws and passes, and the opponent's turns, are played
+    automatically between steps. info['action_mask'] marks the legal actions.
+    Works with or without gymnasium installed; the spaces need it.
+    """
+
+    def __init__(self, opponent: str = 'greedy'):
+        """
+        Args:
+            opponent (str, optional): Name of the opponent's Computer in simulator.COMPUTERS. Defaults to 'greedy'.
+        """
+
+        self.opponentType = COMPUTERS[opponent]
+        self.game: Optional[Game] = None
+        self.opponent: Optional[Computer] = None
+        self.blockPending = False
+
+        if gymnasium is not None:
+            self.observation_space, self.action_space = spacesFor()
+
+
+    @property
+    def agent(self) -> Player:
+        return self.game.player1
+
+
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
+        """Deal a new round with Game(random.Random(seed)) and play until the agent has a move.
+        Rewards for the agent's draws before its first move are not counted.
+        """
+
+        if gymnasium is not None:
+            super().reset(seed=seed)  # Seeds np_random
+
+        self.game = Game(random.Random(seed if seed is not None else random.randrange(2 ** 63)))
+        self.game.startRound()
+        self.opponent = self.opponentType(self.game.player2, self.game)
+        self.blockPending = False
+
+        self.advance()
+
+        return self.observation(), {'action_mask': self.actionMask()}
+
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict]:
+        mask = self.actionMask()
+        if not mask[action]:
+            raise ValueError('Action {} is not legal'.format(action))
+
+        game = self.game
+        side = Orientation.LEFT if action < TILE_COUNT else Orientation.RIGHT
+        game.playTile(self.agent, TILES[action % TILE_COUNT], side)
+        reward = PLACE_REWARD
+
+        terminated = game.checkRoundWin() or game.isTie()
+        if not terminated:
+            game.skipTurn()
+            self.blockPending = True
+            advanceReward, terminated = self.advance()
+            reward += advanceReward
+
+        info = {'action_mask': self.actionMask()}
+        if terminated:
+            winner = game.scoreRound()
+            reward += WIN_REWARD if winner.player.id == self.agent.id else LOSE_REWARD
+            info['winner'] = int(winner.player.id)
+            info['points'] = winner.pointsToGain
+
+        return self.observation(), reward, terminated, False, info
+
+
+    def advance(self) -> Tuple[float, bool]:
+        """Play the opponent's turns and the agent's draws and passes until the agent has a legal move or the
+        round is over, like Simulator.playRound().
+
+        Returns:
+            Tuple[float, bool]: The agent's reward for these turns and whether the round is over.
+        """
+
+        game = self.game
+        reward = 0.0
+
+        while not game.checkRoundWin():
+            player = game.getCurrentPlayer()
+            game.startTurn()
+
+            if game.mustDraw(player) and not game.deck.isDeckEmpty():
+                game.drawUntilValidTile(player)
+
+            stuck = game.mustSkipTurn(player)
+            if stuck:
+                game.passTurn()
+
+            if game.turn == AGENT_ID:
+                reward += DRAW_REWARD * game.drawCountCurrent
+                if not stuck:
+                    return reward, False
+                reward += PASS_REWARD
+            else:
+                if self.blockPending and (game.drawCountCurrent > 0 or stuck):
+                    reward += BLOCK_REWARD
+                self.blockPending = False
+
+                if not stuck:
+                    tile, side = self.opponent.getMove()
+                    game.playTile(player, tile, side)
+
+            if game.isTie():
+                break
+
+            game.skipTurn()
+
+        return reward, True
+
+
+    def actionMask(self) -> np.ndarray:
+        mask = np.zeros(ACTION_COUNT, dtype=bool)
+        snake = self.game.snake
+
+        for tile in self.agent.hand:
+            if tile.pip1 == snake.leftPip or tile.pip2 == snake.leftPip:
+                mask[tile.index] = True
+            if tile.pip1 == snake.rightPip or tile.pip2 == snake.rightPip:
+                mask[TILE_COUNT + tile.index] = True
+
+        return mask
+
+
+    def observation(self) -> np.ndarray:
+        game = self.game
+        observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+
+        for tile in self.agent.hand:
+            observation[tile.index] = 1
+        for placed in game.snake.tiles:
+            observation[TILE_COUNT + placed.index] = 1
+
+        observation[2 * TILE_COUNT + game.snake.leftPip] = 1
+        observation[2 * TILE_COUNT + 7 + game.snake.rightPip] = 1
+        observation[BONEYARD_INDEX] = len(game.deck.deck)
+        observation[OPPONENT_HAND_INDEX] = len(game.player2.hand)
+
+        return observation
+
+
+class VectorDominoEnv:
+    """Synchronous vector of DominoEnv rounds, stepped together on a BatchEngine instead of Game objects.
+    Same rules, rewards and observations as DominoEnv, and the same rounds for the same seeds with the
+    'first' and 'greedy' opponents.
+
+    Finished rounds are reset in the same step() call: their observation is the first of the new round and
+    info['final_observation'] holds the last one of the old round.
+    Episode e overall (counting every env) is dealt from matchSeed(seed, e).
+    """
+
+    def __init__(self, numEnvs: int, opponent: str = 'greedy', seed: Optional[int] = None):
+        """
+        Args:
+            numEnvs (int): Number of rounds played at once.
+            opponent (str, optional): 'first', 'greedy' or 'random', see batchEngine.POLICIES. Defaults to 'greedy'.
+            seed (Optional[int], optional): Master seed of the episodes. Defaults to a random seed.
+        """
+
+        assert opponent in POLICIES, 'Opponent must be one of {}'.format(', '.join(POLICIES))
+
+        self.numEnvs = numEnvs
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.episodeCount = 0
+        self.engine = BatchEngine.fromSeeds([0] * numEnvs, opponent, np.random.default_rng(self.seed))
+        self.blockPending = np.zeros(numEnvs, dtype=bool)
+
+        if gymnasium is not None:
+            self.single_observation_space, self.single_action_space = spacesFor()
+            self.observation_space, self.action_space = spacesFor((numEnvs,))
+
+
+    def reset(self, seed: Optional[int] = None, options: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
+        if seed is not None:
+            self.seed = seed
+            self.engine.rng = np.random.default_rng(seed)
+        self.episodeCount = 0
+
+        self.resetGames(np.arange(self.numEnvs))
+
+        return self.observations(), {'action_mask': self.actionMasks()}
+
+
+    def resetGames(self, games: np.ndarray):
+        for k in games:
+            self.engine.dealRound(k, dealFromSeed(matchSeed(self.seed, self.episodeCount)))
+            self.episodeCount += 1
+
+        self.blockPending[games] = False
+        self.advance(games, np.zeros(self.numEnvs, dtype=np.float32))
+
+
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict]:
+        """Play one action in every env.
+
+        Args:
+            actions (np.ndarray): One legal action per env.
+
+        Returns:
+            Tuple: observations, rewards, terminated, truncated and info, each with one row per env.
+        """
+
+        engine = self.engine
+        actions = np.asarray(actions, dtype=np.intp)
+        games = np.arange(self.numEnvs)
+        agents = np.zeros(self.numEnvs, dtype=np.intp)
+
+        legal = self.actionMasks()[games, actions]
+        if not legal.all():
+            raise ValueError('Illegal actions in envs {}'.format(np.flatnonzero(~legal).tolist()))
+
+        rewards = np.full(self.numEnvs, PLACE_REWARD, dtype=np.float32)
+        engine.playMoves(games, agents, actions % TILE_COUNT, actions // TILE_COUNT)
+        engine.endTurns(games, agents)
+
+        self.blockPending[:] = True
+        self.advance(games[engine.active], rewards)
+
+        terminated = ~engine.active
+        info = {}
+        if terminated.any():
+            done = np.flatnonzero(terminated)
+            winner, points = engine.score(done)
+            rewards[done] += np.where(winner == AGENT_ID, WIN_REWARD, LOSE_REWARD)
+
+            info['winner'] = np.zeros(self.numEnvs, dtype=np.int8)
+            info['points'] = np.zeros(self.numEnvs, dtype=np.int16)
+            info['winner'][done] = winner
+            info['points'][done] = points
+            info['final_observation'] = self.observations()
+
+            self.resetGames(done)
+
+        info['action_mask'] = self.actionMasks()
+
+        return self.observations(), rewards, terminated, np.zeros(self.numEnvs, dtype=bool), info
+
+
+    def advance(self, games: np.ndarray, rewards: np.ndarray):
+        """Play the opponent's turns and the agent's draws and passes in each game until the agent has a
+        legal move or the round is over, adding the agent's rewards.
+        """
+
+        engine = self.engine
+
+        while len(games) > 0:
+            players = engine.turn[games].astype(np.intp)
+            isAgent = players == 0
+
+            # The agent chooses its own move
+            waiting = isAgent & engine.canPlay(games, 0)
+            games = games[~waiting]
+            players = players[~waiting]
+            isAgent = isAgent[~waiting]
+            if len(games) <= 0:
+                break
+
+            draws = engine.draws[games, players].copy()
+            passes = engine.passes[games, players].copy()
+            playing = engine.drawOrPass(games, players)
+            drew = engine.draws[games, players] - draws
+            passed = engine.passes[games, players] - passes
+
+            agentGames = games[isAgent]
+            rewards[agentGames] += DRAW_REWARD * drew[isAgent] + PASS_REWARD * passed[isAgent]
+
+            isOpponent = ~isAgent
+            opponentGames = games[isOpponent]
+            blocked = self.blockPending[opponentGames] & ((drew[isOpponent] > 0) | (passed[isOpponent] > 0))
+            rewards[opponentGames[blocked]] += BLOCK_REWARD
+            self.blockPending[opponentGames] = False
+
+            opponentPlaying = isOpponent & playing
+            g = games[opponentPlaying]
+            if len(g) > 0:
+                p = players[opponentPlaying]
+                engine.playMoves(g, p, *engine.chooseMoves(g, p))
+
+            # An agent that drew a playable Tile keeps its turn to choose a move
+            ending = isOpponent | ~playing
+            engine.endTurns(games[ending], players[ending])
+
+            games = np.concatenate((games[ending][engine.active[games[ending]]], games[isAgent & playing]))
+
+
+    def actionMasks(self) -> np.ndarray:
+        legalLeft, legalRight = self.engine.legalTiles(np.arange(self.numEnvs), np.zeros(self.numEnvs, dtype=np.intp))
+        return np.concatenate((legalLeft, legalRight), axis=1)
+
+
+    def observations(self) -> np.ndarray:
+        engine = self.engine
+        rows = np.arange(self.numEnvs)
+        observations = np.zeros((self.numEnvs, OBSERVATION_SIZE), dtype=np.float32)
+
+        hand = engine.hands[:, 0]
+        inBoneyard = np.zeros((self.numEnvs, TILE_COUNT), dtype=bool)
+        undrawn = np.arange(BONEYARD_SIZE) >= engine.drawCount[:, None]
+        inBoneyard[np.repeat(rows, BONEYARD_SIZE)[undrawn.ravel()], engine.drawOrder[undrawn].astype(np.intp)] = True
+
+        observations[:, :TILE_COUNT] = hand
+        observations[:, TILE_COUNT:2 * TILE_COUNT] = ~(hand | engine.hands[:, 1] | inBoneyard)
+        observations[rows, 2 * TILE_COUNT + engine.ends[:, LEFT]] = 1
+        observations[rows, 2 * TILE_COUNT + 7 + engine.ends[:, RIGHT]] = 1
+        observations[:, BONEYARD_INDEX] = BONEYARD_SIZE - engine.drawCount
+        observations[:, OPPONENT_HAND_INDEX] = engine.hands[:, 1].sum(axis=1)
+
+        return observations
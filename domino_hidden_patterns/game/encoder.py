@@ -1,11 +1,38 @@
-from game import Game
-from tile import Tile
-from snake import Snake
-from player import Player
-from deck import Deck
+from .game import Game
+from .tile import Tile
+from .snake import Snake
+from .player import Player
+from .deck import Deck
+from .sinks import SINKS, TableSink, INT, BOOL, TILES
+from .tileTable import MAX_PIPS
 
-import pandas as pd
+import os
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+# pandas is only imported once a table is turned into a DataFrame, so playing games doesn't load it
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Column schemas of match.csv, round.csv, turnStart.csv and turnEnd.csv
+MATCH_COLUMNS = ("matchId", "initialTurn", "player1DrawCount", "player2DrawCount",
+                 "player1PassCount", "player2PassCount", "roundCount", "winner")
+ROUND_COLUMNS = ("roundId", "initialTurn", "player1Points", "player2Points",
+                 "initialTile", "snakeLayout", "boardLayout", "winner")
+TURN_START_COLUMNS = ("turnId", "playerTurn", "deckContents", "player1Hand", "player2Hand", "snakeContents")
+TURN_END_COLUMNS = TURN_START_COLUMNS + ("tilesDrawnCount", "passedTurn")
+
+TABLES = ("match", "round", "turnStart", "turnEnd")
+
+COLUMN_TYPES = {
+    "matchId": INT, "roundId": INT, "turnId": INT,
+    "initialTurn": INT, "playerTurn": INT, "winner": INT, "roundCount": INT,
+    "player1DrawCount": INT, "player2DrawCount": INT, "player1PassCount": INT, "player2PassCount": INT,
+    "player1Points": INT, "player2Points": INT, "tilesDrawnCount": INT,
+    "passedTurn": BOOL,
+    "initialTile": TILES, "snakeLayout": TILES, "boardLayout": TILES, "deckContents": TILES,
+    "player1Hand": TILES, "player2Hand": TILES, "snakeContents": TILES,
+}
 
 @dataclass
 class EncodedTile:
@@ -19,6 +46,41 @@ class EncodedSnake:
     encoded: str
 
 
+class ColumnBuffer:
+    """Append-only table that stores rows as one list per column. Appending a row is O(1);
+    the DataFrame is only built when it is asked for.
+    """
+    
+    def __init__(self, columns: Tuple[str, ...]):
+        self.columns = columns
+        self.data: Dict[str, List] = {column: [] for column in columns}
+    
+    
+    def append(self, *values):
+        """Append a row. Values must be in the same order as the columns.
+        """
+        
+        assert len(values) == len(self.columns), 'Row must have a value for every column'
+        
+        for column, value in zip(self.columns, values):
+            self.data[column].append(value)
+    
+    
+    def toDataFrame(self) -> 'pd.DataFrame':
+        import pandas as pd
+
+        return pd.DataFrame(self.data, columns=list(self.columns))
+    
+    
+    def clear(self):
+        for values in self.data.values():
+            values.clear()
+    
+    
+    def __len__(self) -> int:
+        return len(self.data[self.columns[0]])
+
+
 class Encoder:
     """Encode all game data for each turn similar to algebraic chess notation for use in learning model.
     Save outputs in JSON format and CSV. 
@@ -47,13 +109,122 @@ class Encoder:
         - The snake layout
         - Number of Tiles drawn
         - Turn pass boolean
+        
+    Rows are buffered in a ColumnBuffer per table and only turned into DataFrames by
+    matchDf, roundDf, turnStartDf and turnEndDf. After stream() is called, each table is 
+    instead written to its file every flushEvery rows so memory use stays bounded.
+    
+    The tables have a column per Player for two Players. Tiles are written as pips, so any set can be recorded.
     """
     
+    tables = TABLES
+    maxPips = MAX_PIPS  # Largest pip of the sets whose Games can be recorded, see tileTable.tileSet()
+    
     def __init__(self):
-        self.matchDf = pd.DataFrame()
-        self.roundDf = pd.DataFrame()
-        self.turnStartDf = pd.DataFrame()
-        self.turnEndDf = pd.DataFrame()
+        self.matchBuffer = ColumnBuffer(MATCH_COLUMNS)
+        self.roundBuffer = ColumnBuffer(ROUND_COLUMNS)
+        self.turnStartBuffer = ColumnBuffer(TURN_START_COLUMNS)
+        self.turnEndBuffer = ColumnBuffer(TURN_END_COLUMNS)
+        
+        self.columnTypes = COLUMN_TYPES
+        self.sinks: Dict[str, TableSink] = {}
+        self.flushEvery = 0
+    
+    
+    def getBuffer(self, table: str) -> ColumnBuffer:
+        return getattr(self, "{}Buffer".format(table))
+    
+    
+    @property
+    def matchDf(self) -> 'pd.DataFrame':
+        return self.matchBuffer.toDataFrame()
+    
+    
+    @property
+    def roundDf(self) -> 'pd.DataFrame':
+        return self.roundBuffer.toDataFrame()
+    
+    
+    @property
+    def turnStartDf(self) -> 'pd.DataFrame':
+        return self.turnStartBuffer.toDataFrame()
+    
+    
+    @property
+    def turnEndDf(self) -> 'pd.DataFrame':
+        return self.turnEndBuffer.toDataFrame()
+    
+    
+    def clear(self):
+        """Drop every buffered row, e.g. after the DataFrames have been saved.
+        """
+        
+        for table in self.tables:
+            self.getBuffer(table).clear()
+    
+    
+    def stream(self, directory: str, fileFormat: str = "csv", flushEvery: int = 10000):
+        """Stream every table to '<table>.<format extension>' in directory instead of keeping it in memory.
+
+        Args:
+            directory (str): The directory to write the files to.
+            fileFormat (str, optional): 'csv', 'jsonl', 'parquet' or 'bin' (see sinks.RecordSink). Defaults to "csv".
+            flushEvery (int, optional): The number of buffered rows of a table that triggers a write. 
+            Each write is one Parquet row group. Defaults to 10000.
+        """
+        
+        assert fileFormat in SINKS, 'File format must be one of {}'.format(', '.join(SINKS))
+        
+        self.close()
+        os.makedirs(directory, exist_ok=True)
+        
+        sinkType = SINKS[fileFormat]
+        for table in self.tables:
+            path = os.path.join(directory, "{}.{}".format(table, sinkType.extension))
+            self.sinks[table] = sinkType(path, self.getBuffer(table).columns, self.columnTypes)
+        
+        self.flushEvery = flushEvery
+    
+    
+    def flushTable(self, table: str):
+        """Write the buffered rows of a table to its sink and clear them.
+        """
+        
+        buffer = self.getBuffer(table)
+        if len(buffer) > 0:
+            self.sinks[table].write(buffer.toDataFrame())
+            buffer.clear()
+    
+    
+    def flush(self):
+        """Write every buffered row to the sinks opened by stream().
+        """
+        
+        for table in self.sinks:
+            self.flushTable(table)
+    
+    
+    def close(self):
+        """Flush and close the sinks opened by stream(). Does nothing if not streaming.
+        """
+        
+        self.flush()
+        
+        for sink in self.sinks.values():
+            sink.close()
+        
+        self.sinks = {}
+    
+    
+    def appendRow(self, table: str, *values):
+        """Buffer a row of a table, and write the table's buffer out if it has reached flushEvery rows.
+        """
+        
+        buffer = self.getBuffer(table)
+        buffer.append(*values)
+        
+        if table in self.sinks and len(buffer) >= self.flushEvery:
+            self.flushTable(table)
     
     
     def encodeTile(self, tile: Tile):
@@ -65,16 +236,30 @@ class Encoder:
     
     
     def encodeSnakeLayout(self, snake: Snake, split=" "):
-        """Encode a Snake's dict contents.
+        """Encode a Snake's dict contents. The default split is read from Snake.encodedLayout, which is
+        kept up to date as Tiles are added instead of being rebuilt every turn.
         E.g. {-1: Tile(1, 2), 0: Tile(2, 3), 1: Tile(3, 4)} => "-1:1|2 0:2|3 1:3|4"
         """
         
-        encoded = []
+        if split == " ":
+            return snake.encodedLayout
+        
+        return split.join(tile.encode(key) for key, tile in enumerate(snake.tiles, snake.leftKey))
+    
+    
+    def encodeBoardLayout(self, snake: Snake, split=" "):
+        """Encode where each Tile of a Snake is on the board (see layout.BoardLayout), from left to right:
+        the snake key, the placed Tile, the grid cell of its top left corner and the side pip1 is on.
+        The default split is read from BoardLayout.encoded, kept up to date as Tiles are laid.
+        E.g. "-1:1|2@19,23,LEFT 0:2|2@23,22,UP 1:2|3@25,23,LEFT"
+        """
+        
+        layout = snake.layout
         
-        for key, tile in snake.snake.items():
-            encoded.append("{}:{}".format(key, self.encodeTile(tile)))
+        if split == " ":
+            return layout.encoded
         
-        return split.join(encoded)  
+        return split.join(laid.encode(key) for key, laid in enumerate(layout.tiles, layout.leftKey))
     
     
     def encodeHandContents(self, player: Player, split=" "):
@@ -99,6 +284,14 @@ class Encoder:
         return split.join(encoded)
     
     
+    def startMatch(self, matchId: int):
+        """Called before the first round of a match is played. Encoder doesn't need it; subclasses 
+        can use it to key the rows they record.
+        """
+        
+        pass
+    
+    
     def recordMatchData(self, game: Game, matchId: int):
         '''
         - First player
@@ -107,19 +300,17 @@ class Encoder:
         - Number of rounds and the winner for each
         '''
         
-        matchData = {}
-        
-        matchData["matchId"] = matchId
-        matchData["initialTurn"] = game.initialTurn
-        matchData["player1DrawCount"] = game.playerDrawCountsTotal['1']
-        matchData["player2DrawCount"] = game.playerDrawCountsTotal['2']
-        matchData["player1PassCount"] = game.playerPassCountsTotal['1']
-        matchData["player2PassCount"] = game.playerPassCountsTotal['2']
-        matchData["roundCount"] = game.roundCounter
-        matchData["winner"] = game.getMatchWinner().id
-        
-        row = pd.DataFrame([matchData])
-        self.matchDf = pd.concat([self.matchDf, row], ignore_index=True)
+        self.appendRow(
+            "match",
+            matchId,
+            game.initialTurn,
+            game.playerDrawCountsTotal['1'],
+            game.playerDrawCountsTotal['2'],
+            game.playerPassCountsTotal['1'],
+            game.playerPassCountsTotal['2'],
+            game.roundCounter,
+            int(game.getMatchWinner().id),
+        )
     
     
     def recordRoundData(self, game: Game, roundId: int):
@@ -127,21 +318,20 @@ class Encoder:
         - Each player's points at the end of each round
         - The initial piece played
         - The final layout of the snake
+        - The final layout of the Tiles on the board
         '''
         
-        roundData = {}
-        
-        # When writing to csv, 'initialTurn' turns into 'NoneialTurn'???
-        roundData["roundId"] = roundId
-        roundData["initialTurn"] = game.initialTurn
-        roundData["player1Points"] = game.player1.points
-        roundData["player2Points"] = game.player2.points
-        roundData["initialTile"] = self.encodeTile(game.snake.snake[0])
-        roundData["snakeLayout"] = self.encodeSnakeLayout(game.snake)
-        roundData["winner"] = game.getRoundWinner().player.id
-        
-        row = pd.DataFrame([roundData])
-        self.roundDf = pd.concat([self.roundDf, row], ignore_index=True)
+        self.appendRow(
+            "round",
+            roundId,
+            game.initialTurn,
+            game.player1.points,
+            game.player2.points,
+            self.encodeTile(game.snake.getStartTile()),
+            self.encodeSnakeLayout(game.snake),
+            self.encodeBoardLayout(game.snake),
+            int(game.getRoundWinner().player.id),
+        )
         
     
     def recordTurnStartData(self, game: Game, turnId: int):
@@ -152,18 +342,15 @@ class Encoder:
         - The snake layout
         '''
         
-        turnStartData = {}
-        
-        # When saving to CSV, 'playerTurn' turns into NoneerTurn???
-        turnStartData["turnId"] = turnId
-        turnStartData["playerTurn"] = game.turn
-        turnStartData["deckContents"] = self.encodeDeckContents(game.deck)
-        turnStartData["player1Hand"] = self.encodeHandContents(game.player1)
-        turnStartData["player2Hand"] = self.encodeHandContents(game.player2)
-        turnStartData["snakeContents"] = self.encodeSnakeLayout(game.snake)
-        
-        row = pd.DataFrame([turnStartData])
-        self.turnStartDf = pd.concat([self.turnStartDf, row], ignore_index=True)
+        self.appendRow(
+            "turnStart",
+            turnId,
+            game.turn,
+            self.encodeDeckContents(game.deck),
+            self.encodeHandContents(game.player1),
+            self.encodeHandContents(game.player2),
+            self.encodeSnakeLayout(game.snake),
+        )
     
     
     def recordTurnEndData(self, game: Game, turnId: int):
@@ -176,33 +363,29 @@ class Encoder:
         - Turn pass boolean
         '''
 
-        turnEndData = {}
-
-        turnEndData["turnId"] = turnId
-        turnEndData["playerTurn"] = game.turn
-        turnEndData["deckContents"] = self.encodeDeckContents(game.deck)
-        turnEndData["player1Hand"] = self.encodeHandContents(game.player1)
-        turnEndData["player2Hand"] = self.encodeHandContents(game.player2)
-        turnEndData["snakeContents"] = self.encodeSnakeLayout(game.snake)
-        turnEndData["tilesDrawnCount"] = game.drawCountCurrent
-        turnEndData["passedTurn"] = game.hasPassedThisTurn
-        
-        row = pd.DataFrame([turnEndData])
-        self.turnEndDf = pd.concat([self.turnEndDf, row], ignore_index=True)
+        self.appendRow(
+            "turnEnd",
+            turnId,
+            game.turn,
+            self.encodeDeckContents(game.deck),
+            self.encodeHandContents(game.player1),
+            self.encodeHandContents(game.player2),
+            self.encodeSnakeLayout(game.snake),
+            game.drawCountCurrent,
+            game.hasPassedThisTurn,
+        )
     
     
-    def saveDfToJSON(self, df: pd.DataFrame, path: str):
+    def saveDfToJSON(self, df: 'pd.DataFrame', path: str):
         try:
-            with open(path, 'a') as f:
-                f.write(str(df.to_json(path, orient='records', lines=True)))
+            df.to_json(path, orient='records', lines=True)
         except Exception as e:
             print(e.args)
     
     
-    def saveDfToCSV(self, df: pd.DataFrame, path: str):
+    def saveDfToCSV(self, df: 'pd.DataFrame', path: str):
         try:
-            with open(path, 'a') as f:
-                f.write(str(df.to_csv(path, encoding='utf-8', index=False)))
+            df.to_csv(path, encoding='utf-8', index=False)
         except Exception as e:
             print(e.args)
         
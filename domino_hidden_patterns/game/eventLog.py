@@ -0,0 +1,267 @@
+from .game import Game
+from .encoder import Encoder, ColumnBuffer, COLUMN_TYPES, TURN_END_COLUMNS, TURN_START_COLUMNS
+from .compact import (TILE_COUNT, tileIndex, encodeTileIndex, orientedIndex, orientedIndexToPips, indicesToHex,
+                     hexToIndices, indicesToTilesString, indicesToSnakeLayout, maskToIndices)
+from .enums.orientations import Orientation
+from .sinks import INT, BOOL, INDICES
+
+import os
+import pandas as pd
+from collections import deque
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+# Values of the side column of the turn table
+NO_SIDE = -1
+SIDE_LEFT = 0
+SIDE_RIGHT = 1
+
+# Value of the tilePlayed column when no Tile was played
+NO_TILE = -1
+
+DEAL_COLUMNS = ("matchId", "roundId", "firstTurn", "startTile", "player1Hand", "player2Hand")
+TURN_EVENT_COLUMNS = ("matchId", "roundId", "turnId", "playerTurn", "tilesDrawn", "tilePlayed", "side", "passedTurn")
+
+EVENT_COLUMN_TYPES = dict(COLUMN_TYPES, **{
+    "firstTurn": INT,
+    "startTile": INT,
+    "player1Hand": INDICES,
+    "player2Hand": INDICES,
+    "tilesDrawn": INDICES,
+    "tilePlayed": INT,
+    "side": INT,
+})
+
+
+class EventLogEncoder(Encoder):
+    """Encoder that records each round as its initial deal followed by one small event row per turn,
+    instead of full turn start and end snapshots. Writing a turn is O(1).
+
+    - deal: recorded once per round. The first Player, the start Tile index and each Player's
+    dealt hand as hex Tile indices in hand order. The deck is every other Tile, in index order.
+    - turn: the Tiles drawn, the oriented index of the Tile played (NO_TILE if none), the side
+    it was played on and whether the turn was passed.
+
+    Deal and turn rows are keyed by (matchId, roundId), tracked through startMatch() and
+    recordRoundData(). Match and round tables are the same as Encoder's. Use RoundReplayer or deriveTurnTables()
+    to get back the turnStart and turnEnd views.
+    """
+
+    tables = ("match", "round", "deal", "turn")
+    maxPips = (6,)
+
+    def __init__(self):
+        super().__init__()
+
+        self.dealBuffer = ColumnBuffer(DEAL_COLUMNS)
+        self.turnBuffer = ColumnBuffer(TURN_EVENT_COLUMNS)
+        self.columnTypes = EVENT_COLUMN_TYPES
+
+        self.matchId = 0
+        self.roundId = 0
+        self.pendingDeal = None
+
+
+    @property
+    def dealDf(self) -> pd.DataFrame:
+        return self.dealBuffer.toDataFrame()
+
+
+    @property
+    def turnDf(self) -> pd.DataFrame:
+        return self.turnBuffer.toDataFrame()
+
+
+    def startMatch(self, matchId: int):
+        self.matchId = matchId
+        self.roundId = 0
+
+
+    def recordTurnStartData(self, game: Game, turnId: int):
+        """Keep the deal of the round at its first turn. It is written with the round's ID by recordRoundData().
+        """
+
+        if turnId == 0:
+            self.pendingDeal = (
+                game.turn,
+                encodeTileIndex(game.snake.getStartTile()),
+                indicesToHex(encodeTileIndex(t) for t in game.player1.hand),
+                indicesToHex(encodeTileIndex(t) for t in game.player2.hand),
+            )
+
+
+    def recordTurnEndData(self, game: Game, turnId: int):
+        tile = game.tilePlayedCurrent
+
+        if tile is None:
+            tilePlayed, side = NO_TILE, NO_SIDE
+        else:
+            tilePlayed = orientedIndex(tile.pip1, tile.pip2)
+            side = SIDE_LEFT if game.sidePlayedCurrent is Orientation.LEFT else SIDE_RIGHT
+
+        self.appendRow(
+            "turn",
+            self.matchId,
+            self.roundId,
+            turnId,
+            game.turn,
+            indicesToHex(encodeTileIndex(t) for t in game.tilesDrawnCurrent),
+            tilePlayed,
+            side,
+            game.hasPassedThisTurn,
+        )
+
+
+    def recordRoundData(self, game: Game, roundId: int):
+        super().recordRoundData(game, roundId)
+
+        assert self.pendingDeal is not None, 'recordTurnStartData() must be called for the first turn of the round'
+
+        self.appendRow("deal", self.matchId, roundId, *self.pendingDeal)
+        self.pendingDeal = None
+        self.roundId = roundId + 1
+
+
+class TurnState(NamedTuple):
+    """Full state of a round at the start or end of a turn. Tiles are indices from compact.py.
+    """
+
+    turnId: int
+    playerTurn: int
+    deck: List[int]
+    player1Hand: List[int]
+    player2Hand: List[int]
+    snakeLeftKey: int
+    snake: List[int]
+    tilesDrawnCount: int
+    passedTurn: bool
+
+
+class RoundReplayer:
+    """Rebuild the full state of every turn of a round from its deal and turn events.
+    """
+
+    def __init__(self, deal: Dict, turns: List[Dict]):
+        """
+        Args:
+            deal (Dict): The round's row of the deal table.
+            turns (List[Dict]): The round's rows of the turn table, in turn order.
+        """
+
+        self.deal = deal
+        self.turns = turns
+
+
+    def iterStates(self) -> Iterator[Tuple[TurnState, TurnState]]:
+        """Replay the round, yielding the (start, end) TurnState of each turn.
+        """
+
+        hands = {
+            1: hexToIndices(self.deal["player1Hand"]),
+            2: hexToIndices(self.deal["player2Hand"]),
+        }
+        startTile = int(self.deal["startTile"])
+
+        deckMask = (1 << TILE_COUNT) - 1
+        for index in hands[1] + hands[2] + [startTile]:
+            deckMask &= ~(1 << index)
+
+        snake = deque([startTile])
+        leftKey = 0
+
+        for turn in self.turns:
+            turnId = int(turn["turnId"])
+            playerTurn = int(turn["playerTurn"])
+            start = TurnState(turnId, playerTurn, maskToIndices(deckMask), list(hands[1]), list(hands[2]),
+                              leftKey, list(snake), 0, False)
+
+            hand = hands[playerTurn]
+            drawn = hexToIndices(turn["tilesDrawn"])
+            for index in drawn:
+                deckMask &= ~(1 << index)
+                hand.append(index)
+
+            tilePlayed = int(turn["tilePlayed"])
+            if tilePlayed != NO_TILE:
+                hand.remove(tileIndex(*orientedIndexToPips(tilePlayed)))
+
+                if int(turn["side"]) == SIDE_LEFT:
+                    snake.appendleft(tilePlayed)
+                    leftKey -= 1
+                else:
+                    snake.append(tilePlayed)
+
+            end = TurnState(turnId, playerTurn, maskToIndices(deckMask), list(hands[1]), list(hands[2]),
+                            leftKey, list(snake), len(drawn), bool(turn["passedTurn"]))
+
+            yield start, end
+
+
+    def getTurnState(self, turnId: int, end: bool = False) -> TurnState:
+        """Rebuild the state at the start (or end) of a single turn.
+        """
+
+        for start, finish in self.iterStates():
+            if start.turnId == turnId:
+                return finish if end else start
+
+        raise KeyError(turnId)
+
+
+def encodeTurnState(state: TurnState, end: bool = False) -> Dict:
+    """Encode a TurnState the same way Encoder.recordTurnStartData() (or recordTurnEndData()) does.
+    """
+
+    row = {
+        "turnId": state.turnId,
+        "playerTurn": state.playerTurn,
+        "deckContents": indicesToTilesString(state.deck),
+        "player1Hand": indicesToTilesString(state.player1Hand),
+        "player2Hand": indicesToTilesString(state.player2Hand),
+        "snakeContents": indicesToSnakeLayout(state.snakeLeftKey, state.snake),
+    }
+
+    if end:
+        row["tilesDrawnCount"] = state.tilesDrawnCount
+        row["passedTurn"] = state.passedTurn
+
+    return row
+
+
+def iterRounds(dealDf: pd.DataFrame, turnDf: pd.DataFrame) -> Iterator[RoundReplayer]:
+    """Group the deal and turn tables of an EventLogEncoder into a RoundReplayer per round.
+    """
+
+    turnsByRound = {key: rows for key, rows in turnDf.groupby(["matchId", "roundId"], sort=False)}
+
+    for deal in dealDf.to_dict("records"):
+        rows = turnsByRound.get((deal["matchId"], deal["roundId"]))
+        turns = rows.to_dict("records") if rows is not None else []
+        yield RoundReplayer(deal, turns)
+
+
+def deriveTurnTables(dealDf: pd.DataFrame, turnDf: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Rebuild the turnStart and turnEnd tables of Encoder from the deal and turn tables of EventLogEncoder.
+    """
+
+    startRows = []
+    endRows = []
+
+    for replayer in iterRounds(dealDf, turnDf):
+        for start, end in replayer.iterStates():
+            startRows.append(encodeTurnState(start))
+            endRows.append(encodeTurnState(end, end=True))
+
+    return (pd.DataFrame(startRows, columns=list(TURN_START_COLUMNS)),
+            pd.DataFrame(endRows, columns=list(TURN_END_COLUMNS)))
+
+
+def readEventCSVs(directory: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Read deal.csv and turn.csv written by EventLogEncoder, keeping the hex Tile indices as strings.
+    """
+
+    hexColumns = {"player1Hand": str, "player2Hand": str, "tilesDrawn": str}
+
+    dealDf = pd.read_csv(os.path.join(directory, "deal.csv"), dtype=hexColumns, keep_default_na=False)
+    turnDf = pd.read_csv(os.path.join(directory, "turn.csv"), dtype=hexColumns, keep_default_na=False)
+
+    return dealDf, turnDf
@@ -0,0 +1,505 @@
+from .archive import Archive
+from .compact import orientedIndex, snakeLayoutToIndices, hexToIndices
+from .eventLog import NO_SIDE, NO_TILE, SIDE_LEFT, SIDE_RIGHT
+from .layout import DIRECTIONS
+from .sinks import SINKS
+from .tileTable import TILE_COUNT, TILE_PIPS
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Bump when the parsing or the arrays change, so older caches are not reused
+FEATURE_VERSION = 1
+
+
+def defaultCacheDir() -> str:
+    """The user cache directory for parsed features: $XDG_CACHE_HOME/domino_hidden_patterns/featureCache, or
+    ~/.cache/domino_hidden_patterns/featureCache if XDG_CACHE_HOME is not set. The package directory may be
+    read-only site-packages, so nothing is cached inside it.
+    """
+
+    cacheHome = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cacheHome, 'domino_hidden_patterns', 'featureCache')
+
+
+# Value of padding in every array: no Tile, side, Player or position
+PAD = -1
+
+# Board layout label columns: x, y and orientation (an index of layout.DIRECTIONS) of each Tile
+BOARD_X, BOARD_Y, BOARD_ORIENTATION = range(3)
+ORIENTATION_CODES = {str(direction): code for code, direction in enumerate(DIRECTIONS)}
+
+# Oriented index of each 'pip1|pip2' Tile string
+ORIENTED_BY_STRING = {'{}|{}'.format(pip1, pip2): orientedIndex(pip1, pip2)
+                      for pips in TILE_PIPS for pip1, pip2 in (pips, pips[::-1])}
+
+ARRAY_NAMES = ('placedTiles', 'placedSides', 'placedPlayers', 'placedCount', 'winner', 'finalLeftKey',
+               'finalLayout', 'boardLayout')
+
+
+class FeatureSet(NamedTuple):
+    """Features and labels of every round of a recorded dataset, one row per round in file order.
+    The arrays are int8 and memory-mapped from the cache, so only the rows that are read are loaded.
+
+    Features, in the order the Tiles were played (the start Tile first), padded with PAD:
+    - placedTiles (rounds, 28): oriented Tile indices (see compact.orientedIndex())
+    - placedSides (rounds, 28): SIDE_LEFT or SIDE_RIGHT, NO_SIDE for the start Tile
+    - placedPlayers (rounds, 28): the Player who played the Tile, 0 for the start Tile
+    - placedCount (rounds,): the number of Tiles on the board at the end of the round
+
+    Labels:
+    - winner (rounds,): 1 or 2
+    - finalLeftKey (rounds,), finalLayout (rounds, 28): the final snake from left to right as oriented indices
+    - boardLayout (rounds, 28, 3): x, y and orientation code of each Tile of finalLayout on the board
+    (see layout.BoardLayout), PAD if the dataset has no boardLayout column
+    """
+
+    placedTiles: np.ndarray
+    placedSides: np.ndarray
+    placedPlayers: np.ndarray
+    placedCount: np.ndarray
+    winner: np.ndarray
+    finalLeftKey: np.ndarray
+    finalLayout: np.ndarray
+    boardLayout: np.ndarray
+
+    @property
+    def roundCount(self) -> int:
+        return len(self.winner)
+
+    def firstN(self, n: int, oneHot: bool = False) -> np.ndarray:
+        """Get the first n placed Tiles of each round, the input of the prediction model.
+
+        Args:
+            n (int): The number of Tiles, including the start Tile.
+            oneHot (bool, optional): One-hot encode the oriented indices as (rounds, n, 56) float32,
+            all zeros for padding. Loads the rows into memory. Defaults to False, a memory-mapped view.
+
+        Returns:
+            np.ndarray: (rounds, n) oriented indices, or their one-hot encoding.
+        """
+
+        tiles = self.placedTiles[:, :n]
+        if not oneHot:
+            return tiles
+
+        encoded = np.zeros(tiles.shape + (2 * TILE_COUNT,), dtype=np.float32)
+        rows, columns = np.nonzero(tiles != PAD)
+        encoded[rows, columns, tiles[rows, columns]] = 1
+
+        return encoded
+
+
+class RoundBuffer:
+    """Growing int8 rows of 28 values, one per round. Padded with PAD and filled in place.
+    """
+
+    def __init__(self, width: int = TILE_COUNT):
+        self.width = width
+        self.data = bytearray()
+
+    def addRow(self):
+        self.data += b'\xff' * self.width
+
+    def set(self, row: int, column: int, value: int):
+        self.data[row * self.width + column] = value & 0xff
+
+    def toArray(self) -> np.ndarray:
+        return np.frombuffer(bytes(self.data), dtype=np.int8).reshape(-1, self.width)
+
+
+class PlacementBuffer:
+    """The Tiles placed in each round in play order, added one round and one Tile at a time.
+    """
+
+    def __init__(self):
+        self.tiles = RoundBuffer()
+        self.sides = RoundBuffer()
+        self.players = RoundBuffer()
+        self.counts: List[int] = []
+
+    def startRound(self, startTile: int):
+        for buffer in (self.tiles, self.sides, self.players):
+            buffer.addRow()
+
+        row = len(self.counts)
+        self.tiles.set(row, 0, startTile)
+        self.sides.set(row, 0, NO_SIDE)
+        self.players.set(row, 0, 0)
+        self.counts.append(1)
+
+    def place(self, tile: int, side: int, player: int):
+        row = len(self.counts) - 1
+        column = self.counts[row]
+
+        self.tiles.set(row, column, tile)
+        self.sides.set(row, column, side)
+        self.players.set(row, column, player)
+        self.counts[row] = column + 1
+
+
+def findTable(directory: str, table: str) -> Optional[str]:
+    """Get the path of a table written by the simulator in any file format, None if there is none.
+    """
+
+    for sinkType in SINKS.values():
+        path = os.path.join(directory, '{}.{}'.format(table, sinkType.extension))
+        if os.path.exists(path):
+            return path
+
+    return None
+
+
+def tableColumns(path: str) -> List[str]:
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(path).schema_arrow.names
+
+    with open(path, encoding='utf-8') as f:
+        line = f.readline()
+
+    return list(json.loads(line)) if path.endswith('.jsonl') else line.rstrip('\r\n').split(',')
+
+
+def iterTable(path: str, columns: List[str], chunkSize: int, strings: Tuple[str, ...] = ()) -> Iterator[pd.DataFrame]:
+    """Read some columns of a table in chunks of rows, keeping the string columns as str.
+    """
+
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunkSize, columns=columns):
+            yield batch.to_pandas()
+    elif path.endswith('.jsonl'):
+        with pd.read_json(path, lines=True, chunksize=chunkSize, dtype=False) as reader:
+            for chunk in reader:
+                yield chunk[columns]
+    else:
+        dtypes = {column: str for column in strings}
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunkSize, dtype=dtypes, keep_default_na=False):
+            yield chunk
+
+
+def orientedFromString(tile: str, path: str) -> int:
+    """Get the oriented index of a 'pip1|pip2' Tile string read from a table.
+
+    Raises:
+        ValueError: If the Tile is not part of a double-six set, the only set the 28-Tile arrays can hold.
+    """
+
+    oriented = ORIENTED_BY_STRING.get(tile)
+    if oriented is None:
+        maxPip = max(int(pip) for pip in tile.split('|'))
+        raise ValueError('Found Tile {} in {}, a pip of {}, but features only support double-six sets (largest pip 6). '
+                         'Record the dataset with --max-pip 6.'.format(tile, path, maxPip))
+
+    return oriented
+
+
+def placementsFromStrings(path: str, chunkSize: int) -> PlacementBuffer:
+    """Read the play order from turnEnd snakeContents strings of Encoder, e.g. '-1:4|3 0:3|6'. A round starts
+    at turn 0, and the Tile played each turn is the new leftmost or rightmost Tile of the snake.
+    """
+
+    placements = PlacementBuffer()
+    count = leftKey = 0
+
+    for chunk in iterTable(path, ['turnId', 'playerTurn', 'snakeContents'], chunkSize, ('snakeContents',)):
+        for turnId, player, snake in zip(chunk['turnId'].values, chunk['playerTurn'].values, chunk['snakeContents'].values):
+            if turnId == 0:
+                tokens = snake.split(' ')
+                startToken = tokens[-int(tokens[0].split(':')[0])]
+                placements.startRound(orientedFromString(startToken.split(':')[1], path))
+                count, leftKey = 1, 0
+
+            newCount = snake.count(' ') + 1
+            if newCount > count:
+                newLeftKey = int(snake[:snake.index(':')])
+                if newLeftKey < leftKey:
+                    token, side = snake.split(' ', 1)[0], SIDE_LEFT
+                else:
+                    token, side = snake.rsplit(' ', 1)[-1], SIDE_RIGHT
+
+                placements.place(orientedFromString(token[token.index(':') + 1:], path), side, player)
+                count, leftKey = newCount, newLeftKey
+
+    return placements
+
+
+def placementsFromCompact(path: str, chunkSize: int) -> PlacementBuffer:
+    """Read the play order from turnEnd snakeLeftKey and snakeIndices hex strings of CompactEncoder.
+    """
+
+    placements = PlacementBuffer()
+    count = leftKey = 0
+
+    for chunk in iterTable(path, ['turnId', 'playerTurn', 'snakeLeftKey', 'snakeIndices'], chunkSize, ('snakeIndices',)):
+        for turnId, player, newLeftKey, snake in zip(chunk['turnId'].values, chunk['playerTurn'].values,
+                                                     chunk['snakeLeftKey'].values, chunk['snakeIndices'].values):
+            if turnId == 0:
+                start = -2 * newLeftKey
+                placements.startRound(int(snake[start:start + 2], 16))
+                count, leftKey = 1, 0
+
+            newCount = len(snake) // 2
+            if newCount > count:
+                if newLeftKey < leftKey:
+                    placements.place(int(snake[:2], 16), SIDE_LEFT, player)
+                else:
+                    placements.place(int(snake[-2:], 16), SIDE_RIGHT, player)
+                count, leftKey = newCount, newLeftKey
+
+    return placements
+
+
+def placementsFromEvents(turnPath: str, dealPath: str, chunkSize: int) -> PlacementBuffer:
+    """Read the play order from the turn and deal tables of EventLogEncoder. A round starts when
+    (matchId, roundId) changes, and deal rows are in the same round order.
+    """
+
+    startTiles = np.concatenate([chunk['startTile'].values for chunk in iterTable(dealPath, ['startTile'], chunkSize)])
+
+    placements = PlacementBuffer()
+    currentRound = None
+
+    columns = ['matchId', 'roundId', 'playerTurn', 'tilePlayed', 'side']
+    for chunk in iterTable(turnPath, columns, chunkSize):
+        for matchId, roundId, player, tile, side in zip(*(chunk[column].values for column in columns)):
+            if (matchId, roundId) != currentRound:
+                # The start Tile is placed unflipped, so its oriented index is its Tile index
+                placements.startRound(int(startTiles[len(placements.counts)]))
+                currentRound = (matchId, roundId)
+
+            if tile != NO_TILE:
+                placements.place(int(tile), int(side), int(player))
+
+    return placements
+
+
+def placementsFromArchive(archive: Archive) -> PlacementBuffer:
+    """Read the play order from the turn records of ArchiveEncoder, split into rounds by the Archive's offset index.
+    The start Tile is the one at position -snakeLeftKey of the round's final snake.
+    """
+
+    placements = PlacementBuffer()
+    rounds = archive.rounds
+
+    for r in range(len(rounds)):
+        placements.startRound(int(rounds[r]['snake'][-rounds[r]['snakeLeftKey']]))
+
+        turns = archive.turns[archive.turnOffsets[r]:archive.turnOffsets[r + 1]]
+        played = turns[turns['tilePlayed'] != NO_TILE]
+        for tile, side, player in zip(played['tilePlayed'], played['side'], played['playerTurn']):
+            placements.place(int(tile), int(side), int(player))
+
+    return placements
+
+
+def roundLabelsFromArchive(archive: Archive) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Read the labels of readRoundLabels() from the round records of ArchiveEncoder. Archives have no board
+    layout, so boardLayout is all PAD.
+    """
+
+    rounds = archive.rounds
+
+    # EMPTY snake entries are 0xff, which is PAD as int8
+    return (np.asarray(rounds['winner'], dtype=np.int8), np.asarray(rounds['snakeLeftKey'], dtype=np.int8),
+            np.asarray(rounds['snake']).astype(np.int8), np.full((len(rounds), TILE_COUNT, 3), PAD, dtype=np.int8))
+
+
+def readRoundLabels(path: str, chunkSize: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Read the winner, final snake and board layout of each round from a round table of any Encoder.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: winner, finalLeftKey, finalLayout and boardLayout.
+    """
+
+    available = tableColumns(path)
+    compact = 'snakeIndices' in available
+    hasBoard = 'boardLayout' in available
+
+    columns = ['winner'] + (['snakeLeftKey', 'snakeIndices'] if compact else ['snakeLayout'])
+    columns += ['boardLayout'] if hasBoard else []
+    strings = ('snakeIndices', 'snakeLayout', 'boardLayout')
+
+    winners: List[np.ndarray] = []
+    leftKeys: List[int] = []
+    layouts = RoundBuffer()
+    boards = RoundBuffer(TILE_COUNT * 3)
+    row = 0
+
+    for chunk in iterTable(path, columns, chunkSize, strings):
+        winners.append(chunk['winner'].values.astype(np.int8))
+
+        if compact:
+            snakes = zip(chunk['snakeLeftKey'].values, (hexToIndices(s) for s in chunk['snakeIndices'].values))
+        else:
+            snakes = (snakeLayoutToIndices(s) for s in chunk['snakeLayout'].values)
+        boardStrings = chunk['boardLayout'].values if hasBoard else [None] * len(chunk)
+
+        for (leftKey, indices), board in zip(snakes, boardStrings):
+            leftKeys.append(int(leftKey))
+            layouts.addRow()
+            boards.addRow()
+
+            for column, oriented in enumerate(indices):
+                layouts.set(row, column, oriented)
+
+            if board:
+                for column, token in enumerate(board.split(' ')):
+                    x, y, orientation = token.split('@')[1].split(',')
+                    boards.set(row, 3 * column + BOARD_X, int(x))
+                    boards.set(row, 3 * column + BOARD_Y, int(y))
+                    boards.set(row, 3 * column + BOARD_ORIENTATION, ORIENTATION_CODES[orientation])
+
+            row += 1
+
+    winner = np.concatenate(winners) if winners else np.zeros(0, dtype=np.int8)
+
+    return (winner, np.asarray(leftKeys, dtype=np.int8), layouts.toArray(),
+            boards.toArray().reshape(-1, TILE_COUNT, 3))
+
+
+def sourceFiles(directory: str) -> Dict[str, str]:
+    """Find the tables features are extracted from: round, plus match and turn for ArchiveEncoder, turn and deal
+    for EventLogEncoder or turnEnd.
+    """
+
+    files = {'round': findTable(directory, 'round')}
+    if files['round'] is not None and files['round'].endswith('.bin'):
+        files['match'] = findTable(directory, 'match')
+        files['turn'] = findTable(directory, 'turn')
+    elif findTable(directory, 'turn') is not None:
+        files['turn'] = findTable(directory, 'turn')
+        files['deal'] = findTable(directory, 'deal')
+    else:
+        files['turnEnd'] = findTable(directory, 'turnEnd')
+
+    missing = [table for table, path in files.items() if path is None]
+    if missing:
+        raise FileNotFoundError('No {} table in {}'.format(', '.join(missing), directory))
+
+    return files
+
+
+def hashFiles(paths: List[str], blockSize: int = 1 << 20) -> str:
+    """Hash the contents of files, with FEATURE_VERSION, as the key of their cached features.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('features-v{}'.format(FEATURE_VERSION).encode())
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(blockSize), b''):
+                digest.update(block)
+
+    return digest.hexdigest()
+
+
+def extractFeatures(directory: str, chunkSize: int = 100000) -> Dict[str, np.ndarray]:
+    """Parse the features and labels of every round in a directory written by the simulator, with any
+    encoding and file format. Tables are read chunkSize rows at a time.
+    """
+
+    files = sourceFiles(directory)
+
+    if 'match' in files:
+        # Archives are memory-mapped, so they are not read in chunks
+        archive = Archive(directory)
+        placements = placementsFromArchive(archive)
+        winner, finalLeftKey, finalLayout, boardLayout = roundLabelsFromArchive(archive)
+    else:
+        if 'turn' in files:
+            placements = placementsFromEvents(files['turn'], files['deal'], chunkSize)
+        elif 'snakeIndices' in tableColumns(files['turnEnd']):
+            placements = placementsFromCompact(files['turnEnd'], chunkSize)
+        else:
+            placements = placementsFromStrings(files['turnEnd'], chunkSize)
+
+        winner, finalLeftKey, finalLayout, boardLayout = readRoundLabels(files['round'], chunkSize)
+
+    if len(placements.counts) != len(winner):
+        raise ValueError('Found {} rounds of turns but {} rounds in {}'.format(
+            len(placements.counts), len(winner), files['round']))
+
+    return {
+        'placedTiles': placements.tiles.toArray(),
+        'placedSides': placements.sides.toArray(),
+        'placedPlayers': placements.players.toArray(),
+        'placedCount': np.asarray(placements.counts, dtype=np.int8),
+        'winner': winner,
+        'finalLeftKey': finalLeftKey,
+        'finalLayout': finalLayout,
+        'boardLayout': boardLayout,
+    }
+
+
+def loadFeatures(directory: str, cacheDir: Optional[str] = None, chunkSize: int = 100000,
+                 refresh: bool = False) -> FeatureSet:
+    """Load the features of a dataset, extracting them only if they are not cached yet.
+
+    The cache is keyed by the hash of the source tables, so a dataset is parsed once no matter where it
+    is moved to, and any change to it is parsed again.
+
+    Args:
+        directory (str): A directory written by the simulator.
+        cacheDir (Optional[str], optional): Where the parsed arrays are kept, one directory per key.
+        Defaults to defaultCacheDir().
+        chunkSize (int, optional): Rows read at a time when extracting. Defaults to 100000.
+        refresh (bool, optional): Extract again even if cached. Defaults to False.
+
+    Returns:
+        FeatureSet: The memory-mapped arrays.
+    """
+
+    if cacheDir is None:
+        cacheDir = defaultCacheDir()
+
+    files = sourceFiles(directory)
+    cachePath = os.path.join(cacheDir, hashFiles([files[table] for table in sorted(files)]))
+
+    if refresh or not os.path.isdir(cachePath):
+        arrays = extractFeatures(directory, chunkSize)
+
+        # Write to a temporary directory first so an interrupted run never leaves a partial cache
+        tmpPath = '{}.tmp{}'.format(cachePath, os.getpid())
+        os.makedirs(tmpPath, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmpPath, name + '.npy'), array)
+
+        if os.path.isdir(cachePath):
+            shutil.rmtree(cachePath)
+        os.replace(tmpPath, cachePath)
+
+    return FeatureSet(*(np.load(os.path.join(cachePath, name + '.npy'), mmap_mode='r') for name in ARRAY_NAMES))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract model features from recorded games into cached NumPy arrays.')
+    parser.add_argument('directory', help='Directory written by the simulator.')
+    parser.add_argument('--cache-dir', default=None,
+                        help='Where the parsed arrays are kept. Defaults to $XDG_CACHE_HOME or ~/.cache.')
+    parser.add_argument('--chunk-size', type=int, default=100000, help='Rows read at a time.')
+    parser.add_argument('--refresh', action='store_true', help='Extract again even if cached.')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    features = loadFeatures(args.directory, args.cache_dir, args.chunk_size, args.refresh)
+    elapsed = time.perf_counter() - start
+
+    print('{} rounds in {:.2f}s from {}'.format(features.roundCount, elapsed, os.path.dirname(features.winner.filename)))
+    for name in ARRAY_NAMES:
+        array = getattr(features, name)
+        print('{:<15} {} {}'.format(name, array.dtype, array.shape))
+
+
+if __name__ == '__main__':
+    main()
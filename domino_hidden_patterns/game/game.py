@@ -1,55 +1,138 @@
-from deck import Deck
-from tile import Tile
-from enums.orientations import Orientation
-from player import Player
-from snake import Snake
+from .deck import Deck
+from .tile import Tile
+from .enums.orientations import Orientation
+from .player import Player, initialHandSize
+from .snake import Snake
+from .moves import hasLegalMove
+from .gameListener import GameListener
+from .tileTable import tileSet
 
-from random import randint
-from typing import NamedTuple
+import random
+from typing import Dict, Iterable, List, NamedTuple, Optional
 
 class RoundWinner(NamedTuple):
     player: Player
     pointsToGain: int
 
 
+# Supported numbers of Players in a Game
+MIN_PLAYERS = 2
+MAX_PLAYERS = 4
+
+
 class Game:
+    """A match of draw Dominoes. Players have the IDs '1' to str(playerCount) and play in that order, and
+    Game.turn is the ID of the Player to move as an int. player1 and player2 are the first two of players.
+    """
     
-    def __init__(self):
-        self.playerScores = {'1': 0, '2': 0}  # Retain total points gained over rounds
-        self.scoreToWin = 100
+    def __init__(self, rng: Optional[random.Random] = None, maxPip: int = 6, playerCount: int = 2,
+                 handSize: Optional[int] = None):
+        """
+        Args:
+            rng (Optional[random.Random], optional): Every random decision in the Game goes through rng.
+                Defaults to the global random module.
+            maxPip (int, optional): The largest pip of the double-N set, 6, 9 or 12. Defaults to 6.
+            playerCount (int, optional): The number of Players, 2 to 4. Defaults to 2.
+            handSize (Optional[int], optional): Tiles dealt to each Player. Defaults to player.initialHandSize().
+        """
         
-        self.roundCounter = 0
-        self.deck = Deck()
+        assert MIN_PLAYERS <= playerCount <= MAX_PLAYERS, 'A Game has 2 to 4 Players'
         
-        self.player1 = Player(self.deck, '1')
-        # self.player1.points = self.playerScores['1']
+        self.rng = rng if rng is not None else random  # Every random decision in the Game goes through rng
+        self.tileSet = tileSet(maxPip)
+        self.playerCount = playerCount
+        self.handSize = handSize if handSize is not None else initialHandSize(playerCount)
         
-        self.player2 = Player(self.deck, '2')
-        # self.player2.points = self.playerScores['2']
+        assert playerCount * self.handSize < self.tileSet.count, 'Not enough Tiles to deal every hand'
+        
+        self.playerIds = tuple(str(id) for id in range(1, playerCount + 1))
+        self.playerScores = dict.fromkeys(self.playerIds, 0)  # Retain total points gained over rounds
+        self.scoreToWin = 100
+        
+        self.roundCounter = 0
+        self.deck = Deck(self.rng, self.tileSet)
+        self.players = [Player(self.deck, id, handSize=self.handSize) for id in self.playerIds]
         
         self.snake = Snake()
         self.turn = 1
         
         # Variables for encoder. Not the best solution, but it's ok
-        self.playerDrawCountsTotal = {'1': 0, '2': 0}
-        self.playerPassCountsTotal = {'1': 0, '2': 0}
+        self.playerDrawCountsTotal = dict.fromkeys(self.playerIds, 0)
+        self.playerPassCountsTotal = dict.fromkeys(self.playerIds, 0)
 
         self.drawCountCurrent = 0
         self.hasPassedThisTurn = False
+        self.tilesDrawnCurrent = []  # Tiles drawn this turn, in order
+        self.tilePlayedCurrent = None  # PlacedTile played this turn and the side of the Snake it was played on
+        self.sidePlayedCurrent = None
+        
+        self.lastRoundWinner = None
+        
+        self.listeners: List[GameListener] = []
+    
+    
+    def addListener(self, listener: GameListener):
+        self.listeners.append(listener)
+    
+    
+    def removeListener(self, listener: GameListener):
+        self.listeners.remove(listener)
     
     
-    def startRound(self):
+    def isStandard(self) -> bool:
+        """Check if this is a Game of two Players with a double-six set, the only kind that the modules built on
+        28-bit masks and two hands (search, solver, compact recordings) support.
+        """
+        
+        return self.tileSet.maxPip == 6 and self.playerCount == 2
+    
+    
+    @property
+    def player1(self) -> Player:
+        return self.players[0]
+    
+    
+    @player1.setter
+    def player1(self, player: Player):
+        self.players[0] = player
+    
+    
+    @property
+    def player2(self) -> Player:
+        return self.players[1]
+    
+    
+    @player2.setter
+    def player2(self, player: Player):
+        self.players[1] = player
+    
+    
+    def getCurrentPlayer(self) -> Player:
+        return self.players[self.turn - 1]
+    
+    
+    def startRound(self, hands: Optional[Dict[str, Iterable[Tile]]] = None):
         """Start a new round. Resets Deck, Player data (retains points), 
         Snake, and sets turn priority to last winner.
+        
+        Args:
+            hands (Optional[Dict[str, Iterable[Tile]]], optional): Tiles to deal to some Players instead of
+                random ones, by Player ID, e.g. {'1': tiles}. They are taken out of the Deck before the other
+                Players draw. Defaults to None, every hand is drawn.
         """
         
-        self.deck = Deck()
+        self.deck = Deck(self.rng, self.tileSet)
         
-        self.player1 = Player(self.deck, '1')
-        self.player1.points = self.playerScores['1']
+        hands = {id: list(tiles) for id, tiles in hands.items()} if hands else {}
+        for tiles in hands.values():
+            for tile in tiles:
+                self.deck.removeTile(tile)
         
-        self.player2 = Player(self.deck, '2')
-        self.player2.points = self.playerScores['2']
+        self.players = []
+        for id in self.playerIds:
+            player = Player(self.deck, id, hands.get(id), self.handSize)
+            player.points = self.playerScores[id]
+            self.players.append(player)
         
         self.snake = Snake()
         self.snake.setStartPiece(self.deck)
@@ -58,74 +141,96 @@ class Game:
         self.initialTurn = self.getInitialTurn()
         self.turn = self.initialTurn if self.roundCounter <= 1 else self.getLastRoundWinnerId()
         
+        # Listeners may remove themselves when a new round starts
+        for listener in tuple(self.listeners):
+            listener.onRoundStart(self)
+        
         
     
     def getInitialTurn(self) -> int:
         """Decide which Player goes first based on how you would in the real game.
-        Both Players draw a Tile. The Player whose Tile contains the most pips goes first.
-        If it's a draw, flip a coin for who goes first.
+        Every Player draws a Tile. The Player whose Tile contains the most pips goes first.
+        If it's a draw, pick one of the tied Players at random, like a coin flip with two Players.
 
         Returns:
             int: The decided inital turn
         """
         
-        rTile1 = self.deck.getRandomTile()
-        rTile2 = self.deck.getRandomTile()
+        sums = []
+        for _ in self.playerIds:
+            rTile = self.deck.getRandomTile()
+            sums.append(rTile.pip1 + rTile.pip2)
         
-        rTile1Sum = rTile1.pip1 + rTile1.pip2
-        rTile2Sum = rTile2.pip1 + rTile2.pip2
+        highest = max(sums)
+        tied = [turn for turn, rTileSum in enumerate(sums, 1) if rTileSum == highest]
+        if len(tied) == 1:
+            return tied[0]
         
-        print("Player 1 and 2's selected Tile values: {} vs {}".format(rTile1Sum, rTile2Sum))
-        if rTile1Sum > rTile2Sum:
-            print("Player 1 goes first")
-            return 1
-        elif rTile2Sum > rTile1Sum:
-            print("Player 2 goes first")
-            return 2
-        else:
-            coin = randint(1, 2)
-            print("Draw. Coin flip to decide who plays first.\nPlayer {} goes first".format(coin))
-            return coin
+        return tied[self.rng.randint(0, len(tied) - 1)]
 
     
     def checkRoundWin(self) -> bool:
         """Check if a Play has won the round by having 0 Tiles in their hand.
 
         Returns:
-            bool: True if either Player has no Tiles in their hands.
+            bool: True if any Player has no Tiles in their hands.
         """
         
-        return self.player1.countTilesInHand() <= 0 or self.player2.countTilesInHand() <= 0
+        # Called every turn, so loop instead of building a generator for any()
+        for player in self.players:
+            if player.countTilesInHand() <= 0:
+                return True
+        
+        return False
     
     
     def checkMatchWin(self) -> bool:
-        """Check if either Play has won the match by reaching the scoreToWin.
+        """Check if any Player has won the match by reaching the scoreToWin.
 
         Returns:
-            bool: True if either Player.points >= this Game's scoreToWin.
+            bool: True if any Player.points >= this Game's scoreToWin.
         """
         
-        return self.playerScores['1'] >= self.scoreToWin or self.playerScores['2'] >= self.scoreToWin
+        return any(score >= self.scoreToWin for score in self.playerScores.values())
     
     
     def getRoundWinner(self) -> RoundWinner:
-        """Check if either Player has no Tiles left in their hand. If so, return a
-        named tuple containing the winning Player obj and the total number of pips
-        in the opponents hand for score calculation.
+        """Get the winner of the current round without changing any scores. The Player with
+        no Tiles left in their hand wins. If the round is blocked, the Player with the fewest
+        pips in their hand wins, the later Player on a tie.
 
         Returns:
             RoundWinner: Custom NamedTuple containing the winning Player and the total 
-            number of pips in the opposing Player's hand.
+            number of pips in the opposing Players' hands.
         """
         
-        if self.player1.countTilesInHand() <= 0:
-            pointsToGain = self.player2.countPipsInHand()
-            self.playerScores['1'] += pointsToGain
-            return RoundWinner(self.player1, pointsToGain)
-        else:
-            pointsToGain = self.player1.countPipsInHand()
-            self.playerScores['2'] += pointsToGain
-            return RoundWinner(self.player2, pointsToGain)
+        totalPips = sum(player.countPipsInHand() for player in self.players)
+        
+        winner = None
+        for player in self.players:
+            if player.countTilesInHand() <= 0:
+                winner = player
+                break
+            if winner is None or player.countPipsInHand() <= winner.countPipsInHand():
+                winner = player
+        
+        return RoundWinner(winner, totalPips - winner.countPipsInHand())
+    
+    
+    def scoreRound(self) -> RoundWinner:
+        """Award the points of the round to its winner. Must be called exactly once at the end
+        of each round.
+
+        Returns:
+            RoundWinner: The winner of the round returned by getRoundWinner().
+        """
+        
+        winner = self.getRoundWinner()
+        self.playerScores[winner.player.id] += winner.pointsToGain
+        winner.player.points = self.playerScores[winner.player.id]
+        self.lastRoundWinner = winner
+        
+        return winner
         
         
     def getMatchWinner(self) -> Player:
@@ -136,10 +241,9 @@ class Game:
             Player: The Player that has won the match.
         """
         
-        if self.playerScores['1'] >= self.scoreToWin:
-            return self.player1
-        elif self.playerScores['2'] >= self.scoreToWin:
-            return self.player2
+        for player in self.players:
+            if self.playerScores[player.id] >= self.scoreToWin:
+                return player
         
         # winner = self.getRoundWinner().player
         
@@ -150,15 +254,14 @@ class Game:
         
         
     def getLastRoundWinnerId(self) -> int:
-        """Get the ID of the Player that is returned by getRoundWinner()
+        """Get the ID of the Player that won the last round scored by scoreRound().
         Used to set the turn priority of a new round to be the previous winner.
 
         Returns:
-            int: The ID of the Player returned by getRoundWinner().
+            int: The ID of the Player that won the last round.
         """
         
-        winner = self.getRoundWinner()
-        return winner.player.id
+        return int(self.lastRoundWinner.player.id)
     
         
     def playTile(self, player: Player, tile: Tile, side: Orientation):
@@ -172,20 +275,45 @@ class Game:
         
         assert side in [Orientation.LEFT, Orientation.RIGHT], 'Side to add Tile to must be LEFT or RIGHT'
 
-        self.snake.addTile(tile, side)
+        placed = self.snake.addTile(tile, side)
         player.removeTileFromHand(tile)
+        
+        self.tilePlayedCurrent = placed
+        self.sidePlayedCurrent = side
+        
+        for listener in self.listeners:
+            listener.onTilePlayed(self, player, placed, side)
+    
+    
+    def startTurn(self):
+        """Reset the per-turn draw and pass data used by the Encoder.
+        """
+        
+        self.drawCountCurrent = 0
+        self.hasPassedThisTurn = False
+        self.tilesDrawnCurrent = []
+        self.tilePlayedCurrent = None
+        self.sidePlayedCurrent = None
+    
+    
+    def passTurn(self):
+        """Record that the current Player could not place a Tile this turn.
+        """
+        
+        if not self.hasPassedThisTurn:
+            self.playerPassCountsTotal[str(self.turn)] += 1
+            self.hasPassedThisTurn = True
+            
+            for listener in self.listeners:
+                listener.onPass(self, self.getCurrentPlayer())
     
     
     def skipTurn(self):
-        """Swap the value of turn from 1 to 2, or vice versa.
+        """Pass the turn to the next Player: from 1 to 2, ..., and from the last Player back to 1.
         """
         
-        # self.turn = 1 if self.turn == 2 else 2
         self.drawCountCurrent = 0
-        if self.turn == 1:
-            self.turn = 2
-        else:
-            self.turn = 1
+        self.turn = self.turn % self.playerCount + 1
     
     
     def mustDraw(self, player: Player) -> bool:
@@ -199,24 +327,14 @@ class Game:
             bool: True if the Player has no available moves and must draw from the Deck.
         """
         
-        for tile in player.hand:
-            if self.snake.canAddTile(tile):
-                return False
-            else:
-                continue
-        
-        return True
+        return not hasLegalMove(player, self.snake)
 
     
     def mustSkipTurn(self, player: Player) -> bool:
         if not self.deck.isDeckEmpty():
             return False
         
-        for tile in player.hand:
-            if self.snake.canAddTile(tile):
-                return False
-        
-        return True
+        return not hasLegalMove(player, self.snake)
 
 
     def drawUntilValidTile(self, player: Player):
@@ -228,20 +346,28 @@ class Game:
         
         self.drawCountCurrent = 0
         self.hasPassedThisTurn = False
+        self.tilesDrawnCurrent = []
         
         while self.mustDraw(player):
             if self.deck.isDeckEmpty():
                 # print("Deck is empty. Turn must be skipped.")
-                self.playerPassCountsTotal[str(self.turn)] += 1
-                self.hasPassedThisTurn = True
+                self.passTurn()
                 return
             
             self.playerDrawCountsTotal[str(self.turn)] += 1
             self.drawCountCurrent += 1
             
-            player.drawFromDeck()
-            player.printHand()
+            tile = player.drawFromDeck()
+            self.tilesDrawnCurrent.append(tile)
+            
+            for listener in self.listeners:
+                listener.onTileDrawn(self, player, tile)
+            # player.printHand()
             
     
     def isTie(self):
-        return self.mustSkipTurn(self.player1) and self.mustSkipTurn(self.player2)
\ No newline at end of file
+        for player in self.players:
+            if not self.mustSkipTurn(player):
+                return False
+        
+        return True
\ No newline at end of file
@@ -0,0 +1,29 @@
+from .tile import Tile
+from .player import Player
+from .snake import PlacedTile
+from .enums.orientations import Orientation
+
+
+class GameListener:
+    """Receives the events of a Game it was added to with Game.addListener(). Override the events you need,
+    the defaults do nothing. Events are sent after the Game's state has changed.
+    """
+
+    def onRoundStart(self, game: 'Game'):
+        """Sent by Game.startRound() once the hands are dealt and the start Tile is on the Snake."""
+        pass
+
+
+    def onTileDrawn(self, game: 'Game', player: Player, tile: Tile):
+        """Sent by Game.drawUntilValidTile() for each Tile a Player draws."""
+        pass
+
+
+    def onTilePlayed(self, game: 'Game', player: Player, placed: PlacedTile, side: Orientation):
+        """Sent by Game.playTile() after the Tile is on the Snake and out of the Player's hand."""
+        pass
+
+
+    def onPass(self, game: 'Game', player: Player):
+        """Sent by Game.passTurn() when the Player to move cannot play or draw."""
+        pass
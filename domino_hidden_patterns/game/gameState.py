@@ -0,0 +1,381 @@
+from .game import Game
+from .deck import Deck
+from .player import Player
+from .snake import Snake
+from .tile import TILES
+from .enums.orientations import Orientation
+from .solver import handPips
+from .tileTable import TILE_PIPS, TILE_COUNT, PIP_MASKS
+
+import argparse
+import random
+import time
+from typing import List, Optional, Tuple
+
+LEFT = 0
+RIGHT = 1
+
+# Undo stack entries: the open pip a played Tile covered (0-6), or one of these
+DRAW = -1
+PASS = -2
+
+SIDES = {Orientation.LEFT: LEFT, Orientation.RIGHT: RIGHT}
+ORIENTATIONS = (Orientation.LEFT, Orientation.RIGHT)
+
+
+class GameState:
+    """The state of a round of Game as plain ints and lists, for search. Moves are made and unmade in place:
+    play(), draw() and passTurn() each push an entry on an undo stack and unmake() pops the last one, so a
+    search walks the tree on a single GameState. copy() makes an independent GameState in a few microseconds.
+
+    Hands and the deck are masks of Tile indices (see tileTable). handOrders keep the order each Player got
+    their Tiles in, dealt Tiles first, so that Game's hands can be rebuilt in the same order: a Player's hand
+    is the Tiles of their handOrder still in their hand mask. The Snake is kept as its start Tile and the
+    (Tile index, side) placements after it, in play order.
+
+    play() and passTurn() end the turn, like Game.playTile() or Game.passTurn() followed by Game.skipTurn().
+    draw() does not: the Player draws until they can play, like Game.drawUntilValidTile(). Game draws a random
+    Tile from its Deck, but draw() takes the Tile to draw, so a search chooses it, e.g. from a determinized
+    boneyard or every Tile of the deck mask in turn.
+
+    On CPython a play() and its unmake() take about 1 us together, but generating and choosing the moves
+    costs more than making them: random playouts (countTransitions(), benchmark GameState.makeUnmake) run at
+    about 0.5M transitions/s, short of the millions per second a compiled engine would reach.
+
+    Usage:
+        state = GameState.fromGame(game)
+        state.play(tile, LEFT)
+        ...
+        state.unmake()
+        state.restore(game)
+    """
+
+    __slots__ = ('hands', 'handOrders', 'deckMask', 'startTile', 'placements', 'left', 'right', 'turn',
+                 'scores', 'undoStack')
+
+    def __init__(self, hands: List[int], handOrders: List[List[int]], deckMask: int, startTile: int,
+                 placements: List[Tuple[int, int]], left: int, right: int, turn: int, scores: Tuple[int, int]):
+        self.hands = hands  # Indexed by Player ID, hands[0] is unused
+        self.handOrders = handOrders  # Indexed by Player ID like hands
+        self.deckMask = deckMask
+        self.startTile = startTile
+        self.placements = placements
+        self.left = left  # Open pip of each end of the Snake
+        self.right = right
+        self.turn = turn
+        self.scores = scores  # Match points of Player 1 and 2 before this round
+        self.undoStack: List[int] = []
+
+
+    @classmethod
+    def fromGame(cls, game: Game) -> 'GameState':
+        """Get the state of a Game's current round, after startRound().
+        """
+
+        assert game.isStandard(), 'GameState only supports double-six Games of two Players'
+
+        snake = game.snake
+        placements = [(placed.index, SIDES[side]) for placed, side in snake.placements[1:]]
+
+        return cls(
+            [0, game.player1.handMask, game.player2.handMask],
+            [[], [tile.index for tile in game.player1.hand], [tile.index for tile in game.player2.hand]],
+            game.deck.deckMask,
+            snake.getStartTile().index,
+            placements,
+            snake.leftPip,
+            snake.rightPip,
+            game.turn,
+            (game.playerScores['1'], game.playerScores['2']),
+        )
+
+
+    def restore(self, game: Game):
+        """Set a Game to this state. The Deck, Players and Snake are rebuilt, the Game's RNG, counters and
+        listeners are kept, and no listener is called. GameState.fromGame(game) gives back an equal GameState.
+        """
+
+        deck = Deck(game.rng)
+        deck.deck = [tile for tile in deck.deck if self.deckMask >> tile.index & 1]
+        deck.deckMask = self.deckMask
+
+        players = []
+        for player in (1, 2):
+            mask = self.hands[player]
+            hand = [TILES[tile] for tile in self.handOrders[player] if mask >> tile & 1]
+            players.append(Player(deck, str(player), hand))
+
+        snake = Snake()
+        snake.setStartTile(TILES[self.startTile])
+        for tile, side in self.placements:
+            snake.addTile(TILES[tile], ORIENTATIONS[side])
+
+        game.deck = deck
+        game.players = players
+        game.snake = snake
+        game.turn = self.turn
+        game.playerScores = {'1': self.scores[0], '2': self.scores[1]}
+        game.player1.points, game.player2.points = self.scores
+
+
+    def copy(self) -> 'GameState':
+        """An independent copy of this state, with an empty undo stack.
+        """
+
+        state = GameState.__new__(GameState)
+        state.hands = self.hands[:]
+        state.handOrders = [self.handOrders[0], self.handOrders[1][:], self.handOrders[2][:]]
+        state.deckMask = self.deckMask
+        state.startTile = self.startTile
+        state.placements = self.placements[:]
+        state.left = self.left
+        state.right = self.right
+        state.turn = self.turn
+        state.scores = self.scores
+        state.undoStack = []
+
+        return state
+
+
+    def key(self) -> Tuple:
+        """Everything that makes up the state except the undo stack, e.g. to compare or hash states.
+        """
+
+        hands = self.hands
+        orders = tuple(tuple(tile for tile in self.handOrders[player] if hands[player] >> tile & 1) for player in (1, 2))
+
+        return (hands[1], hands[2], orders, self.deckMask, self.startTile, tuple(self.placements),
+                self.left, self.right, self.turn, self.scores)
+
+
+    def __eq__(self, __value: object) -> bool:
+        if not isinstance(__value, GameState):
+            return NotImplemented
+
+        return self.key() == __value.key()
+
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+
+    def legalMoves(self) -> List[Tuple[int, int]]:
+        """The (Tile index, side) moves of the Player to move, like moves.legalMoves(). When both ends have the
+        same pip, a Tile is only listed on the LEFT, since both sides give the same Snake ends.
+        """
+
+        leftMask = PIP_MASKS[self.left]
+        rightMask = PIP_MASKS[self.right]
+        legal = self.hands[self.turn] & (leftMask | rightMask)
+        moves = []
+
+        sameEnds = self.left == self.right
+
+        # Visit only the set bits, lowest Tile index first
+        while legal:
+            bit = legal & -legal
+            legal ^= bit
+            tile = bit.bit_length() - 1
+            if bit & leftMask:
+                moves.append((tile, LEFT))
+                if bit & rightMask and not sameEnds:
+                    moves.append((tile, RIGHT))
+            else:
+                moves.append((tile, RIGHT))
+
+        return moves
+
+
+    def canPlay(self, player: int) -> bool:
+        return bool(self.hands[player] & (PIP_MASKS[self.left] | PIP_MASKS[self.right]))
+
+
+    def mustDraw(self) -> bool:
+        """Like Game.mustDraw() with a Deck to draw from: the Player to move has no legal move.
+        """
+
+        return self.deckMask != 0 and not self.canPlay(self.turn)
+
+
+    def mustPass(self) -> bool:
+        """Like Game.mustSkipTurn().
+        """
+
+        return self.deckMask == 0 and not self.canPlay(self.turn)
+
+
+    def isOver(self) -> bool:
+        """The round is over when a hand is empty or neither Player can move, like Game.checkRoundWin() and
+        Game.isTie().
+        """
+
+        hands = self.hands
+        if hands[1] == 0 or hands[2] == 0:
+            return True
+
+        return self.deckMask == 0 and not self.canPlay(1) and not self.canPlay(2)
+
+
+    def roundWinner(self) -> Tuple[int, int]:
+        """The ID of the Player winning the round and the points they gain, following Game.getRoundWinner().
+        """
+
+        player1Pips = handPips(self.hands[1])
+        player2Pips = handPips(self.hands[2])
+
+        if self.hands[1] == 0:
+            return 1, player2Pips
+        elif self.hands[2] == 0:
+            return 2, player1Pips
+        elif player1Pips < player2Pips:
+            return 1, player2Pips
+        else:
+            return 2, player1Pips
+
+
+    def play(self, tile: int, side: int):
+        """Play a Tile of the Player to move on a side of the Snake and end the turn.
+
+        Args:
+            tile (int): The index of the Tile to play, which must be a legal move.
+            side (int): LEFT or RIGHT.
+        """
+
+        player = self.turn
+        bit = 1 << tile
+        pip1, pip2 = TILE_PIPS[tile]
+
+        assert self.hands[player] & bit, 'Tile {} is not in the hand of Player {}'.format(tile, player)
+
+        if side == LEFT:
+            covered = self.left
+            assert covered == pip1 or covered == pip2, 'Tile {} cannot be played on the left'.format(tile)
+            self.left = pip2 if pip1 == covered else pip1
+        else:
+            covered = self.right
+            assert covered == pip1 or covered == pip2, 'Tile {} cannot be played on the right'.format(tile)
+            self.right = pip2 if pip1 == covered else pip1
+
+        self.hands[player] ^= bit
+        self.placements.append((tile, side))
+        self.undoStack.append(covered)
+        self.turn = 3 - player
+
+
+    def draw(self, tile: int):
+        """The Player to move draws a Tile from the deck. Their turn goes on.
+
+        Args:
+            tile (int): The index of the Tile to draw, which must be in the deck.
+        """
+
+        player = self.turn
+        bit = 1 << tile
+
+        assert self.deckMask & bit, 'Tile {} is not in the deck'.format(tile)
+
+        self.deckMask ^= bit
+        self.hands[player] |= bit
+        self.handOrders[player].append(tile)
+        self.undoStack.append(DRAW)
+
+
+    def passTurn(self):
+        """The Player to move passes and the turn ends.
+        """
+
+        self.undoStack.append(PASS)
+        self.turn = 3 - self.turn
+
+
+    def unmake(self):
+        """Undo the last play(), draw() or passTurn().
+
+        Raises:
+            IndexError: If there is no move to undo.
+        """
+
+        entry = self.undoStack.pop()
+
+        if entry == DRAW:
+            player = self.turn
+            tile = self.handOrders[player].pop()
+            self.hands[player] ^= 1 << tile
+            self.deckMask |= 1 << tile
+        elif entry == PASS:
+            self.turn = 3 - self.turn
+        else:
+            player = 3 - self.turn
+            tile, side = self.placements.pop()
+            self.hands[player] |= 1 << tile
+            if side == LEFT:
+                self.left = entry
+            else:
+                self.right = entry
+            self.turn = player
+
+
+def countTransitions(state: GameState, rng: random.Random, rounds: int) -> int:
+    """Play random rounds from a state with make/unmake, undoing each one back to the start.
+    Returns the number of moves made, each of which was also unmade.
+    """
+
+    moves = 0
+
+    for _ in range(rounds):
+        made = 0
+        while not state.isOver():
+            if state.mustDraw():
+                deck = [tile for tile in range(TILE_COUNT) if state.deckMask >> tile & 1]
+                state.draw(rng.choice(deck))
+            elif state.mustPass():
+                state.passTurn()
+            else:
+                state.play(*rng.choice(state.legalMoves()))
+            made += 1
+
+        for _ in range(made):
+            state.unmake()
+        moves += made
+
+    return moves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check that GameState round-trips with Game and time make/unmake.')
+    parser.add_argument('-n', '--rounds', type=int, default=1000, help='Random rounds to play from the state')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the Game and of the random moves')
+    args = parser.parse_args(argv)
+
+    game = Game(random.Random(args.seed))
+    game.startRound()
+    state = GameState.fromGame(game)
+
+    copy = Game(random.Random(args.seed))
+    state.restore(copy)
+    assert GameState.fromGame(copy) == state, 'GameState did not round-trip with Game'
+
+    start = time.perf_counter()
+    moves = countTransitions(state, random.Random(args.seed), args.rounds)
+    elapsed = time.perf_counter() - start
+    assert GameState.fromGame(game) == state, 'unmake() did not restore the state'
+
+    tile, side = state.legalMoves()[0]
+    start = time.perf_counter()
+    for _ in range(100000):
+        state.play(tile, side)
+        state.unmake()
+    makeElapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        state.copy()
+    copyElapsed = time.perf_counter() - start
+
+    print('{} moves made and unmade in {:.3f}s: {:,.0f} transitions/s'.format(moves, elapsed, 2 * moves / elapsed))
+    print('play() and unmake() alone: {:,.0f} transitions/s'.format(200000 / makeElapsed))
+    print('copy(): {:.2f} us'.format(copyElapsed / 10000 * 1e6))
+
+
+if __name__ == '__main__':
+    main()
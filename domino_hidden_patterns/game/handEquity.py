@@ -0,0 +1,395 @@
+from .game import Game
+from .simulator import COMPUTERS, Simulator, matchSeed
+from .tile import Tile, TILES
+from .tileTable import TILE_COUNT
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# Bump when the rounds played for a hand change, so older tables are not extended with different rounds
+EQUITY_VERSION = 1
+
+HAND_SIZE = 7
+HAND_COUNT = math.comb(TILE_COUNT, HAND_SIZE)  # 1,184,040 opening hands of a double-six set
+
+# BINOMIALS[n][k] = C(n, k), for the combinatorial number system of handRank()
+BINOMIALS = tuple(tuple(math.comb(n, k) for k in range(HAND_SIZE + 1)) for n in range(TILE_COUNT + 1))
+
+# One record per hand, in rank order. Totals rather than rates, so more rounds can be added to a hand later
+RECORD_DTYPE = np.dtype([
+    ('rounds', 'u4'),  # Rounds played with the hand
+    ('wins', 'u4'),  # Rounds won by the Player holding it
+    ('points', 'i8'),  # Points gained in the rounds won, minus the points the opponent gained in the others
+])
+
+TABLE_FILE = 'equity.npy'
+META_FILE = 'equity.json'
+
+
+def handMask(tiles: Iterable[Tile]) -> int:
+    mask = 0
+    for tile in tiles:
+        mask |= 1 << tile.index
+
+    return mask
+
+
+def handRank(mask: int) -> int:
+    """Get the position of a 7-Tile hand in the equity table in O(1): its rank in the combinatorial number
+    system, the sum of C(i, j) over the hand's Tile indices i, the j-th smallest counted from 1. Ranks follow
+    the numeric order of the masks, so rank 0 is the hand of Tiles 0-6 and HAND_COUNT - 1 the hand of Tiles 21-27.
+
+    Args:
+        mask (int): The hand as a mask of Tile indices, e.g. Player.handMask.
+
+    Raises:
+        ValueError: If the mask does not hold exactly 7 Tiles.
+
+    Returns:
+        int: The rank, 0 to HAND_COUNT - 1.
+    """
+
+    if bin(mask).count('1') != HAND_SIZE or mask >> TILE_COUNT:
+        raise ValueError('{:#x} is not a hand of {} Tiles'.format(mask, HAND_SIZE))
+
+    rank = 0
+    for j in range(1, HAND_SIZE + 1):
+        low = mask & -mask
+        mask ^= low
+        rank += BINOMIALS[low.bit_length() - 1][j]
+
+    return rank
+
+
+def handFromRank(rank: int) -> int:
+    """Get the mask of the hand with a given rank, the inverse of handRank().
+    """
+
+    assert 0 <= rank < HAND_COUNT, 'Hand ranks are 0 to {}'.format(HAND_COUNT - 1)
+
+    mask = 0
+    for j in range(HAND_SIZE, 0, -1):
+        # The largest Tile index i with C(i, j) <= rank
+        i = j - 1
+        while BINOMIALS[i + 1][j] <= rank:
+            i += 1
+
+        rank -= BINOMIALS[i][j]
+        mask |= 1 << i
+
+    return mask
+
+
+def iterHands(firstRank: int, count: int) -> Iterator[int]:
+    """Iterate over the masks of count hands in rank order, starting at firstRank. Each next mask is the next larger
+    int with 7 bits set, found with Gosper's hack.
+    """
+
+    mask = handFromRank(firstRank)
+
+    for _ in range(count):
+        yield mask
+
+        low = mask & -mask
+        ripple = mask + low
+        mask = ripple | ((mask ^ ripple) >> 2) // low
+
+
+def playHand(simulator: Simulator, seed: int, rank: int, firstRound: int, lastRound: int) -> Tuple[int, int]:
+    """Play rounds firstRound to lastRound - 1 of a hand, each a new Game where Player 1 is dealt the hand and
+    everything else is left to the Game: Player 2's hand, the start Tile and who goes first.
+
+    Round i is seeded by matchSeed(matchSeed(seed, rank), i), so a hand's rounds are the same however the job
+    is split up, stopped and resumed.
+
+    Returns:
+        Tuple[int, int]: The rounds won by Player 1 and the points they gained minus the points they gave away.
+    """
+
+    mask = handFromRank(rank)
+    tiles = [TILES[index] for index in range(TILE_COUNT) if mask >> index & 1]
+    handSeed = matchSeed(seed, rank)
+
+    wins = 0
+    points = 0
+
+    for i in range(firstRound, lastRound):
+        game = Game(random.Random(matchSeed(handSeed, i)))
+        simulator.playRound(game, 0, {'1': tiles})
+
+        winner = game.lastRoundWinner
+        if winner.player.id == '1':
+            wins += 1
+            points += winner.pointsToGain
+        else:
+            points -= winner.pointsToGain
+
+    return wins, points
+
+
+def _playChunk(task: Tuple[int, str, str, int, np.ndarray, int]) -> Tuple[int, np.ndarray]:
+    """Worker for buildTable(). Play the missing rounds of a chunk of consecutive hands and return the chunk's
+    updated records.
+    """
+
+    seed, policy, opponent, firstRank, records, roundsPerHand = task
+    simulator = Simulator(COMPUTERS[policy], COMPUTERS[opponent])
+
+    for offset, record in enumerate(records):
+        played = int(record['rounds'])
+        if played >= roundsPerHand:
+            continue
+
+        wins, points = playHand(simulator, seed, firstRank + offset, played, roundsPerHand)
+        records[offset] = (roundsPerHand, int(record['wins']) + wins, int(record['points']) + points)
+
+    return firstRank, records
+
+
+class EquityResult(NamedTuple):
+    handCount: int
+    roundCount: int
+    elapsed: float
+
+    @property
+    def roundsPerSecond(self) -> float:
+        return self.roundCount / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+def openTable(directory: str, seed: int, policy: str, opponent: str) -> np.memmap:
+    """Open the table of a directory for writing, creating it with no rounds played if there is none.
+
+    Raises:
+        ValueError: If the directory holds a table built with another seed or other policies.
+    """
+
+    meta = {'version': EQUITY_VERSION, 'seed': seed, 'policy': policy, 'opponent': opponent,
+            'handSize': HAND_SIZE, 'tileCount': TILE_COUNT}
+    tablePath = os.path.join(directory, TABLE_FILE)
+    metaPath = os.path.join(directory, META_FILE)
+
+    if os.path.exists(tablePath):
+        with open(metaPath) as f:
+            existing = json.load(f)
+        if existing != meta:
+            raise ValueError('The table in {} was built with {}, not {}'.format(directory, existing, meta))
+
+        return np.load(tablePath, mmap_mode='r+')
+
+    os.makedirs(directory, exist_ok=True)
+    with open(metaPath, 'w') as f:
+        json.dump(meta, f)
+
+    # Create the file under a temporary name first so an interrupted run never leaves a partial table
+    tmpPath = '{}.tmp{}'.format(tablePath, os.getpid())
+    table = open_memmap(tmpPath, mode='w+', dtype=RECORD_DTYPE, shape=(HAND_COUNT,))
+    table.flush()
+    del table
+    os.replace(tmpPath, tablePath)
+
+    return np.load(tablePath, mmap_mode='r+')
+
+
+def buildTable(directory: str, roundsPerHand: int = 100, seed: int = 0, policy: str = 'first',
+               opponent: str = 'first', workers: int = 1, chunkSize: int = 2048, handCount: int = HAND_COUNT,
+               verbose: bool = False) -> EquityResult:
+    """Play roundsPerHand rounds with every opening hand of Player 1 and store the totals in the equity table of
+    a directory, see EquityTable.
+
+    The job is resumable: hands are played in chunks of consecutive ranks, and each chunk's records are written
+    to the memory-mapped table in one copy once it is played. Running it again skips the hands that already have
+    roundsPerHand rounds and plays only the missing rounds of the others, e.g. to add rounds to every hand.
+
+    Args:
+        directory (str): Where the table is kept.
+        roundsPerHand (int, optional): Rounds to play with each hand. Defaults to 100.
+        seed (int, optional): The master seed, see playHand(). Defaults to 0.
+        policy (str, optional): Simulator policy name of Player 1, who holds the hand. Defaults to 'first'.
+        opponent (str, optional): Simulator policy name of Player 2. Defaults to 'first'.
+        workers (int, optional): The number of worker processes. Defaults to 1 (no pool).
+        chunkSize (int, optional): Hands per task. Defaults to 2048.
+        handCount (int, optional): Only play the hands ranked below this, e.g. for a trial run. Defaults to every hand.
+        verbose (bool, optional): Print the progress every 10 seconds. Defaults to False.
+
+    Returns:
+        EquityResult: The hands played this run, their rounds and the elapsed wall time.
+    """
+
+    table = openTable(directory, seed, policy, opponent)
+
+    tasks = []
+    for firstRank in range(0, handCount, chunkSize):
+        records = np.array(table[firstRank:min(firstRank + chunkSize, handCount)])
+        missing = records['rounds'] < roundsPerHand
+        if missing.any():
+            tasks.append((seed, policy, opponent, firstRank, records, roundsPerHand))
+
+    handsPlayed = sum(int((task[4]['rounds'] < roundsPerHand).sum()) for task in tasks)
+    roundsPlayed = sum(int(np.maximum(roundsPerHand - task[4]['rounds'].astype(np.int64), 0).sum()) for task in tasks)
+
+    start = time.perf_counter()
+    lastReport = start
+    done = 0
+
+    pool = Pool(workers) if workers > 1 else None
+    try:
+        results = pool.imap_unordered(_playChunk, tasks, chunksize=1) if pool is not None else map(_playChunk, tasks)
+
+        for firstRank, records in results:
+            table[firstRank:firstRank + len(records)] = records
+            table.flush()
+            done += 1
+
+            now = time.perf_counter()
+            if verbose and now - lastReport >= 10:
+                print('{} of {} chunks played in {:.0f}s'.format(done, len(tasks), now - start), flush=True)
+                lastReport = now
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    return EquityResult(handsPlayed, roundsPlayed, time.perf_counter() - start)
+
+
+class HandEquity(NamedTuple):
+    rounds: int
+    winRate: float
+    expectedPoints: float
+
+
+class EquityTable:
+    """Read access to an equity table written by buildTable(). The records are memory-mapped and indexed by
+    handRank(), so looking up a hand is O(1) and only reads its record from disk.
+
+    Usage:
+        table = EquityTable('equity')
+        table.lookup(game.player1.handMask).winRate
+    """
+
+    def __init__(self, directory: str):
+        self.records = np.load(os.path.join(directory, TABLE_FILE), mmap_mode='r')
+
+        with open(os.path.join(directory, META_FILE)) as f:
+            self.meta = json.load(f)
+
+
+    def lookup(self, mask: int) -> HandEquity:
+        """Get the equity of a hand of Player 1. The rates are NaN if no round was played with the hand.
+        """
+
+        rounds, wins, points = self.records[handRank(mask)].tolist()
+        if rounds == 0:
+            return HandEquity(0, math.nan, math.nan)
+
+        return HandEquity(rounds, wins / rounds, points / rounds)
+
+
+    def winRates(self) -> np.ndarray:
+        """The win rate of every hand in rank order, NaN for hands with no rounds.
+        """
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.records['wins'] / self.records['rounds']
+
+
+    def expectedPoints(self) -> np.ndarray:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.records['points'] / self.records['rounds']
+
+
+    def tileWinRates(self) -> np.ndarray:
+        """The win rate of the rounds played with each Tile in hand, by Tile index, over every hand holding it.
+        """
+
+        masks = np.fromiter(iterHands(0, HAND_COUNT), dtype=np.uint32, count=HAND_COUNT)
+        rounds = self.records['rounds'].astype(np.int64)
+        wins = self.records['wins'].astype(np.int64)
+
+        rates = np.full(TILE_COUNT, np.nan)
+        for index in range(TILE_COUNT):
+            holding = (masks >> np.uint32(index) & 1).astype(bool)
+            played = rounds[holding].sum()
+            if played > 0:
+                rates[index] = wins[holding].sum() / played
+
+        return rates
+
+
+def handString(mask: int) -> str:
+    return ' '.join(str(TILES[index]) for index in range(TILE_COUNT) if mask >> index & 1)
+
+
+def printReport(table: EquityTable, count: int):
+    """Print the best and worst hands with every round played and the win rate of hands holding each Tile.
+    """
+
+    winRates = table.winRates()
+    expectedPoints = table.expectedPoints()
+    played = np.flatnonzero(table.records['rounds'] > 0)
+    if len(played) == 0:
+        print('No hands played yet')
+        return
+
+    # Best first: by win rate, then expected points
+    order = played[np.lexsort((-expectedPoints[played], -winRates[played]))]
+
+    for title, ranks in (('Best hands', order[:count]), ('Worst hands', order[::-1][:count])):
+        print(title)
+        for rank in ranks.tolist():
+            print('  {:<45} win {:6.1%}  points {:+7.2f}'.format(
+                handString(handFromRank(rank)), winRates[rank], expectedPoints[rank]))
+
+    print('Win rate of hands holding each Tile')
+    tileRates = table.tileWinRates()
+    for index in np.argsort(-tileRates).tolist():
+        if np.isnan(tileRates[index]):
+            continue
+        print('  {:<8} {:6.1%}'.format(str(TILES[index]), tileRates[index]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Estimate the win rate and expected points of every opening hand '
+                                                 'of Player 1 and store them in an indexed table.')
+    parser.add_argument('directory', help='Where the table is kept. Running again resumes or extends it.')
+    parser.add_argument('-r', '--rounds-per-hand', type=int, default=100, help='Rounds to play with each hand.')
+    parser.add_argument('--seed', type=int, default=0, help='Master seed of the rounds.')
+    parser.add_argument('--policy', choices=sorted(COMPUTERS), default='first',
+                        help='Computer policy of Player 1, who holds the hand.')
+    parser.add_argument('--opponent', choices=sorted(COMPUTERS), default='first', help='Computer policy of Player 2.')
+    parser.add_argument('-w', '--workers', type=int, default=0, help='Number of worker processes. 0 uses every core.')
+    parser.add_argument('--chunk-size', type=int, default=2048, help='Hands per worker task.')
+    parser.add_argument('--hands', type=int, default=HAND_COUNT,
+                        help='Only play the hands ranked below this, e.g. for a trial run.')
+    parser.add_argument('--report', type=int, default=10, metavar='N',
+                        help='Print the N best and worst hands and the win rate of each Tile. 0 prints nothing.')
+    args = parser.parse_args(argv)
+
+    if not 0 < args.hands <= HAND_COUNT:
+        parser.error('--hands must be 1 to {}'.format(HAND_COUNT))
+
+    workers = args.workers if args.workers > 0 else os.cpu_count()
+
+    try:
+        result = buildTable(args.directory, args.rounds_per_hand, args.seed, args.policy, args.opponent, workers,
+                            args.chunk_size, args.hands, verbose=True)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print('{} hands, {} rounds in {:.2f}s ({:.0f} rounds/sec)'.format(
+        result.handCount, result.roundCount, result.elapsed, result.roundsPerSecond))
+
+    if args.report > 0:
+        printReport(EquityTable(args.directory), args.report)
+
+
+if __name__ == '__main__':
+    main()
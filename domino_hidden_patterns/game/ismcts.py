@@ -0,0 +1,432 @@
+from .game import Game
+from .player import Player
+from .tile import TILES
+from .computer import Computer
+from .moves import Move, legalMoves
+from .enums.orientations import Orientation
+from .solver import handPips
+from .tileTable import TILE_PIPS, TILE_COUNT, PIP_MASKS
+
+import atexit
+import math
+import random
+import threading
+import time
+from multiprocessing import Pool
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+LEFT = 0
+RIGHT = 1
+
+# Action of a Player that cannot play and cannot draw
+PASS = (-1, -1)
+
+ALL_TILES = (1 << TILE_COUNT) - 1
+
+# (visits, wins) of each root action
+RootStats = Dict[Tuple[int, int], Tuple[int, float]]
+
+
+class Observation(NamedTuple):
+    """The opponent had to draw or pass with these open ends, so every Tile they held then was void
+    of both pips. Tiles they drew afterwards may have them.
+    """
+
+    voidMask: int  # Every Tile containing either open pip
+    drawsBefore: int  # The opponent's total draws before that turn
+
+
+class SearchProblem(NamedTuple):
+    """Everything a Player knows at their turn, as Tile masks (see tileTable). Sent to the search workers.
+    """
+
+    playerId: int
+    hand: int
+    opponentHandSize: int
+    unknown: int  # Tiles in the opponent's hand or the boneyard
+    leftPip: int
+    rightPip: int
+    observations: Tuple[Observation, ...]
+    opponentDraws: int
+
+
+def isConsistent(problem: SearchProblem, opponentHand: int) -> bool:
+    """Check that a sampled opponent hand could have been drawn given the observations. A hand is
+    ruled out if it holds more Tiles with a void pip than the opponent has drawn since.
+    """
+
+    for observation in problem.observations:
+        if bin(opponentHand & observation.voidMask).count('1') > problem.opponentDraws - observation.drawsBefore:
+            return False
+
+    return True
+
+
+class DeterminizedRound:
+    """A sampled round with every Tile known, played by masks. Mirrors Simulator.playTurn(): a Player
+    draws from the boneyard while they have no legal move, and passes once it is empty.
+    """
+
+    __slots__ = ('hands', 'left', 'right', 'boneyard', 'turn', 'passes')
+
+    def __init__(self, hands: List[int], left: int, right: int, boneyard: List[int], turn: int):
+        self.hands = hands  # Indexed by Player ID, hands[0] is unused
+        self.left = left
+        self.right = right
+        self.boneyard = boneyard  # Draw order, drawn from the end
+        self.turn = turn
+        self.passes = 0
+
+
+    def isOver(self) -> bool:
+        return self.hands[1] == 0 or self.hands[2] == 0 or self.passes >= 2
+
+
+    def winner(self) -> int:
+        """The ID of the Player winning the finished round, following Game.getRoundWinner(). An empty hand is
+        checked first, since a win can be worth 0 points when the opponent only holds [0, 0].
+        """
+
+        hands = self.hands
+        if hands[1] == 0:
+            return 1
+        elif hands[2] == 0:
+            return 2
+
+        return 1 if handPips(hands[1]) < handPips(hands[2]) else 2
+
+
+    def actions(self) -> List[Tuple[int, int]]:
+        """Draw for the Player to move if needed, then list their (Tile index, side) actions.
+        """
+
+        ends = PIP_MASKS[self.left] | PIP_MASKS[self.right]
+        hand = self.hands[self.turn]
+
+        while not hand & ends and self.boneyard:
+            hand |= 1 << self.boneyard.pop()
+        self.hands[self.turn] = hand
+
+        legal = hand & ends
+        if not legal:
+            return [PASS]
+
+        actions = []
+        leftMask = PIP_MASKS[self.left]
+        rightMask = PIP_MASKS[self.right]
+        for tile in range(TILE_COUNT):
+            bit = 1 << tile
+            if legal & bit:
+                if bit & leftMask:
+                    actions.append((tile, LEFT))
+                if bit & rightMask and (self.left != self.right or not bit & leftMask):
+                    actions.append((tile, RIGHT))
+
+        return actions
+
+
+    def apply(self, action: Tuple[int, int]):
+        tile, side = action
+
+        if action == PASS:
+            self.passes += 1
+        else:
+            self.passes = 0
+            self.hands[self.turn] &= ~(1 << tile)
+            pip1, pip2 = TILE_PIPS[tile]
+            if side == LEFT:
+                self.left = pip2 if pip1 == self.left else pip1
+            else:
+                self.right = pip2 if pip1 == self.right else pip1
+
+        self.turn = 3 - self.turn
+
+
+def constrainedHand(problem: SearchProblem, tiles: List[int]) -> Optional[List[int]]:
+    """Pick opponentHandSize Tiles consistent with the observations, trying the Tiles in the given order and
+    backtracking when an observation's limit is reached. Returns None if no hand fits.
+    """
+
+    size = problem.opponentHandSize
+    limits = [problem.opponentDraws - observation.drawsBefore for observation in problem.observations]
+    masks = [observation.voidMask for observation in problem.observations]
+    hand: List[int] = []
+
+    def pick(start: int) -> bool:
+        if len(hand) == size:
+            return True
+
+        for i in range(start, len(tiles) - (size - len(hand)) + 1):
+            bit = 1 << tiles[i]
+            hit = [j for j, mask in enumerate(masks) if mask & bit]
+            if any(limits[j] <= 0 for j in hit):
+                continue
+
+            for j in hit:
+                limits[j] -= 1
+            hand.append(tiles[i])
+            if pick(i + 1):
+                return True
+            hand.pop()
+            for j in hit:
+                limits[j] += 1
+
+        return False
+
+    return hand if pick(0) else None
+
+
+def determinize(problem: SearchProblem, rng: random.Random, tries: int = 20) -> DeterminizedRound:
+    """Sample the opponent's hand and the boneyard order uniformly from the unknown Tiles, rejecting hands
+    that contradict the observations. After tries rejections, the hand is built Tile by Tile in a random
+    order by constrainedHand(), so it is always consistent, if no longer uniform.
+    """
+
+    unknown = [tile for tile in range(TILE_COUNT) if problem.unknown >> tile & 1]
+    size = problem.opponentHandSize
+
+    for _ in range(tries):
+        rng.shuffle(unknown)
+        opponentHand = 0
+        for tile in unknown[:size]:
+            opponentHand |= 1 << tile
+        if isConsistent(problem, opponentHand):
+            break
+    else:
+        rng.shuffle(unknown)
+        hand = constrainedHand(problem, unknown)
+        assert hand is not None, 'No opponent hand is consistent with the observations'
+
+        opponentHand = 0
+        for tile in hand:
+            opponentHand |= 1 << tile
+        unknown = hand + [tile for tile in unknown if not opponentHand >> tile & 1]
+
+    hands = [0, 0, 0]
+    hands[problem.playerId] = problem.hand
+    hands[3 - problem.playerId] = opponentHand
+
+    return DeterminizedRound(hands, problem.leftPip, problem.rightPip, unknown[size:], problem.playerId)
+
+
+class Node:
+    __slots__ = ('action', 'player', 'parent', 'children', 'visits', 'wins', 'avails')
+
+    def __init__(self, action: Optional[Tuple[int, int]] = None, player: int = 0, parent: Optional['Node'] = None):
+        self.action = action
+        self.player = player  # The Player who took the action leading here
+        self.parent = parent
+        self.children: Dict[Tuple[int, int], Node] = {}
+        self.visits = 0
+        self.wins = 0.0
+        self.avails = 1
+
+
+    def ucb(self, exploration: float) -> float:
+        return self.wins / self.visits + exploration * math.sqrt(math.log(self.avails) / self.visits)
+
+
+def runSearch(problem: SearchProblem, iterations: Optional[int], timeLimit: Optional[float], seed: int,
+              exploration: float = 0.7) -> RootStats:
+    """Single-observer information set MCTS. Each iteration samples a determinization, walks the shared tree
+    through the actions legal in it, expands one action and finishes the round with random moves. A win is 1.
+
+    Args:
+        problem (SearchProblem): What the Player to move knows.
+        iterations (Optional[int]): Stop after this many iterations.
+        timeLimit (Optional[float]): Stop after this many seconds.
+        seed (int): Seed of the sampling and rollout RNG.
+        exploration (float, optional): UCB exploration constant. Defaults to 0.7.
+
+    Returns:
+        RootStats: (visits, wins) of each root action.
+    """
+
+    rng = random.Random(seed)
+    root = Node()
+    deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+    iteration = 0
+
+    while (iterations is None or iteration < iterations) and (deadline is None or time.perf_counter() < deadline):
+        iteration += 1
+        state = determinize(problem, rng)
+        node = root
+
+        # Selection and expansion
+        while not state.isOver():
+            actions = state.actions()
+            untried = [action for action in actions if action not in node.children]
+
+            for action in actions:
+                child = node.children.get(action)
+                if child is not None:
+                    child.avails += 1
+
+            if untried:
+                action = rng.choice(untried)
+                child = Node(action, state.turn, node)
+                node.children[action] = child
+                state.apply(action)
+                node = child
+                break
+
+            node = max((node.children[action] for action in actions), key=lambda child: child.ucb(exploration))
+            state.apply(node.action)
+
+        # Rollout
+        while not state.isOver():
+            state.apply(rng.choice(state.actions()))
+
+        winner = state.winner()
+        while node is not None:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+            node = node.parent
+
+    return {action: (child.visits, child.wins) for action, child in root.children.items()}
+
+
+_pools: Dict[int, Pool] = {}
+_poolsLock = threading.Lock()  # Computers may move in threads, e.g. in server.ComputerSeat
+
+
+def getPool(workers: int) -> Pool:
+    """A process pool shared by every ISMCTSComputer with the same number of workers."""
+
+    with _poolsLock:
+        if workers not in _pools:
+            _pools[workers] = Pool(workers)
+
+        return _pools[workers]
+
+
+@atexit.register
+def closePools():
+    for pool in _pools.values():
+        pool.terminate()
+    _pools.clear()
+
+
+class ISMCTSComputer(Computer):
+    """Information set Monte Carlo tree search. The opponent's hand and the boneyard are sampled from the Tiles
+    this Player has not seen, keeping only hands consistent with the opponent's draws and passes.
+
+    With workers > 1, independent searches run in a process pool (root parallelization) and their
+    root statistics are summed. Use functools.partial to pass a budget to Simulator, e.g.
+    Simulator(partial(ISMCTSComputer, iterations=2000, workers=4)).
+    """
+
+    def __init__(self, player: Player, game: Game, iterations: Optional[int] = 1000, timeLimit: Optional[float] = None,
+                 workers: int = 1):
+        """
+        Args:
+            player (Player): The Player this Computer plays for.
+            game (Game): The Game being played.
+            iterations (Optional[int], optional): Iterations per move over all workers. Defaults to 1000.
+            timeLimit (Optional[float], optional): Seconds per move. Defaults to None, no time limit.
+            workers (int, optional): Processes to search in. Defaults to 1, searching in this process.
+        """
+
+        super().__init__(player, game)
+        assert game.isStandard(), 'ISMCTSComputer only plays double-six Games of two Players'
+        assert iterations is not None or timeLimit is not None, 'ISMCTSComputer needs an iteration or time budget'
+
+        self.iterations = iterations
+        self.timeLimit = timeLimit
+        self.workers = workers
+        self.rng = random.Random(game.rng.getrandbits(64))
+
+        self.opponentId = 2 if player.id == '1' else 1
+        self.observations: List[Observation] = []
+        self.lastTurn = None  # (keys of both ends after this Player's move, opponent draws and passes, own passes)
+
+
+    def getMove(self) -> Move:
+        moves = legalMoves(self.player.hand, self.game.snake)
+
+        self.observeOpponent()
+
+        if len(moves) <= 1:
+            move = moves[0] if moves else None
+        else:
+            move = self.search()
+
+        if move is not None:
+            self.rememberTurn(move)
+
+        return move
+
+
+    def observeOpponent(self):
+        """If the opponent drew or passed on their one turn since this Player's last move, they were void
+        of the ends this Player left them.
+        """
+
+        game = self.game
+        opponent = str(self.opponentId)
+
+        if self.lastTurn is not None:
+            (leftKey, rightKey), draws, opponentPasses, passes = self.lastTurn
+            opponentStuck = (game.playerDrawCountsTotal[opponent] > draws
+                             or game.playerPassCountsTotal[opponent] > opponentPasses)
+            if opponentStuck and game.playerPassCountsTotal[self.player.id] == passes:
+                snake = game.snake
+                leftPip = snake.tiles[leftKey - snake.leftKey].pip1
+                rightPip = snake.tiles[rightKey - snake.leftKey].pip2
+                self.observations.append(Observation(PIP_MASKS[leftPip] | PIP_MASKS[rightPip], draws))
+
+        self.lastTurn = None
+
+
+    def rememberTurn(self, move: Move):
+        snake = self.game.snake
+        leftKey = snake.getEndKey(Orientation.LEFT)
+        rightKey = snake.getEndKey(Orientation.RIGHT)
+        if move.side is Orientation.LEFT:
+            leftKey -= 1
+        else:
+            rightKey += 1
+
+        opponent = str(self.opponentId)
+        self.lastTurn = ((leftKey, rightKey), self.game.playerDrawCountsTotal[opponent],
+                         self.game.playerPassCountsTotal[opponent], self.game.playerPassCountsTotal[self.player.id])
+
+
+    def getProblem(self) -> SearchProblem:
+        game = self.game
+        opponent = game.player2 if self.opponentId == 2 else game.player1
+
+        board = 0
+        for placed in game.snake.tiles:
+            board |= 1 << placed.index
+
+        return SearchProblem(
+            int(self.player.id),
+            self.player.handMask,
+            len(opponent.hand),
+            ALL_TILES & ~board & ~self.player.handMask,
+            game.snake.leftPip,
+            game.snake.rightPip,
+            tuple(self.observations),
+            game.playerDrawCountsTotal[str(self.opponentId)],
+        )
+
+
+    def search(self) -> Move:
+        problem = self.getProblem()
+
+        if self.workers <= 1:
+            stats = runSearch(problem, self.iterations, self.timeLimit, self.rng.getrandbits(64))
+        else:
+            iterations = -(-self.iterations // self.workers) if self.iterations is not None else None
+            jobs = [(problem, iterations, self.timeLimit, self.rng.getrandbits(64)) for _ in range(self.workers)]
+
+            stats = {}
+            for workerStats in getPool(self.workers).starmap(runSearch, jobs):
+                for action, (visits, wins) in workerStats.items():
+                    total = stats.get(action, (0, 0.0))
+                    stats[action] = (total[0] + visits, total[1] + wins)
+
+        tile, side = max(stats, key=lambda action: stats[action][0])
+        return Move(TILES[tile], Orientation.LEFT if side == LEFT else Orientation.RIGHT)
@@ -0,0 +1,330 @@
+from collections import deque
+from itertools import chain
+from typing import TYPE_CHECKING, Deque, List, NamedTuple, Optional, Tuple
+
+from .enums.orientations import Orientation
+
+if TYPE_CHECKING:
+    from .snake import PlacedTile
+
+# The board is 24x24 inches and a Tile is 2x1 inches (see README). Positions are in half-inch grid cells so
+# that a double placed across the line can be centered on it.
+UNITS_PER_INCH = 2
+BOARD_INCHES = 24
+BOARD_SIZE = BOARD_INCHES * UNITS_PER_INCH
+TILE_LENGTH = 2 * UNITS_PER_INCH
+TILE_WIDTH = 1 * UNITS_PER_INCH
+
+# Directions on the grid as indices in clockwise order, so turning clockwise is + 1. y grows downwards
+UP, RIGHT, DOWN, LEFT = range(4)
+DIRECTIONS = (Orientation.UP, Orientation.RIGHT, Orientation.DOWN, Orientation.LEFT)
+STEPS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+# Cells covered by a Tile: x0, y0 inclusive and x1, y1 exclusive
+Rect = Tuple[int, int, int, int]
+
+
+class LaidTile(NamedTuple):
+    """A Tile on the board. x and y are the grid cell of its top left corner, orientation is the side of the
+    Tile that PlacedTile.pip1 is on (see Orientation). LEFT or RIGHT Tiles are horizontal, UP or DOWN vertical.
+    """
+
+    placed: 'PlacedTile'
+    x: int
+    y: int
+    orientation: Orientation
+    fits: bool  # False if there was no room on the board and the Tile overlaps others or the edge
+
+    @property
+    def width(self) -> int:
+        return TILE_LENGTH if self.orientation in (Orientation.LEFT, Orientation.RIGHT) else TILE_WIDTH
+
+    @property
+    def height(self) -> int:
+        return TILE_WIDTH if self.orientation in (Orientation.LEFT, Orientation.RIGHT) else TILE_LENGTH
+
+    def encode(self, key: int) -> str:
+        """Encode the Tile at a key of the snake like Encoder.encodeBoardLayout(). E.g. '-1:1|2@19,23,LEFT'
+        """
+
+        return '{}@{},{},{}'.format(self.placed.encode(key), self.x, self.y, self.orientation)
+
+
+class LayoutEnd:
+    """An open end of the line: the center of the face Tiles are placed against, the direction the line grows
+    in from it (see DIRECTIONS) and the face's width in cells.
+    """
+
+    __slots__ = ('x', 'y', 'direction', 'width')
+
+    def __init__(self, x: int, y: int, direction: int, width: int):
+        self.x = x
+        self.y = y
+        self.direction = direction
+        self.width = width
+
+
+def spanRect(x: int, y: int, along: int, a0: int, a1: int, across: int, b0: int, b1: int) -> Rect:
+    """The cells from a0 to a1 steps along one direction and b0 to b1 steps along a perpendicular one, from (x, y).
+    """
+
+    ax, ay = STEPS[along]
+    bx, by = STEPS[across]
+    xa = x + a0 * ax + b0 * bx
+    xb = x + a1 * ax + b1 * bx
+    ya = y + a0 * ay + b0 * by
+    yb = y + a1 * ay + b1 * by
+
+    if xa > xb:
+        xa, xb = xb, xa
+    if ya > yb:
+        ya, yb = yb, ya
+
+    return xa, ya, xb, yb
+
+
+class BoardLayout:
+    """Physical layout of the snake on the board, laid one Tile at a time in O(1). Snake.layout catches it up
+    with the Tiles played since it was last read.
+
+    Tiles are laid in line with the end they are played on, except doubles, which are laid across the line.
+    If a Tile does not fit on the board or would overlap another Tile, it is turned perpendicular to the line,
+    clockwise if there is room, else counter-clockwise. A turned Tile goes in the corner past the end, or
+    alongside the last Tile if the end is against the edge of the board. Tiles can only be played on the two
+    ends of the line, never branched off a double laid across it.
+
+    Occupied cells are kept as one bitmask per grid row, so checking or marking a Tile's cells touches at most
+    four rows. A Tile with no room anywhere is laid in line anyway and counted in overflowCount.
+    encoded is Encoder.encodeBoardLayout() of the Tiles laid so far. Each Tile's piece is encoded as it is laid
+    and the pieces are joined when it is read.
+    """
+
+    def __init__(self):
+        self.tiles: Deque[LaidTile] = deque()
+        self.rows: List[int] = [0] * BOARD_SIZE
+        self.leftEnd: Optional[LayoutEnd] = None
+        self.rightEnd: Optional[LayoutEnd] = None
+        self.overflowCount = 0
+        self.leftKey = 0  # Snake key of the leftmost Tile
+        self._leftEncoded: List[str] = []  # Pieces of the Tiles left of the start Tile, from the start outwards
+        self._rightEncoded: List[str] = []  # Pieces of the start Tile and the Tiles right of it
+        self._encoded = ''  # Joined pieces, None after a Tile is laid
+
+
+    @property
+    def encoded(self) -> str:
+        if self._encoded is None:
+            self._encoded = ' '.join(chain(reversed(self._leftEncoded), self._rightEncoded))
+
+        return self._encoded
+
+
+    def start(self, placed: 'PlacedTile'):
+        """Clear the board and lay the start Tile in the middle of it, along the horizontal line.
+        """
+
+        self.tiles = deque()
+        self.rows = [0] * BOARD_SIZE
+        self.overflowCount = 0
+        self.leftKey = 0
+
+        center = BOARD_SIZE // 2
+        if placed.pip1 == placed.pip2:
+            rect = (center - TILE_WIDTH // 2, center - TILE_LENGTH // 2, center + TILE_WIDTH // 2, center + TILE_LENGTH // 2)
+            orientation = Orientation.UP
+            faceWidth = TILE_LENGTH
+        else:
+            rect = (center - TILE_LENGTH // 2, center - TILE_WIDTH // 2, center + TILE_LENGTH // 2, center + TILE_WIDTH // 2)
+            orientation = Orientation.LEFT
+            faceWidth = TILE_WIDTH
+
+        self.occupy(rect)
+        self.tiles.append(LaidTile(placed, rect[0], rect[1], orientation, True))
+        self._leftEncoded = []
+        self._rightEncoded = [self.tiles[0].encode(0)]
+        self._encoded = None
+        self.leftEnd = LayoutEnd(rect[0], center, LEFT, faceWidth)
+        self.rightEnd = LayoutEnd(rect[2], center, RIGHT, faceWidth)
+
+
+    def catchUp(self, placements: List[Tuple['PlacedTile', Optional[Orientation]]]):
+        """Lay the Tiles played since the last call.
+
+        Args:
+            placements (List[Tuple[PlacedTile, Optional[Orientation]]]): Every Tile of the snake in the order it was
+            played and the side it was played on, starting with the start Tile.
+        """
+
+        for i in range(len(self.tiles), len(placements)):
+            placed, side = placements[i]
+            if i == 0:
+                self.start(placed)
+            else:
+                self.add(placed, side)
+
+
+    def add(self, placed: 'PlacedTile', side: Orientation) -> LaidTile:
+        """Lay a Tile just added to the snake on the board, at the end of the side it was played on.
+
+        Args:
+            placed (PlacedTile): The Tile as placed on the snake by Snake.addTile().
+            side (Orientation): LEFT or RIGHT, the end of the snake it was played on.
+
+        Returns:
+            LaidTile: Where the Tile was laid.
+        """
+
+        left = side is Orientation.LEFT
+        end = self.leftEnd if left else self.rightEnd
+        double = placed.pip1 == placed.pip2
+        direction = end.direction
+
+        fits = True
+        rect = self.straightRect(end, double)
+        if self.isFree(rect):
+            newEnd = self.straightEnd(end, double)
+        else:
+            for turn, corner in ((1, True), (1, False), (3, True), (3, False)):
+                direction = (end.direction + turn) & 3
+                rect = self.turnedRect(end, direction, corner)
+                if self.isFree(rect):
+                    newEnd = self.turnedEnd(end, direction, corner)
+                    break
+            else:
+                fits = False
+                direction = end.direction
+                rect = self.straightRect(end, double)
+                newEnd = self.straightEnd(end, double)
+                self.overflowCount += 1
+
+        if double and direction == end.direction:
+            orientation = Orientation.UP if direction & 1 else Orientation.LEFT
+        else:
+            # pip1 is the inner pip of a Tile played on the right and the outer pip of one played on the left
+            orientation = DIRECTIONS[direction if left else (direction + 2) & 3]
+
+        self.occupy(rect)
+        laid = LaidTile(placed, rect[0], rect[1], orientation, fits)
+
+        if left:
+            self.tiles.appendleft(laid)
+            self.leftEnd = newEnd
+            self.leftKey -= 1
+            self._leftEncoded.append(laid.encode(self.leftKey))
+        else:
+            self.tiles.append(laid)
+            self.rightEnd = newEnd
+            self._rightEncoded.append(laid.encode(self.leftKey + len(self.tiles) - 1))
+
+        self._encoded = None
+        return laid
+
+
+    def straightRect(self, end: LayoutEnd, double: bool) -> Rect:
+        """The cells of a Tile laid in line at an end, or across the line if it is a double.
+        """
+
+        if double:
+            return spanRect(end.x, end.y, end.direction, 0, TILE_WIDTH, (end.direction + 1) & 3,
+                            -TILE_LENGTH // 2, TILE_LENGTH // 2)
+
+        return spanRect(end.x, end.y, end.direction, 0, TILE_LENGTH, (end.direction + 1) & 3,
+                        -TILE_WIDTH // 2, TILE_WIDTH // 2)
+
+
+    def straightEnd(self, end: LayoutEnd, double: bool) -> LayoutEnd:
+        dx, dy = STEPS[end.direction]
+        length = TILE_WIDTH if double else TILE_LENGTH
+
+        return LayoutEnd(end.x + dx * length, end.y + dy * length, end.direction, TILE_LENGTH if double else TILE_WIDTH)
+
+
+    def turnedRect(self, end: LayoutEnd, direction: int, corner: bool) -> Rect:
+        """The cells of a Tile turned to grow in a direction perpendicular to an end's. It is laid in the corner just
+        past the face if corner is True, else alongside the last Tile against the face's edge, for when there is no
+        room past the face.
+        """
+
+        half = end.width // 2
+        if corner:
+            return spanRect(end.x, end.y, end.direction, 0, TILE_WIDTH, direction, -half, TILE_LENGTH - half)
+
+        return spanRect(end.x, end.y, end.direction, -TILE_WIDTH, 0, direction, half, half + TILE_LENGTH)
+
+
+    def turnedEnd(self, end: LayoutEnd, direction: int, corner: bool) -> LayoutEnd:
+        dx, dy = STEPS[end.direction]
+        ex, ey = STEPS[direction]
+        half = end.width // 2
+        along, offset = (TILE_WIDTH // 2, TILE_LENGTH - half) if corner else (-TILE_WIDTH // 2, half + TILE_LENGTH)
+
+        return LayoutEnd(end.x + dx * along + ex * offset, end.y + dy * along + ey * offset, direction, TILE_WIDTH)
+
+
+    def isFree(self, rect: Rect) -> bool:
+        """Check that a rectangle of cells is on the board and not covered by any Tile.
+        """
+
+        x0, y0, x1, y1 = rect
+        if x0 < 0 or y0 < 0 or x1 > BOARD_SIZE or y1 > BOARD_SIZE:
+            return False
+
+        mask = ((1 << (x1 - x0)) - 1) << x0
+        rows = self.rows
+        for y in range(y0, y1):
+            if rows[y] & mask:
+                return False
+
+        return True
+
+
+    def isOccupied(self, x: int, y: int) -> bool:
+        return 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE and bool(self.rows[y] >> x & 1)
+
+
+    def occupy(self, rect: Rect):
+        """Mark the cells of a rectangle as covered, ignoring any off the board.
+        """
+
+        x0, y0, x1, y1 = rect
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, BOARD_SIZE), min(y1, BOARD_SIZE)
+        if x0 >= x1:
+            return
+
+        mask = ((1 << (x1 - x0)) - 1) << x0
+        for y in range(y0, y1):
+            self.rows[y] |= mask
+
+
+    def toGrid(self) -> List[List[int]]:
+        """The board as BOARD_SIZE rows of cells: 0 if empty, else 1 + the index of the Tile covering the cell.
+        """
+
+        grid = [[0] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+
+        for laid in self.tiles:
+            for y in range(max(laid.y, 0), min(laid.y + laid.height, BOARD_SIZE)):
+                for x in range(max(laid.x, 0), min(laid.x + laid.width, BOARD_SIZE)):
+                    grid[y][x] = laid.placed.index + 1
+
+        return grid
+
+
+    def __str__(self) -> str:
+        """Draw the board, one character per cell: '.' if empty, else the pip on that half of the Tile.
+        """
+
+        grid = [['.'] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+
+        for laid in self.tiles:
+            placed = laid.placed
+            # The first half of the Tile is the pip1 half if it is on the top or left
+            first, second = ((placed.pip1, placed.pip2) if laid.orientation in (Orientation.LEFT, Orientation.UP)
+                             else (placed.pip2, placed.pip1))
+            for y in range(max(laid.y, 0), min(laid.y + laid.height, BOARD_SIZE)):
+                for x in range(max(laid.x, 0), min(laid.x + laid.width, BOARD_SIZE)):
+                    inFirstHalf = (x - laid.x < laid.width // 2) if laid.width > laid.height else (y - laid.y < laid.height // 2)
+                    grid[y][x] = str(first if inFirstHalf else second)
+
+        return '\n'.join(''.join(row) for row in grid)
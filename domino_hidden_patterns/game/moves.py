@@ -0,0 +1,47 @@
+from .tile import Tile
+from .snake import Snake
+from .player import Player
+from .enums.orientations import Orientation
+
+from typing import Iterable, List, NamedTuple
+
+
+class Move(NamedTuple):
+    tile: Tile
+    side: Orientation
+
+
+def legalMoves(hand: Iterable[Tile], snake: Snake) -> List[Move]:
+    """Get every (Tile, side) pair of a hand that can be played on the Snake in a single pass. 
+    Each Tile is checked with one AND against the mask of Tiles containing each open pip.
+
+    Args:
+        hand (Iterable[Tile]): The Tiles that can be played, e.g. Player.hand.
+        snake (Snake): The Snake to play on.
+
+    Returns:
+        List[Move]: The legal moves in hand order, LEFT before RIGHT for the same Tile.
+    """
+
+    pipMasks = snake.tileSet.pipMasks
+    leftMask = pipMasks[snake.leftPip]
+    rightMask = pipMasks[snake.rightPip]
+    moves = []
+
+    for tile in hand:
+        bit = 1 << tile.index
+
+        if bit & leftMask:
+            moves.append(Move(tile, Orientation.LEFT))
+        if bit & rightMask:
+            moves.append(Move(tile, Orientation.RIGHT))
+
+    return moves
+
+
+def hasLegalMove(player: Player, snake: Snake) -> bool:
+    """Check if a Player can play any Tile in O(1) by ANDing their hand mask with the open pips' masks.
+    """
+
+    pipMasks = snake.tileSet.pipMasks
+    return bool(player.handMask & (pipMasks[snake.leftPip] | pipMasks[snake.rightPip]))
@@ -1,38 +1,113 @@
-from tile import Tile
-from deck import Deck
-from exceptions.gameExceptions import DeckEmptyException
-from exceptions.gameExceptions import HandEmptyException
+from .tile import Tile
+from .deck import Deck
+from .exceptions.gameExceptions import DeckEmptyException
+from .exceptions.gameExceptions import HandEmptyException
+
+from typing import Iterable, Iterator, Optional
+
+class Hand:
+    """The Tiles in a Player's hand, in the order they were drawn. Backed by an insertion ordered dict of
+    the shared Tile instances, so membership and removal are O(1). Supports the list operations a hand uses.
+    """
+    
+    __slots__ = ('tiles',)
+    
+    def __init__(self, tiles: Iterable[Tile] = ()):
+        self.tiles = dict.fromkeys(tiles)
+    
+    
+    def append(self, tile: Tile):
+        self.tiles[tile] = None
+    
+    
+    def remove(self, tile: Tile):
+        """Remove a Tile from the hand.
+
+        Raises:
+            ValueError: If the Tile is not in the hand, like list.remove().
+        """
+        
+        try:
+            del self.tiles[tile]
+        except KeyError:
+            raise ValueError('{} is not in the hand'.format(tile)) from None
+    
+    
+    def copy(self) -> 'Hand':
+        return Hand(self.tiles)
+    
+    
+    def __contains__(self, tile: Tile) -> bool:
+        return tile in self.tiles
+    
+    
+    def __iter__(self) -> Iterator[Tile]:
+        return iter(self.tiles)
+    
+    
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+
+def initialHandSize(playerCount: int) -> int:
+    """The number of Tiles each Player draws at the start of a round: 7 with two Players, 5 with three or four.
+    """
+    
+    return 7 if playerCount <= 2 else 5
 
-from typing import List
 
 class Player:
     
-    def __init__(self, deck: Deck, id: int):
+    def __init__(self, deck: Deck, id: int, hand: Optional[Iterable[Tile]] = None, handSize: int = 7):
+        """
+        Args:
+            deck (Deck): The Deck shared by the Players.
+            id (int): The Player's ID.
+            hand (Optional[Iterable[Tile]], optional): Tiles to start with instead of drawing handSize from the Deck.
+                Defaults to None.
+            handSize (int, optional): The number of Tiles to draw, see initialHandSize(). Defaults to 7.
+        """
+        
         self.id = id
         self.deck = deck
-        self.hand = self.initialDrawFromDeck(7)  # Change this to be 7 if two players, 5 if more than 2 players
+        self.handMask = 0  # Bit i is set if the Tile with index i (see tileTable) is in the hand
+        self.pipCount = 0  # Total pips of the hand, kept up to date as Tiles are drawn and played
+        
+        if hand is None:
+            self.hand = self.initialDrawFromDeck(handSize)
+        else:
+            self.hand = Hand(hand)
+            for tile in self.hand:
+                self.handMask |= 1 << tile.index
+                self.pipCount += tile.pip1 + tile.pip2
         self.points = 0
     
     
-    def initialDrawFromDeck(self, count: int) -> List[Tile]:
+    def initialDrawFromDeck(self, count: int) -> Hand:
         """Draw 'count' Tiles from the deck. This function is called at the start of a game for each player.
 
         Args:
             count (int): The number of Tiles to draw from the Deck.
 
         Returns:
-            List[Tile]: List containing 'count' drawn Tiles from the Deck. 
+            Hand: Hand containing 'count' drawn Tiles from the Deck. 
         """
         
-        hand = []
+        hand = Hand()
         for i in range(count):
-            hand.append(self.deck.drawRandomTile())
+            tile = self.deck.drawRandomTile()
+            hand.append(tile)
+            self.handMask |= 1 << tile.index
+            self.pipCount += tile.pip1 + tile.pip2
         
         return hand
     
     
-    def drawFromDeck(self):
+    def drawFromDeck(self) -> Tile:
         """Draw a Tile from the Deck and append it to this Player's hand.
+
+        Returns:
+            Tile: The drawn Tile. None if the Deck is empty.
         """
 
         try:
@@ -45,6 +120,10 @@ class Player:
         drawnTile = self.deck.drawRandomTile()
         
         self.hand.append(drawnTile)
+        self.handMask |= 1 << drawnTile.index
+        self.pipCount += drawnTile.pip1 + drawnTile.pip2
+        
+        return drawnTile
         
         
     def isHandEmpty(self) -> bool:
@@ -77,6 +156,8 @@ class Player:
         
         try:
             self.hand.remove(tile)
+            self.handMask &= ~(1 << tile.index)
+            self.pipCount -= tile.pip1 + tile.pip2
         except ValueError as e:
             print("That Tile is not in this hand.")
     
@@ -92,20 +173,14 @@ class Player:
     
     
     def countPipsInHand(self) -> int:
-        """Count and return the total number of pips among the Tiles in this Player's hand.
+        """Return the total number of pips among the Tiles in this Player's hand, kept in pipCount.
         Used for score calculation at the end of a round.
 
         Returns:
             int: The total number of pips in this Player's hand.
         """
         
-        total = 0
-        
-        t: Tile
-        for t in self.hand:
-            total += t.pip1 + t.pip2
-        
-        return total
+        return self.pipCount
     
     
     def __eq__(self, __value: object) -> bool:
@@ -0,0 +1,198 @@
+from .game import Game
+from .player import Player
+from .snake import Snake
+from .computer import Computer
+from .encoder import Encoder
+
+import functools
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+RECORD_METHODS = ('recordMatchData', 'recordRoundData', 'recordTurnStartData', 'recordTurnEndData')
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    total: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls > 0 else 0.0
+
+
+def subclassesOf(cls: type) -> List[type]:
+    """The class and every subclass of it defined so far, parents first."""
+
+    classes = [cls]
+    for subclass in cls.__subclasses__():
+        classes.extend(subclassesOf(subclass))
+
+    return classes
+
+
+def defaultTargets() -> List[Tuple[type, str]]:
+    """The methods timed by a Profiler by default: the phases of a round, every Computer's getMove()
+    and the record methods of every Encoder. Subclasses are only timed for the methods they override.
+    """
+
+    targets = [
+        (Game, 'startRound'),
+        (Game, 'drawUntilValidTile'),
+        (Game, 'playTile'),
+        (Player, 'drawFromDeck'),
+        (Snake, 'addTile'),
+    ]
+
+    for computerType in subclassesOf(Computer):
+        if 'getMove' in vars(computerType):
+            targets.append((computerType, 'getMove'))
+
+    for encoderType in subclassesOf(Encoder):
+        for method in RECORD_METHODS:
+            if method in vars(encoderType):
+                targets.append((encoderType, method))
+
+    return targets
+
+
+class Profiler:
+    """Opt-in timers and call counters around the hot methods of Game, Computer and Encoder.
+
+    While enabled, each target method is replaced on its class by a wrapper that counts calls and adds up
+    their wall time. disable() puts the original methods back, so nothing is patched and there is no cost when
+    profiling is off. Only calls made in this process are counted.
+
+    A subclass method that calls its parent's, e.g. EventLogEncoder.recordRoundData(), includes the parent's
+    time, which is also reported on its own.
+
+    Usage:
+        with Profiler() as profiler:
+            Simulator().run(100)
+        print(profiler.report())
+    """
+
+    def __init__(self, targets: Optional[List[Tuple[type, str]]] = None):
+        """
+        Args:
+            targets (Optional[List[Tuple[type, str]]], optional): (class, method name) pairs to time.
+            Defaults to defaultTargets(), collected when the Profiler is enabled.
+        """
+
+        self.targets = targets
+        self.stats: Dict[str, PhaseStats] = {}
+        self.patched: List[Tuple[type, str, Callable]] = []
+        self.elapsed = 0.0
+        self.startTime = None
+
+
+    @property
+    def enabled(self) -> bool:
+        return self.startTime is not None
+
+
+    def enable(self):
+        if self.enabled:
+            return
+
+        for cls, name in (self.targets if self.targets is not None else defaultTargets()):
+            original = vars(cls)[name]
+            setattr(cls, name, self.wrap('{}.{}'.format(cls.__name__, name), original))
+            self.patched.append((cls, name, original))
+
+        self.startTime = time.perf_counter()
+
+
+    def disable(self):
+        if not self.enabled:
+            return
+
+        for cls, name, original in reversed(self.patched):
+            setattr(cls, name, original)
+
+        self.patched = []
+        self.elapsed += time.perf_counter() - self.startTime
+        self.startTime = None
+
+
+    def __enter__(self) -> 'Profiler':
+        self.enable()
+        return self
+
+
+    def __exit__(self, *exc):
+        self.disable()
+
+
+    def wrap(self, key: str, function: Callable) -> Callable:
+        stats = self.stats.setdefault(key, PhaseStats())
+        perfCounter = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = perfCounter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.calls += 1
+                stats.total += perfCounter() - start
+
+        return timed
+
+
+    def reset(self):
+        for stats in self.stats.values():
+            stats.calls = 0
+            stats.total = 0.0
+
+        self.elapsed = 0.0
+        if self.enabled:
+            self.startTime = time.perf_counter()
+
+
+    def summary(self) -> Dict:
+        """Get the calls, total and mean time of each timed method, plus per-round counts.
+
+        Returns:
+            Dict: 'elapsed' wall time while enabled, 'phases' keyed by 'Class.method' and 'perRound' averages.
+        """
+
+        elapsed = self.elapsed + (time.perf_counter() - self.startTime if self.enabled else 0.0)
+        rounds = self.stats.get('Game.startRound', PhaseStats()).calls
+        moves = sum(stats.calls for key, stats in self.stats.items() if key.endswith('.getMove'))
+
+        def perRound(count: int) -> float:
+            return count / rounds if rounds > 0 else 0.0
+
+        return {
+            'elapsed': elapsed,
+            'phases': {key: {'calls': stats.calls, 'total': stats.total, 'mean': stats.mean}
+                       for key, stats in self.stats.items() if stats.calls > 0},
+            'perRound': {
+                'rounds': rounds,
+                'draws': perRound(self.stats.get('Player.drawFromDeck', PhaseStats()).calls),
+                'drawSequences': perRound(self.stats.get('Game.drawUntilValidTile', PhaseStats()).calls),
+                'moves': perRound(moves),
+            },
+        }
+
+
+    def report(self) -> str:
+        """Format summary() as a table, slowest total time first.
+        """
+
+        summary = self.summary()
+        elapsed = summary['elapsed']
+        lines = ['{:<40} {:>10} {:>10} {:>10} {:>7}'.format('phase', 'calls', 'total s', 'mean us', '% run')]
+
+        for key, phase in sorted(summary['phases'].items(), key=lambda item: -item[1]['total']):
+            lines.append('{:<40} {:>10} {:>10.3f} {:>10.2f} {:>6.1f}%'.format(
+                key, phase['calls'], phase['total'], phase['mean'] * 1e6,
+                100 * phase['total'] / elapsed if elapsed > 0 else 0.0))
+
+        perRound = summary['perRound']
+        lines.append('{} rounds in {:.2f}s: {:.2f} Tiles drawn, {:.2f} draw sequences and {:.2f} moves per round'.format(
+            perRound['rounds'], elapsed, perRound['draws'], perRound['drawSequences'], perRound['moves']))
+
+        return '\n'.join(lines)
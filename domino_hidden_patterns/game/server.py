@@ -0,0 +1,759 @@
+from .game import Game
+from .player import Player
+from .tile import Tile
+from .snake import PlacedTile
+from .computer import Computer
+from .encoder import Encoder
+from .enums.orientations import Orientation
+from .gameListener import GameListener
+from .moves import Move, legalMoves
+from .ismcts import ISMCTSComputer
+from .simulator import COMPUTERS, ENCODERS, ComputerFactory, loadEncoder, matchSeed
+from .sinks import SINKS
+
+import argparse
+import asyncio
+import json
+import os
+import random
+from functools import partial
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 8765
+MOVE_TIMEOUT = 30.0
+
+SIDE_NAMES = {Orientation.LEFT: 'left', Orientation.RIGHT: 'right'}
+SIDES = {'left': Orientation.LEFT, 'right': Orientation.RIGHT}
+
+# Message sent to a client, or received from one
+Message = Dict[str, object]
+
+
+def encodeTile(tile) -> List[int]:
+    """A Tile or PlacedTile as [pip1, pip2]. A PlacedTile's pips are in their order on the Snake.
+    """
+
+    return [tile.pip1, tile.pip2]
+
+
+def encodeMove(move: Move) -> List[object]:
+    return [encodeTile(move.tile), SIDE_NAMES[move.side]]
+
+
+def decodeMove(message: Message, moves: List[Move]) -> Optional[Move]:
+    """The legal move of a 'move' message, e.g. {"type": "move", "tile": [1, 3], "side": "left"}. None if the
+    message is malformed or the move is not legal.
+    """
+
+    try:
+        pip1, pip2 = message['tile']
+        tile = Tile(int(pip1), int(pip2))
+        side = SIDES[message['side']]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    for move in moves:
+        if move.tile == tile and move.side is side:
+            return move
+
+    return None
+
+
+class Seat:
+    """A Player's seat at a Table. Subclasses choose the moves and get the Table's messages.
+    """
+
+    def send(self, message: Message):
+        """Send a message to whoever sits here. Seats of Computers ignore them.
+        """
+
+        pass
+
+
+    def startRound(self, game: Game, player: Player):
+        """Called at the start of each round, once the hands are dealt.
+        """
+
+        pass
+
+
+    async def getMove(self, game: Game, player: Player, moves: List[Move]) -> Move:
+        """Choose one of the legal moves of the Player. There is at least one.
+        """
+
+        raise NotImplementedError
+
+
+    async def drain(self):
+        pass
+
+
+class ComputerSeat(Seat):
+    """A seat played by a Computer policy. getMove() runs in the server's executor, so a slow search doesn't hold
+    up the other Tables. The default thread pool still shares the GIL with the event loop, so for heavy search give
+    the Computer its own processes, e.g. partial(ISMCTSComputer, workers=4) (see GameServer's policies).
+    """
+
+    def __init__(self, policy: ComputerFactory, executor: Optional[Executor] = None):
+        self.policy = policy
+        self.executor = executor
+        self.computer: Optional[Computer] = None
+
+
+    def startRound(self, game: Game, player: Player):
+        # Like Simulator.playRound(), a new Computer each round
+        self.computer = self.policy(player, game)
+
+
+    async def getMove(self, game: Game, player: Player, moves: List[Move]) -> Move:
+        move = await asyncio.get_running_loop().run_in_executor(self.executor, self.computer.getMove)
+
+        return Move(*move)
+
+
+class ClientSeat(Seat):
+    """A seat played by a client connection, a human or a bot. Messages are JSON objects, one per line.
+
+    A client that doesn't answer within the Table's move timeout, or that disconnects, is played for by the
+    first legal move (see Computer.getFirstPlayableTile()), so the match still finishes and is recorded.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.connected = True
+        self.timeout = MOVE_TIMEOUT
+        self.turnId = 0  # Sent with each 'turn' message. A move naming an earlier turn came too late and is dropped
+
+        self.readTask = asyncio.ensure_future(self.readMessages())
+
+
+    async def readMessages(self):
+        """Parse the lines sent by the client into the message queue. None is queued once it disconnects.
+        """
+
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    self.send({'type': 'error', 'message': 'Messages must be JSON objects, one per line'})
+                    continue
+
+                if not isinstance(message, dict):
+                    self.send({'type': 'error', 'message': 'Messages must be JSON objects, one per line'})
+                    continue
+
+                self.queue.put_nowait(message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connected = False
+            self.queue.put_nowait(None)
+
+
+    async def receive(self, messageType: str) -> Optional[Message]:
+        """Wait for the next message of a type. Messages of other types get an error reply.
+
+        Returns:
+            Optional[Message]: The message. None if the client disconnected.
+        """
+
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                self.queue.put_nowait(None)  # Later receives see the disconnect too
+                return None
+
+            if message.get('type') == messageType:
+                return message
+
+            self.send({'type': 'error', 'message': 'Expected a {} message'.format(messageType)})
+
+
+    def send(self, message: Message):
+        if not self.connected:
+            return
+
+        try:
+            self.writer.write(json.dumps(message).encode() + b'\n')
+        except (ConnectionError, RuntimeError):
+            self.connected = False
+
+
+    async def drain(self):
+        if not self.connected:
+            return
+
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            self.connected = False
+
+
+    async def getMove(self, game: Game, player: Player, moves: List[Move]) -> Move:
+        if self.connected:
+            self.turnId += 1
+            self.send({
+                'type': 'turn',
+                'turn': self.turnId,
+                'hand': [encodeTile(tile) for tile in player.hand],
+                'snake': [encodeTile(placed) for placed in game.snake.tiles],
+                'moves': [encodeMove(move) for move in moves],
+                'boneyard': len(game.deck.deck),
+                'timeout': self.timeout,
+            })
+            await self.drain()
+
+            try:
+                move = await asyncio.wait_for(self.receiveMove(moves), self.timeout)
+            except asyncio.TimeoutError:
+                move = None
+                self.send({'type': 'timeout', 'move': encodeMove(moves[0])})
+
+            if move is not None:
+                return move
+
+        return moves[0]
+
+
+    async def receiveMove(self, moves: List[Move]) -> Optional[Move]:
+        while True:
+            message = await self.receive('move')
+            if message is None:
+                return None
+            if message.get('turn', self.turnId) != self.turnId:
+                continue
+
+            move = decodeMove(message, moves)
+            if move is not None:
+                return move
+
+            self.send({'type': 'error', 'message': 'Not a legal move. Legal moves: {}'.format(
+                [encodeMove(move) for move in moves])})
+            await self.drain()
+
+
+    async def close(self):
+        self.readTask.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class Table(GameListener):
+    """A match of Game between two Seats. Turns follow Simulator.playRound(), and the match is recorded with an
+    Encoder the same way, so a Table with two ComputerSeats records what Simulator.playMatch() does.
+
+    The Table sends both Seats every event of the Game. A Player sees the Tiles they draw, their opponent only
+    sees that they drew.
+    """
+
+    def __init__(self, tableId: int, seats: Tuple[Seat, Seat], game: Game, encoder: Optional[Encoder] = None):
+        """
+        Args:
+            tableId (int): The ID of the Table, recorded as the match ID.
+            seats (Tuple[Seat, Seat]): The Seats of Player 1 and 2.
+            game (Game): A new Game to play the match of.
+            encoder (Optional[Encoder], optional): Records the match if given. Defaults to None.
+        """
+
+        self.id = tableId
+        self.seats = seats
+        self.game = game
+        self.encoder = encoder
+        self.roundId = 0
+
+        game.addListener(self)
+
+
+    def seatOf(self, player: Player) -> Seat:
+        return self.seats[int(player.id) - 1]
+
+
+    def broadcast(self, message: Message):
+        for seat in self.seats:
+            seat.send(message)
+
+
+    def scores(self) -> Dict[str, int]:
+        return dict(self.game.playerScores)
+
+
+    def onRoundStart(self, game: Game):
+        for player in (game.player1, game.player2):
+            self.seatOf(player).send({
+                'type': 'roundStart',
+                'table': self.id,
+                'round': self.roundId,
+                'player': int(player.id),
+                'hand': [encodeTile(tile) for tile in player.hand],
+                'startTile': encodeTile(game.snake.getStartTile()),
+                'turn': game.turn,
+                'scores': self.scores(),
+            })
+
+
+    def onTileDrawn(self, game: Game, player: Player, tile: Tile):
+        for seat in self.seats:
+            message = {'type': 'drawn', 'player': int(player.id)}
+            if seat is self.seatOf(player):
+                message['tile'] = encodeTile(tile)
+            seat.send(message)
+
+
+    def onTilePlayed(self, game: Game, player: Player, placed: PlacedTile, side: Orientation):
+        self.broadcast({'type': 'played', 'player': int(player.id), 'tile': encodeTile(placed),
+                        'side': SIDE_NAMES[side]})
+
+
+    def onPass(self, game: Game, player: Player):
+        self.broadcast({'type': 'passed', 'player': int(player.id)})
+
+
+    async def drain(self):
+        for seat in self.seats:
+            await seat.drain()
+
+
+    async def play(self) -> Game:
+        """Play rounds until a Player reaches the Game's scoreToWin, like Simulator.playMatch().
+
+        Returns:
+            Game: The finished Game.
+        """
+
+        game = self.game
+
+        if self.encoder is not None:
+            self.encoder.startMatch(self.id)
+
+        while not game.checkMatchWin():
+            await self.playRound()
+            self.roundId += 1
+
+        winner = game.getMatchWinner()
+        self.broadcast({'type': 'matchOver', 'table': self.id, 'winner': int(winner.id), 'scores': self.scores()})
+        await self.drain()
+
+        if self.encoder is not None:
+            self.encoder.recordMatchData(game, self.id)
+
+        return game
+
+
+    async def playRound(self):
+        game = self.game
+        encoder = self.encoder
+
+        game.startRound()
+        for player in (game.player1, game.player2):
+            self.seatOf(player).startRound(game, player)
+
+        turnId = 0
+
+        while not game.checkRoundWin():
+            player = game.getCurrentPlayer()
+
+            if encoder is not None:
+                encoder.recordTurnStartData(game, turnId)
+
+            await self.playTurn(player)
+
+            if encoder is not None:
+                encoder.recordTurnEndData(game, turnId)
+
+            turnId += 1
+
+            if game.isTie():
+                break
+
+            game.skipTurn()
+            await self.drain()
+
+        winner = game.scoreRound()
+
+        if encoder is not None:
+            encoder.recordRoundData(game, self.roundId)
+
+        self.broadcast({'type': 'roundOver', 'round': self.roundId, 'winner': int(winner.player.id),
+                        'points': winner.pointsToGain, 'scores': self.scores()})
+        await self.drain()
+
+
+    async def playTurn(self, player: Player):
+        """Draw if needed, then play the Seat's move or pass, like Simulator.playTurn().
+        """
+
+        game = self.game
+        game.startTurn()
+
+        if game.mustDraw(player) and not game.deck.isDeckEmpty():
+            game.drawUntilValidTile(player)
+
+        if game.mustSkipTurn(player):
+            game.passTurn()
+            return
+
+        moves = legalMoves(player.hand, game.snake)
+        tile, side = await self.seatOf(player).getMove(game, player, moves)
+        game.playTile(player, tile, side)
+
+
+class GameServer:
+    """Hosts many concurrent Tables on one asyncio event loop. Clients connect over TCP or a Unix socket and
+    exchange JSON objects, one per line.
+
+    A client joins a Table with {"type": "join", "opponent": "greedy"}, to play a Computer policy of
+    the server's policies, or with "opponent": "client" to be paired with the next client who does the same.
+    "seat" (1 or 2) picks the client's Player against a Computer and defaults to 1. Paired clients get the
+    seats in the order they joined.
+
+    The Table then sends 'roundStart', 'drawn', 'played', 'passed', 'roundOver' and 'matchOver' events. On
+    the client's turn it sends a 'turn' message with the hand, the Snake and the legal moves, and waits for
+    {"type": "move", "tile": [1, 3], "side": "left"}. The move may echo the 'turn' number of the message, so a
+    move sent after the timeout isn't taken for the next turn's. After 'matchOver' the client can join again.
+
+    Each Table plays one match, seeded with matchSeed(seed, tableId). With a record directory, each Table
+    streams its match to '<directory>/table-<id>' with the given Encoder, and simulator.mergeShards() can
+    merge the directories.
+    """
+
+    def __init__(self, seed: Optional[int] = None, moveTimeout: float = MOVE_TIMEOUT, recordDir: Optional[str] = None,
+                 encoding: str = 'strings', fileFormat: str = 'csv', flushEvery: int = 1000,
+                 executor: Optional[Executor] = None, policies: Optional[Dict[str, ComputerFactory]] = None):
+        """
+        Args:
+            seed (Optional[int], optional): The master seed of the Tables' Games. Picked at random if None.
+            moveTimeout (float, optional): Seconds a client has to answer a 'turn' message. Defaults to 30.
+            recordDir (Optional[str], optional): Record every match to this directory. Defaults to None.
+            encoding (str, optional): The --encoding name of the Encoder, see simulator.ENCODERS.
+                Defaults to 'strings'.
+            fileFormat (str, optional): The file format of the recorded tables. Defaults to 'csv'.
+            flushEvery (int, optional): Rows of a table buffered before writing them. Defaults to 1000.
+            executor (Optional[Executor], optional): Runs the Computers' moves. Defaults to a thread pool.
+            policies (Optional[Dict[str, ComputerFactory]], optional): The Computers clients can play, by name.
+                Defaults to simulator.COMPUTERS.
+        """
+
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.moveTimeout = moveTimeout
+        self.recordDir = recordDir
+        self.encoderType = loadEncoder(encoding) if recordDir is not None else None
+        self.fileFormat = fileFormat
+        self.flushEvery = flushEvery
+        self.executor = executor if executor is not None else ThreadPoolExecutor()
+        self.policies = policies if policies is not None else COMPUTERS
+
+        self.nextTableId = 0
+        self.tables: Dict[int, Table] = {}
+        self.clientTasks = set()
+        self.waiting: Optional[Tuple[ClientSeat, asyncio.Future]] = None  # Client waiting for a client opponent
+        self.server: Optional[asyncio.AbstractServer] = None
+
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT, path: Optional[str] = None):
+        """Start listening on a TCP port, or on a Unix socket if path is given.
+        """
+
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handleClient, path)
+        else:
+            self.server = await asyncio.start_server(self.handleClient, host, port)
+
+
+    async def close(self):
+        """Stop listening and drop every connected client, ending their Tables.
+        """
+
+        if self.server is not None:
+            self.server.close()
+
+        for task in self.clientTasks:
+            task.cancel()
+        await asyncio.gather(*self.clientTasks, return_exceptions=True)
+
+        if self.server is not None:
+            await self.server.wait_closed()
+
+        self.executor.shutdown(wait=False)
+
+
+    def newTable(self, seats: Tuple[Seat, Seat]) -> Table:
+        tableId = self.nextTableId
+        self.nextTableId += 1
+
+        encoder = None
+        if self.encoderType is not None:
+            encoder = self.encoderType()
+            encoder.stream(os.path.join(self.recordDir, 'table-{:06d}'.format(tableId)), self.fileFormat,
+                           self.flushEvery)
+
+        game = Game(random.Random(matchSeed(self.seed, tableId)))
+        table = Table(tableId, seats, game, encoder)
+        self.tables[tableId] = table
+
+        return table
+
+
+    async def playTable(self, seats: Tuple[Seat, Seat]):
+        table = self.newTable(seats)
+        try:
+            await table.play()
+        finally:
+            if table.encoder is not None:
+                table.encoder.close()
+            del self.tables[table.id]
+
+
+    async def handleClient(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self.clientTasks.add(task)
+        task.add_done_callback(self.clientTasks.discard)
+
+        seat = ClientSeat(reader, writer)
+        seat.timeout = self.moveTimeout
+
+        try:
+            while True:
+                message = await seat.receive('join')
+                if message is None:
+                    break
+
+                opponent = message.get('opponent', 'greedy')
+
+                if opponent == 'client':
+                    await self.joinClientTable(seat)
+                elif opponent in self.policies:
+                    computer = ComputerSeat(self.policies[opponent], self.executor)
+                    seats = (seat, computer) if message.get('seat', 1) != 2 else (computer, seat)
+                    await self.playTable(seats)
+                else:
+                    seat.send({'type': 'error', 'message': 'Opponent must be client or one of {}'.format(
+                        ', '.join(sorted(self.policies)))})
+                    await seat.drain()
+        except asyncio.CancelledError:
+            pass  # Dropped by close(). Ending cancelled gets the handler logged as failed before Python 3.12
+        finally:
+            if self.waiting is not None and self.waiting[0] is seat:
+                self.waiting = None
+            await seat.close()
+
+
+    async def joinClientTable(self, seat: ClientSeat):
+        """Pair the client with the one waiting, or wait for the next one. The second client plays the Table.
+        """
+
+        if self.waiting is not None and self.waiting[0].connected:
+            other, done = self.waiting
+            self.waiting = None
+            try:
+                await self.playTable((other, seat))
+            finally:
+                done.set_result(None)
+            return
+
+        done = asyncio.get_running_loop().create_future()
+        self.waiting = (seat, done)
+        seat.send({'type': 'waiting'})
+        await seat.drain()
+
+        # Stop waiting if the client leaves before an opponent joins. The read task ends when it does
+        await asyncio.wait([done, seat.readTask], return_when=asyncio.FIRST_COMPLETED)
+
+        if self.waiting is not None and self.waiting[0] is seat:
+            self.waiting = None
+        else:
+            await done  # Paired, the opponent's handler plays the Table
+
+
+class GameClient:
+    """Client of a GameServer, for bots and scripted test clients.
+
+    Usage:
+        client = await GameClient.connect('127.0.0.1', 8765)
+        await client.join('greedy')
+        result = await client.play(lambda turn: turn['moves'][0])
+        await client.close()
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.messages: List[Message] = []  # Every message received, in order
+
+
+    @classmethod
+    async def connect(cls, host: str = '127.0.0.1', port: int = DEFAULT_PORT, path: Optional[str] = None) -> 'GameClient':
+        """Connect over TCP, or to a Unix socket if path is given.
+        """
+
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+
+        return cls(reader, writer)
+
+
+    async def send(self, message: Message):
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+
+
+    async def receive(self) -> Optional[Message]:
+        """The next message from the server. None if the server closed the connection.
+        """
+
+        line = await self.reader.readline()
+        if not line:
+            return None
+
+        message = json.loads(line)
+        self.messages.append(message)
+
+        return message
+
+
+    async def join(self, opponent: str = 'greedy', seat: int = 1):
+        await self.send({'type': 'join', 'opponent': opponent, 'seat': seat})
+
+
+    async def play(self, chooseMove: Callable[[Message], Optional[List[object]]]) -> Optional[Message]:
+        """Play a joined match. chooseMove gets each 'turn' message and returns a move like the entries of its
+        'moves', e.g. [[1, 3], 'left'], or None to not answer.
+
+        Returns:
+            Optional[Message]: The 'matchOver' message. None if the server closed the connection first.
+        """
+
+        while True:
+            message = await self.receive()
+            if message is None or message['type'] == 'matchOver':
+                return message
+
+            if message['type'] == 'turn':
+                move = chooseMove(message)
+                if move is not None:
+                    tile, side = move
+                    await self.send({'type': 'move', 'tile': tile, 'side': side, 'turn': message['turn']})
+
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def readMoveFromConsole(turn: Message) -> Optional[List[object]]:
+    """Print a 'turn' message and read a move like UserGameText.getValidMove(), e.g. '[1,3];left'.
+    None once the input ends.
+    """
+
+    print('Snake: {}'.format(' '.join('[{}, {}]'.format(*tile) for tile in turn['snake'])))
+    print('Hand: {}'.format(' '.join('[{}, {}]'.format(*tile) for tile in turn['hand'])))
+
+    while True:
+        try:
+            userMove = input('Select tile in hand to place and which side of the snake to place it on e.g. [1,3];left\n> ')
+        except EOFError:
+            return None
+
+        try:
+            tile, side = userMove.split(';')
+            pips = [int(pip) for pip in tile.strip().strip('[]').split(',')]
+        except ValueError:
+            print('Moves look like [1,3];left')
+            continue
+
+        for move in turn['moves']:
+            if sorted(move[0]) == sorted(pips) and move[1] == side.strip():
+                return move
+
+        print('Cannot add {} to the {}. Legal moves: {}'.format(tile, side, turn['moves']))
+
+
+async def playFromConsole(host: str, port: int, path: Optional[str], opponent: str):
+    client = await GameClient.connect(host, port, path)
+    await client.join(opponent)
+
+    loop = asyncio.get_running_loop()
+    while True:
+        message = await client.receive()
+        if message is None:
+            break
+
+        if message['type'] == 'turn':
+            move = await loop.run_in_executor(None, readMoveFromConsole, message)
+            if move is None:
+                break
+            await client.send({'type': 'move', 'tile': move[0], 'side': move[1], 'turn': message['turn']})
+        elif message['type'] in ('roundStart', 'played', 'drawn', 'passed', 'roundOver', 'timeout', 'error', 'waiting'):
+            print(message)
+        elif message['type'] == 'matchOver':
+            print('Player {} won the match {} to {}'.format(message['winner'], message['scores']['1'],
+                                                            message['scores']['2']))
+            break
+
+    await client.close()
+
+
+async def serve(args):
+    policies = dict(COMPUTERS)
+    if args.search_workers > 1:
+        policies['ismcts'] = partial(ISMCTSComputer, workers=args.search_workers)
+
+    server = GameServer(args.seed, args.timeout, args.record, args.encoding, args.format, args.flush_every,
+                        ThreadPoolExecutor(args.bot_workers), policies)
+    await server.start(args.host, args.port, args.unix)
+
+    print('Serving on {} (seed {})'.format(args.unix or '{}:{}'.format(args.host, args.port), server.seed))
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Host concurrent Dominoes tables for human and bot clients.')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to listen on or connect to.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP port to listen on or connect to.')
+    parser.add_argument('--unix', default=None, metavar='PATH', help='Use a Unix socket instead of TCP.')
+    parser.add_argument('--seed', type=int, default=None, help='Master seed of the Tables. Random if not given.')
+    parser.add_argument('--timeout', type=float, default=MOVE_TIMEOUT, help='Seconds a client has for each move.')
+    parser.add_argument('--record', default=None, metavar='DIR', help='Record every match to this directory.')
+    parser.add_argument('--encoding', choices=sorted(ENCODERS), default='strings', help='Encoder used to record.')
+    parser.add_argument('-f', '--format', choices=sorted(SINKS), default='csv', help='File format of the recorded tables.')
+    parser.add_argument('--flush-every', type=int, default=1000, help='Rows of a table buffered before writing.')
+    parser.add_argument('--bot-workers', type=int, default=None, help='Threads running Computer moves.')
+    parser.add_argument('--search-workers', type=int, default=1,
+                        help='Processes each ismcts move searches in. 1 searches in a bot thread.')
+    parser.add_argument('--play', default=None, metavar='OPPONENT',
+                        help='Connect to a server and play a match from the console against OPPONENT '
+                             '(a Computer policy or client).')
+    args = parser.parse_args(argv)
+
+    if (args.encoding == 'archive') != (args.format == 'bin'):
+        parser.error('--encoding archive is written with -f bin, and only it can be')
+
+    try:
+        if args.play is not None:
+            asyncio.run(playFromConsole(args.host, args.port, args.unix, args.play))
+        else:
+            asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,423 @@
+from .game import Game
+from .player import Player
+from .tile import Tile
+from .computer import Computer, HighestPipComputer, RandomComputer, HeuristicComputer
+from .encoder import Encoder
+from .ismcts import ISMCTSComputer
+from .sinks import SINKS
+from .tileTable import MAX_PIPS
+
+import argparse
+import hashlib
+import importlib
+import os
+import random
+import shutil
+import time
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# Anything that builds a Computer policy for a Player, e.g. the Computer class itself or a subclass
+ComputerFactory = Callable[[Player, Game], Computer]
+
+
+def matchSeed(masterSeed: int, matchId: int) -> int:
+    """Derive the seed of a single match from the master seed of a run. Depends only on the
+    two IDs, so any match can be replayed on its own no matter how the run was split up.
+
+    Args:
+        masterSeed (int): The seed of the whole run.
+        matchId (int): The ID of the match.
+
+    Returns:
+        int: A 64-bit seed for the match's random.Random.
+    """
+
+    digest = hashlib.sha256('{}:{}'.format(masterSeed, matchId).encode()).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+
+class SimulationResult(NamedTuple):
+    matchCount: int
+    roundCount: int
+    turnCount: int
+    elapsed: float
+
+    @property
+    def matchesPerSecond(self) -> float:
+        return self.matchCount / self.elapsed if self.elapsed > 0 else float('inf')
+
+
+class Simulator:
+    """Play matches of Game between Computer policies without any console I/O.
+    Optionally records every turn, round and match with an Encoder.
+    
+    Each match gets its own random.Random seeded by matchSeed(seed, matchId). If no seed is
+    given, a master seed is picked at random and kept in Simulator.seed so the run can be replayed.
+    """
+
+    def __init__(self, policy1: ComputerFactory = Computer, policy2: ComputerFactory = Computer,
+                 seed: Optional[int] = None, encoder: Optional[Encoder] = None, maxPip: int = 6,
+                 playerCount: int = 2, otherPolicies: Sequence[ComputerFactory] = ()):
+        """
+        Args:
+            policy1 (ComputerFactory, optional): The policy of Player 1. Defaults to Computer.
+            policy2 (ComputerFactory, optional): The policy of Player 2. Defaults to Computer.
+            seed (Optional[int], optional): The master seed. Picked at random if None.
+            encoder (Optional[Encoder], optional): Records the games if given. Defaults to None.
+            maxPip (int, optional): The largest pip of the double-N set, see tileTable.tileSet(). Defaults to 6.
+            playerCount (int, optional): The number of Players, 2 to 4. Defaults to 2.
+            otherPolicies (Sequence[ComputerFactory], optional): The policies of Players 3 and 4. Players
+                without one play Computer. Defaults to ().
+        """
+
+        assert encoder is None or (playerCount == 2 and maxPip in encoder.maxPips), \
+            '{} cannot record double-{} Games of {} Players'.format(type(encoder).__name__, maxPip, playerCount)
+
+        self.policy1 = policy1
+        self.policy2 = policy2
+        self.policies = ([policy1, policy2] + list(otherPolicies) + [Computer] * playerCount)[:playerCount]
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.encoder = encoder
+        self.maxPip = maxPip
+        self.playerCount = playerCount
+
+        self.roundCount = 0
+        self.turnCount = 0
+
+
+    def run(self, matchCount: int, firstMatchId: int = 0) -> SimulationResult:
+        """Play matchCount matches with consecutive IDs.
+
+        Args:
+            matchCount (int): The number of matches to play.
+            firstMatchId (int, optional): The ID of the first match. Defaults to 0.
+
+        Returns:
+            SimulationResult: Match, round and turn counts and the elapsed wall time.
+        """
+
+        self.roundCount = 0
+        self.turnCount = 0
+
+        start = time.perf_counter()
+        for matchId in range(firstMatchId, firstMatchId + matchCount):
+            self.playMatch(matchId)
+        elapsed = time.perf_counter() - start
+
+        return SimulationResult(matchCount, self.roundCount, self.turnCount, elapsed)
+
+
+    def playMatch(self, matchId: int) -> Game:
+        """Play rounds of a new Game until a Player reaches the Game's scoreToWin.
+
+        Args:
+            matchId (int): The ID recorded by the Encoder for this match.
+
+        Returns:
+            Game: The finished Game.
+        """
+
+        game = Game(random.Random(matchSeed(self.seed, matchId)), self.maxPip, self.playerCount)
+        roundId = 0
+
+        if self.encoder is not None:
+            self.encoder.startMatch(matchId)
+
+        while not game.checkMatchWin():
+            self.playRound(game, roundId)
+            roundId += 1
+
+        if self.encoder is not None:
+            self.encoder.recordMatchData(game, matchId)
+
+        return game
+
+
+    def playRound(self, game: Game, roundId: int, hands: Optional[Dict[str, Iterable[Tile]]] = None):
+        """Start and play a single round of the Game until a Player empties their hand or
+        the round is blocked, then score it.
+
+        Args:
+            game (Game): The Game to play a round of.
+            roundId (int): The ID recorded by the Encoder for this round.
+            hands (Optional[Dict[str, Iterable[Tile]]], optional): Hands to deal by Player ID, see
+                Game.startRound(). Defaults to None.
+        """
+
+        game.startRound(hands)
+
+        computers = [policy(player, game) for policy, player in zip(self.policies, game.players)]
+
+        turnId = 0
+
+        while not game.checkRoundWin():
+            player, computer = game.getCurrentPlayer(), computers[game.turn - 1]
+
+            if self.encoder is not None:
+                self.encoder.recordTurnStartData(game, turnId)
+
+            self.playTurn(game, player, computer)
+
+            if self.encoder is not None:
+                self.encoder.recordTurnEndData(game, turnId)
+
+            turnId += 1
+
+            if game.isTie():
+                break
+
+            game.skipTurn()
+
+        game.scoreRound()
+
+        if self.encoder is not None:
+            self.encoder.recordRoundData(game, roundId)
+
+        self.roundCount += 1
+        self.turnCount += turnId
+
+
+    def playTurn(self, game: Game, player: Player, computer: Computer):
+        """Draw if needed, then play the Tile chosen by the Computer or pass.
+
+        Args:
+            game (Game): The Game being played.
+            player (Player): The Player whose turn it is.
+            computer (Computer): The policy choosing the Player's move.
+        """
+
+        game.startTurn()
+
+        if game.mustDraw(player) and not game.deck.isDeckEmpty():
+            game.drawUntilValidTile(player)
+
+        if game.mustSkipTurn(player):
+            game.passTurn()
+            return
+
+        tile, side = computer.getMove()
+        game.playTile(player, tile, side)
+
+
+def _playShard(shard: Tuple[str, int, int, int, ComputerFactory, ComputerFactory, str, int, type, int]) -> SimulationResult:
+    """Worker for generate(). Play one shard of matches and stream its tables to the shard directory.
+    """
+
+    shardDir, seed, firstMatchId, matchCount, policy1, policy2, fileFormat, flushEvery, encoderType, maxPip = shard
+
+    encoder = encoderType()
+    encoder.stream(shardDir, fileFormat, flushEvery)
+
+    simulator = Simulator(policy1, policy2, seed, encoder, maxPip)
+    result = simulator.run(matchCount, firstMatchId)
+
+    encoder.close()
+
+    return result
+
+
+def mergeShards(shardDirs: List[str], outputDir: str, fileFormat: str = 'csv', tables: Tuple[str, ...] = Encoder.tables):
+    """Concatenate the tables of each shard, in order, into single files in outputDir.
+    CSVs keep only the header of the first shard and Parquet files keep each shard's row groups.
+
+    Args:
+        shardDirs (List[str]): The shard directories in match ID order.
+        outputDir (str): The directory to write the merged files to.
+        fileFormat (str, optional): 'csv', 'jsonl', 'parquet' or 'bin'. Defaults to 'csv'.
+        tables (Tuple[str, ...], optional): The tables written by the Encoder. Defaults to Encoder.tables.
+    """
+
+    extension = SINKS[fileFormat].extension
+
+    for table in tables:
+        fileName = '{}.{}'.format(table, extension)
+        outPath = os.path.join(outputDir, fileName)
+
+        if fileFormat == 'parquet':
+            import pyarrow.parquet as pq
+
+            writer = None
+            for shardDir in shardDirs:
+                shardFile = pq.ParquetFile(os.path.join(shardDir, fileName))
+                if writer is None:
+                    writer = pq.ParquetWriter(outPath, shardFile.schema_arrow, compression='zstd')
+                for i in range(shardFile.num_row_groups):
+                    writer.write_table(shardFile.read_row_group(i))
+            writer.close()
+            continue
+
+        with open(outPath, 'wb') as out:
+            for i, shardDir in enumerate(shardDirs):
+                with open(os.path.join(shardDir, fileName), 'rb') as f:
+                    if fileFormat == 'csv':
+                        header = f.readline()
+                        if i == 0:
+                            out.write(header)
+                    shutil.copyfileobj(f, out)
+
+
+def generate(matchCount: int, outputDir: str, seed: Optional[int] = None, workers: int = 1,
+             shardSize: int = 1000, policy1: ComputerFactory = Computer, policy2: ComputerFactory = Computer,
+             fileFormat: str = 'csv', flushEvery: int = 10000, encoderType: type = Encoder,
+             keepShards: bool = False, maxPip: int = 6) -> SimulationResult:
+    """Play and record matchCount matches across a pool of worker processes, then merge the
+    shards into match/round/turnStart/turnEnd files in outputDir.
+    
+    Matches are split into shards of shardSize matches regardless of the number of workers,
+    and every match is seeded by matchSeed(seed, matchId), so the merged output for a given
+    seed is byte-identical whatever the worker count.
+
+    Args:
+        matchCount (int): The number of matches to play.
+        outputDir (str): The directory to write the merged files to.
+        seed (Optional[int], optional): The master seed. Picked at random if None.
+        workers (int, optional): The number of worker processes. Defaults to 1 (no pool).
+        shardSize (int, optional): The number of matches per shard. Defaults to 1000.
+        policy1 (ComputerFactory, optional): The policy of Player 1. Defaults to Computer.
+        policy2 (ComputerFactory, optional): The policy of Player 2. Defaults to Computer.
+        fileFormat (str, optional): 'csv', 'jsonl', 'parquet' or 'bin'. Defaults to 'csv'.
+        flushEvery (int, optional): Rows of a table buffered by a worker before writing them. Defaults to 10000.
+        encoderType (type, optional): Encoder or CompactEncoder. Defaults to Encoder.
+        keepShards (bool, optional): Keep the shard directories after merging. Defaults to False.
+        maxPip (int, optional): The largest pip of the double-N set. Defaults to 6.
+
+    Returns:
+        SimulationResult: Totals of every shard and the elapsed wall time of the whole run.
+    """
+
+    if seed is None:
+        seed = random.randrange(2 ** 63)
+
+    shardRoot = os.path.join(outputDir, 'shards')
+    shards = []
+    for i, firstMatchId in enumerate(range(0, matchCount, shardSize)):
+        shardDir = os.path.join(shardRoot, 'shard-{:05d}'.format(i))
+        shards.append((shardDir, seed, firstMatchId, min(shardSize, matchCount - firstMatchId),
+                       policy1, policy2, fileFormat, flushEvery, encoderType, maxPip))
+
+    start = time.perf_counter()
+    if workers > 1:
+        with Pool(workers) as pool:
+            results = pool.map(_playShard, shards, chunksize=1)
+    else:
+        results = [_playShard(shard) for shard in shards]
+
+    mergeShards([shard[0] for shard in shards], outputDir, fileFormat, encoderType.tables)
+    elapsed = time.perf_counter() - start
+
+    if not keepShards:
+        shutil.rmtree(shardRoot, ignore_errors=True)
+
+    return SimulationResult(matchCount, sum(r.roundCount for r in results), sum(r.turnCount for r in results), elapsed)
+
+
+# --policy name => Computer policy
+COMPUTERS = {
+    'first': Computer,
+    'greedy': HighestPipComputer,
+    'random': RandomComputer,
+    'heuristic': HeuristicComputer,
+    'ismcts': ISMCTSComputer,
+}
+
+# --encoding name => module and name of the Encoder used to record the games. Encoders are only imported
+# by loadEncoder(), so a run that doesn't record games never loads pandas or numpy
+ENCODERS = {
+    'strings': ('encoder', 'Encoder'),
+    'compact': ('compact', 'CompactEncoder'),
+    'events': ('eventLog', 'EventLogEncoder'),
+    'archive': ('archive', 'ArchiveEncoder'),
+}
+
+
+def loadEncoder(encoding: str) -> type:
+    """Import and return the Encoder class of an --encoding name, e.g. 'compact' => CompactEncoder.
+    """
+
+    module, name = ENCODERS[encoding]
+    return getattr(importlib.import_module('.' + module, __package__), name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate Dominoes matches between Computer players.')
+    parser.add_argument('-n', '--matches', type=int, default=10, help='Number of matches to play.')
+    parser.add_argument('--seed', type=int, default=None, help='Master seed of the run. Random if not given.')
+    parser.add_argument('--policy1', choices=sorted(COMPUTERS), default='first', help='Computer policy of Player 1.')
+    parser.add_argument('--policy2', choices=sorted(COMPUTERS), default='first', help='Computer policy of Player 2.')
+    parser.add_argument('--policy3', choices=sorted(COMPUTERS), default='first', help='Computer policy of Player 3.')
+    parser.add_argument('--policy4', choices=sorted(COMPUTERS), default='first', help='Computer policy of Player 4.')
+    parser.add_argument('--players', type=int, choices=(2, 3, 4), default=2, help='Number of Players.')
+    parser.add_argument('--max-pip', type=int, choices=MAX_PIPS, default=6,
+                        help='Largest pip of the set: 6 (double-six), 9 (double-nine) or 12 (double-twelve).')
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help='Record the games and save match/round/turn tables to this directory.')
+    parser.add_argument('-f', '--format', choices=sorted(SINKS), default='csv', help='File format of the tables.')
+    parser.add_argument('--flush-every', type=int, default=10000,
+                        help='Rows of a table buffered before writing them to disk.')
+    parser.add_argument('--encoding', choices=sorted(ENCODERS), default='strings',
+                        help='Encoder used to record the games: Encoder (strings), CompactEncoder (Tile indices '
+                             'and masks), EventLogEncoder (deal + per-turn events) or ArchiveEncoder (fixed-size '
+                             'binary records, needs -f bin).')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of worker processes used with --output-dir. 0 uses every core.')
+    parser.add_argument('--shard-size', type=int, default=1000, help='Number of matches per worker shard.')
+    parser.add_argument('--replay', type=int, default=None, metavar='MATCH_ID',
+                        help='Replay a single match of the run given by --seed and print its result.')
+    parser.add_argument('--profile', action='store_true',
+                        help='Time the phases of each round and print a summary. Only counts this process, '
+                             'so it needs --workers 1.')
+    args = parser.parse_args(argv)
+
+    policyNames = [args.policy1, args.policy2, args.policy3, args.policy4][:args.players]
+    policy1, policy2, *otherPolicies = [COMPUTERS[name] for name in policyNames]
+    encoderType = loadEncoder(args.encoding) if args.output_dir is not None else None
+
+    if (args.encoding == 'archive') != (args.format == 'bin'):
+        parser.error('--encoding archive is written with -f bin, and only it can be')
+
+    if 'ismcts' in policyNames and (args.max_pip != 6 or args.players != 2):
+        parser.error('--policy ismcts only plays double-six Games of two Players')
+
+    if encoderType is not None and (args.players != 2 or args.max_pip not in encoderType.maxPips):
+        parser.error('--encoding {} cannot record double-{} Games of {} Players'.format(
+            args.encoding, args.max_pip, args.players))
+
+    if args.replay is not None:
+        if args.seed is None:
+            parser.error('--replay requires --seed')
+        simulator = Simulator(policy1, policy2, args.seed, None, args.max_pip, args.players, otherPolicies)
+        game = simulator.playMatch(args.replay)
+        print("Match {}: Player {} won {} in {} rounds".format(
+            args.replay, game.getMatchWinner().id, ' to '.join(str(score) for score in game.playerScores.values()),
+            game.roundCounter))
+        return
+
+    profiler = None
+    if args.profile:
+        if args.output_dir is not None and args.workers != 1:
+            parser.error('--profile needs --workers 1')
+
+        from .profiling import Profiler
+        profiler = Profiler()
+        profiler.enable()
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+        workers = args.workers if args.workers > 0 else os.cpu_count()
+        result = generate(args.matches, args.output_dir, args.seed, workers, args.shard_size, policy1, policy2,
+                          fileFormat=args.format, flushEvery=args.flush_every,
+                          encoderType=encoderType, maxPip=args.max_pip)
+    else:
+        result = Simulator(policy1, policy2, args.seed, None, args.max_pip, args.players, otherPolicies).run(args.matches)
+
+    print("{} matches, {} rounds, {} turns in {:.2f}s ({:.1f} matches/sec)".format(
+        result.matchCount, result.roundCount, result.turnCount, result.elapsed, result.matchesPerSecond))
+
+    if profiler is not None:
+        profiler.disable()
+        print(profiler.report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+from typing import TYPE_CHECKING, Dict, Tuple
+
+# numpy and pandas are imported where they are used, so choosing a format doesn't load them
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Column types used by the sinks. Tile strings are any encoded Tile, hand, deck or snake.
+# Masks are 28-bit Tile index masks and indices are hex strings of Tile indices (see compact.py)
+INT = 'int'
+BOOL = 'bool'
+TILES = 'tiles'
+MASK = 'mask'
+INDICES = 'indices'
+
+
+class TableSink:
+    """A file that a table is written to chunk by chunk, so only the current chunk has to be held
+    in memory. Subclasses implement write() for a single file format.
+    """
+
+    extension = ''
+
+    def __init__(self, path: str, columns: Tuple[str, ...], columnTypes: Dict[str, str]):
+        self.path = path
+        self.columns = columns
+        self.columnTypes = columnTypes
+        self.rowCount = 0
+
+
+    def write(self, df: 'pd.DataFrame'):
+        """Append a chunk of rows to the file.
+
+        Args:
+            df (pd.DataFrame): The rows to append, with this sink's columns.
+        """
+
+        raise NotImplementedError
+
+
+    def close(self):
+        pass
+
+
+class CSVSink(TableSink):
+    """Write rows to a CSV file with a single header row."""
+
+    extension = 'csv'
+
+    def __init__(self, path: str, columns: Tuple[str, ...], columnTypes: Dict[str, str]):
+        super().__init__(path, columns, columnTypes)
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+        self.file.write(','.join(columns) + '\n')
+
+
+    def write(self, df: 'pd.DataFrame'):
+        df.to_csv(self.file, header=False, index=False)
+        self.rowCount += len(df)
+
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLinesSink(TableSink):
+    """Write rows to a file with one JSON record per line."""
+
+    extension = 'jsonl'
+
+    def __init__(self, path: str, columns: Tuple[str, ...], columnTypes: Dict[str, str]):
+        super().__init__(path, columns, columnTypes)
+        self.file = open(path, 'w', encoding='utf-8', newline='')
+
+
+    def write(self, df: 'pd.DataFrame'):
+        if len(df) <= 0:
+            return
+
+        lines = df.to_json(orient='records', lines=True)
+        self.file.write(lines if lines.endswith('\n') else lines + '\n')
+        self.rowCount += len(df)
+
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink(TableSink):
+    """Write rows to a Parquet file, one row group per chunk. Integer columns are stored as int32,
+    booleans as bool and tile strings are dictionary encoded. Requires pyarrow.
+    """
+
+    extension = 'parquet'
+
+    def __init__(self, path: str, columns: Tuple[str, ...], columnTypes: Dict[str, str]):
+        super().__init__(path, columns, columnTypes)
+
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError('Writing Parquet requires pyarrow: pip install pyarrow') from e
+
+        arrowTypes = {
+            INT: pa.int32(),
+            BOOL: pa.bool_(),
+            TILES: pa.dictionary(pa.int32(), pa.string()),
+            MASK: pa.uint32(),
+            INDICES: pa.string(),
+        }
+
+        self.pa = pa
+        self.schema = pa.schema([(column, arrowTypes[columnTypes[column]]) for column in columns])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+
+    def write(self, df: 'pd.DataFrame'):
+        if len(df) <= 0:
+            return
+
+        table = self.pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+        self.rowCount += len(df)
+
+
+    def close(self):
+        self.writer.close()
+
+
+# numpy types of the column types a RecordSink can store. Any other column type must be a numpy dtype
+RECORD_TYPES = {
+    INT: 'i4',
+    BOOL: '?',
+    MASK: 'u4',
+}
+
+
+class RecordSink(TableSink):
+    """Write rows as fixed-size binary records with no header, so the file can be read back with
+    numpy.memmap(path, dtype) and any row found by its position. Column types are INT, BOOL, MASK or numpy
+    dtypes such as 'i2'. A column with a shaped dtype, e.g. ('u1', 28), holds bytes of that size.
+    """
+
+    extension = 'bin'
+
+    def __init__(self, path: str, columns: Tuple[str, ...], columnTypes: Dict[str, str]):
+        super().__init__(path, columns, columnTypes)
+
+        fields = []
+        for column in columns:
+            columnType = columnTypes[column]
+            if columnType in (TILES, INDICES):
+                raise ValueError('Column {} holds strings and cannot be written as fixed-size records. '
+                                 'Record with archive.ArchiveEncoder'.format(column))
+            fields.append((column, RECORD_TYPES.get(columnType, columnType)))
+
+        import numpy as np
+
+        self.dtype = np.dtype(fields)
+        self.file = open(path, 'wb')
+
+
+    def write(self, df: 'pd.DataFrame'):
+        import numpy as np
+
+        records = np.empty(len(df), dtype=self.dtype)
+
+        for column in self.columns:
+            field = self.dtype[column]
+            if field.shape:
+                records[column] = np.frombuffer(b''.join(df[column].values), dtype=field.base).reshape((-1,) + field.shape)
+            else:
+                records[column] = df[column].values
+
+        self.file.write(records.tobytes())
+        self.rowCount += len(df)
+
+
+    def close(self):
+        self.file.close()
+
+
+# File format name => TableSink used to write it
+SINKS = {
+    'csv': CSVSink,
+    'jsonl': JSONLinesSink,
+    'parquet': ParquetSink,
+    'bin': RecordSink,
+}
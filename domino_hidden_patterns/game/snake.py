@@ -1,15 +1,164 @@
-from typing import Dict
+from collections import deque
+from itertools import chain
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .tile import Tile
+from .deck import Deck
+from .enums.orientations import Orientation
+from .layout import BoardLayout
+from .tileTable import DOUBLE_SIX
+from .exceptions.gameExceptions import NoCompatibleTilesException
+
+class PlacedTile:
+    """A Tile on the Snake and the way it was placed. pip1 is the pip on the left and pip2 the pip on the right,
+    so they may be swapped relative to the Tile. The Tile itself is shared and never changes.
+    """
+    
+    __slots__ = ('tile', 'pip1', 'pip2', 'Orientation')
+    
+    def __init__(self, tile: Tile, orientation: Orientation = Orientation.LEFT):
+        """
+        Args:
+            tile (Tile): The Tile placed.
+            orientation (Orientation): LEFT if the Tile's pip1 is on the left, RIGHT if the Tile is flipped.
+        """
+        
+        self.tile = tile
+        self.Orientation = orientation
+        
+        if orientation is Orientation.LEFT:
+            self.pip1, self.pip2 = tile.pip1, tile.pip2
+        else:
+            self.pip1, self.pip2 = tile.pip2, tile.pip1
+    
+    
+    @property
+    def index(self) -> int:
+        return self.tile.index
+    
+    
+    @property
+    def orientedIndex(self) -> int:
+        """The index of the Tile, + the Tile count of its set if its larger pip is on the left (see
+        tileTable.ORIENTED_OFFSET and compact.orientedIndex()).
+        """
+        
+        return self.tile.index + self.tile.tileSet.orientedOffset if self.pip1 > self.pip2 else self.tile.index
+    
+    
+    def encode(self, key: int) -> str:
+        """Encode the Tile at a key of the snake like Encoder.encodeSnakeLayout(). E.g. '-1:4|3'
+        """
+        
+        return '{}:{}|{}'.format(key, self.pip1, self.pip2)
+    
+    
+    def __str__(self):
+        return '[{}, {}]'.format(self.pip1, self.pip2)
 
-from tile import Tile
-from deck import Deck
-from enums.orientations import Orientation
-from exceptions.gameExceptions import NoCompatibleTilesException
 
 class Snake:
+    """The line of played Tiles. Tiles are kept in a deque from left to right, and the keys and open 
+    pips of both ends are cached so that endpoint queries and placing a Tile are O(1).
+    
+    The snake dict view (key 0 is the start Tile, < 0 is left, > 0 is right) is built from the deque 
+    when it is first read after a change. So is layout, where each Tile is on the physical board: Tiles
+    played since it was last read are laid when it is read.
+    
+    The encodings read by the Encoders every turn, encodedLayout (Encoder.encodeSnakeLayout()) and encodedIndices
+    (hex oriented indices, see compact.indicesToHex()), are kept as one piece per Tile in a list for each side.
+    Like layout, the pieces of Tiles played since the last read are added when they are read, and the pieces
+    are joined once per read, so addTile() stays O(1). boardMask (mask of the Tiles on the snake, 28 bits for
+    double-six) is kept up to date by addTile().
+    """
     
     def __init__(self):
-        self.snake = {}  # A dictionary of where the pair with key 0 is the 'center', < 0 is left, > 0 is right
-
+        self.tiles: Deque[PlacedTile] = deque()
+        self.leftKey = 0  # Key of the leftmost Tile. The rightmost key is leftKey + len(tiles) - 1
+        self.leftPip = None  # Open pip of each end of the snake
+        self.rightPip = None
+        self.tileSet = DOUBLE_SIX  # Set of the Tiles played, taken from the start Tile
+        self.placements: List[Tuple[PlacedTile, Optional[Orientation]]] = []  # In play order, with the side played on
+        self.boardMask = 0
+        
+        self._snakeDict = {}
+        self._layout = BoardLayout()
+        self._resetEncodings()
+    
+    
+    def _resetEncodings(self):
+        # Pieces of the Tiles left of the start Tile, from the start outwards, and of the start Tile and the
+        # Tiles right of it, left to right
+        self._leftLayout: List[str] = []
+        self._rightLayout: List[str] = []
+        self._leftIndices: List[str] = []
+        self._rightIndices: List[str] = []
+        self._encodedPlacements = 0  # Number of placements with pieces
+        self._encodedLeftKey = 0  # Keys of the outermost Tiles with pieces
+        self._encodedRightKey = -1
+        self._encodedLayout = ''  # Joined pieces, None after a change
+        self._encodedIndices = ''
+    
+    
+    def _catchUpEncodings(self):
+        for i in range(self._encodedPlacements, len(self.placements)):
+            placed, side = self.placements[i]
+            if side is Orientation.LEFT:
+                self._encodedLeftKey -= 1
+                self._leftLayout.append(placed.encode(self._encodedLeftKey))
+                self._leftIndices.append('{:02x}'.format(placed.orientedIndex))
+            else:
+                self._encodedRightKey += 1
+                self._rightLayout.append(placed.encode(self._encodedRightKey))
+                self._rightIndices.append('{:02x}'.format(placed.orientedIndex))
+        
+        self._encodedPlacements = len(self.placements)
+    
+    
+    @property
+    def encodedLayout(self) -> str:
+        """Space-separated 'key:pip1|pip2' of every Tile from left to right, see Encoder.encodeSnakeLayout().
+        """
+        
+        if self._encodedLayout is None:
+            self._catchUpEncodings()
+            self._encodedLayout = ' '.join(chain(reversed(self._leftLayout), self._rightLayout))
+        
+        return self._encodedLayout
+    
+    
+    @property
+    def encodedIndices(self) -> str:
+        """Two hex digits per Tile from left to right, the oriented index of the Tile as placed.
+        """
+        
+        if self._encodedIndices is None:
+            self._catchUpEncodings()
+            self._encodedIndices = ''.join(chain(reversed(self._leftIndices), self._rightIndices))
+        
+        return self._encodedIndices
+    
+    
+    @property
+    def snake(self) -> Dict[int, PlacedTile]:
+        """A dictionary of where the pair with key 0 is the 'center', < 0 is left, > 0 is right.
+        """
+        
+        if self._snakeDict is None:
+            self._snakeDict = dict(enumerate(self.tiles, self.leftKey))
+        
+        return self._snakeDict
+    
+    
+    @property
+    def layout(self) -> BoardLayout:
+        """Where each Tile of the snake is on the board, see layout.BoardLayout.
+        """
+        
+        self._layout.catchUp(self.placements)
+        
+        return self._layout
+    
     
     def setStartPiece(self, deck: Deck):
         """Draw a random Tile from the Deck to play at index 0 at the start of a game.
@@ -18,7 +167,37 @@ class Snake:
             deck (Deck): The Deck to draw from.
         """
         
-        self.snake[0] = deck.drawRandomTile()
+        self.setStartTile(deck.drawRandomTile())
+    
+    
+    def setStartTile(self, tile: Tile):
+        """Clear the snake and play the given Tile at index 0, e.g. to rebuild a Snake from a GameState.
+
+        Args:
+            tile (Tile): The Tile to start the snake with.
+        """
+        
+        tile = PlacedTile(tile)
+        
+        self.tiles = deque([tile])
+        self.leftKey = 0
+        self.leftPip = tile.pip1
+        self.rightPip = tile.pip2
+        self.tileSet = tile.tile.tileSet
+        self.placements = [(tile, None)]
+        self.boardMask = 1 << tile.index
+        self._snakeDict = None
+        self._layout = BoardLayout()
+        self._resetEncodings()
+        self._encodedLayout = None
+        self._encodedIndices = None
+    
+    
+    def getStartTile(self) -> PlacedTile:
+        """Return the Tile at key 0, the first Tile played.
+        """
+        
+        return self.tiles[-self.leftKey]
     
     
     def getEndKey(self, side: Orientation) -> int:
@@ -34,31 +213,33 @@ class Snake:
         assert side in [Orientation.LEFT, Orientation.RIGHT], 'Side to get end tile must be LEFT or RIGHT'
         
         if side is Orientation.LEFT:
-            return min(iter(self.snake.keys()))
+            return self.leftKey
         elif side is Orientation.RIGHT:
-            return max(iter(self.snake.keys()))
+            return self.leftKey + len(self.tiles) - 1
         
     
-    def getEndTile(self, side: Orientation) -> Tile:
+    def getEndTile(self, side: Orientation) -> PlacedTile:
         """Return the leftmost or rightmost value in the snake dict.
 
         Args:
             side (Orientation): Which end of the snake to return its value (Tile).
 
         Returns:
-            Tile: The Tile contained within the leftmost or rightmost item in the snake dict.
+            PlacedTile: The Tile contained within the leftmost or rightmost item in the snake dict, as placed.
         """
         
         assert side in [Orientation.LEFT, Orientation.RIGHT], 'Side to get end tile must be LEFT or RIGHT'
         
         if side is Orientation.LEFT:
-            minKey = min(iter(self.snake.keys()), default=0)
-            return self.snake[minKey]
+            return self.tiles[0]
         elif side is Orientation.RIGHT:
-            maxKey = max(iter(self.snake.keys()), default=0)
-            return self.snake[maxKey]
+            return self.tiles[-1]
 
     
+    def __len__(self) -> int:
+        return len(self.tiles)
+    
+    
     def snakeContentDebug(self) -> str:
         """Print the content of the snake dict in a readable way.
         
@@ -67,7 +248,7 @@ class Snake:
         """
         
         items = []
-        for k, v in self.snake.items():
+        for k, v in enumerate(self.tiles, self.leftKey):
             items.append('{} : {}'.format(k, v))
         
         return items
@@ -79,7 +260,7 @@ class Snake:
         
         items = []
         
-        for _, v in self.snake.items():
+        for v in self.tiles:
             items.append('{}'.format(v))
         
         print(' '.join(items))
@@ -95,9 +276,7 @@ class Snake:
             bool: True if tile.pip1 or tile.pip2 == left endpoint pip1
         """
         
-        lhsPip = self.getEndTile(Orientation.LEFT).pip1
-        
-        return tile.pip1 == lhsPip or tile.pip2 == lhsPip
+        return tile.pip1 == self.leftPip or tile.pip2 == self.leftPip
     
     
     def canAddTileRight(self, tile: Tile) -> bool:
@@ -110,9 +289,7 @@ class Snake:
             bool: True if tile.pip1 or tile.pip2 == right endpoint pip2
         """
         
-        rhsPip = self.getEndTile(Orientation.RIGHT).pip2
-        
-        return tile.pip1 == rhsPip or tile.pip2 == rhsPip
+        return tile.pip1 == self.rightPip or tile.pip2 == self.rightPip
     
     
     def canAddTile(self, tile: Tile) -> bool:
@@ -128,19 +305,21 @@ class Snake:
         return self.canAddTileLeft(tile) or self.canAddTileRight(tile)
     
     
-    def addTile(self, tile: Tile, side: Orientation):
-        """Add a tile to the left or right side of the snake.
+    def addTile(self, tile: Tile, side: Orientation) -> PlacedTile:
+        """Add a tile to the left or right side of the snake, flipping it so that its matching pip faces the snake.
 
         Args:
             tile (Tile): The Tile instance to add to the snake.
             side (Orientation): The side of the snake to add to. Left or right.
+        
+        Returns:
+            PlacedTile: The Tile as placed on the snake. None if it could not be added.
         """
         
         assert side in [Orientation.LEFT, Orientation.RIGHT], 'Side to add Tile to must be LEFT or RIGHT'
         
-        lhsPip = self.getEndTile(Orientation.LEFT).pip1
-        rhsPip = self.getEndTile(Orientation.RIGHT).pip2
-        
+        lhsPip = self.leftPip
+        rhsPip = self.rightPip
         
         try:
             if not self.canAddTile(tile):
@@ -150,26 +329,34 @@ class Snake:
             return
         
         if side is Orientation.LEFT:
-            # Check which pip of new tile matches the pip1 of the leftmost tile and change new tile orientation accordingly
+            # Check which pip of new tile matches the pip1 of the leftmost tile and place the new tile accordingly
             if tile.pip1 == lhsPip:
-                tile.rotate(Orientation.RIGHT)
+                placed = PlacedTile(tile, Orientation.RIGHT)
             elif tile.pip2 == lhsPip:
-                tile.rotate(Orientation.LEFT)
+                placed = PlacedTile(tile, Orientation.LEFT)
             else:
                 print("Tile {} cannot match the leftmost tile's pips.".format(tile))
                 return
             
-            self.snake[self.getEndKey(Orientation.LEFT) - 1] = tile
+            self.tiles.appendleft(placed)
+            self.leftKey -= 1
+            self.leftPip = placed.pip1
         else:
             if tile.pip1 == rhsPip:
-                tile.rotate(Orientation.LEFT)
+                placed = PlacedTile(tile, Orientation.LEFT)
             elif tile.pip2 == rhsPip:
-                tile.rotate(Orientation.RIGHT)
+                placed = PlacedTile(tile, Orientation.RIGHT)
             else:
                 print("Tile {} cannot match the rightmost tile's pips.".format(tile))
                 return
                 
-            self.snake[self.getEndKey(Orientation.RIGHT) + 1] = tile
-
-        self.snake = dict(sorted(self.snake.items()))
+            self.tiles.append(placed)
+            self.rightPip = placed.pip2
 
+        self.placements.append((placed, side))
+        self.boardMask |= 1 << placed.index
+        self._snakeDict = None
+        self._encodedLayout = None
+        self._encodedIndices = None
+        
+        return placed
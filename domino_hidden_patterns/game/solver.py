@@ -0,0 +1,505 @@
+from .game import Game
+from .tile import TILES
+from .moves import Move
+from .enums.orientations import Orientation
+from .tileTable import TILE_PIPS, TILE_COUNT, PIP_MASKS
+
+import argparse
+import random
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+LEFT = 0
+RIGHT = 1
+
+# Pip total of a hand mask, looked up 14 bits at a time
+_HALF = 14
+_PIP_SUM = [pip1 + pip2 for pip1, pip2 in TILE_PIPS]
+
+
+def _pipTable(pipSums: List[int]) -> List[int]:
+    """Pip total of every mask of the given Tiles. Each Tile doubles the table, so it is quick to build at import.
+    """
+
+    table = [0]
+    for pips in pipSums:
+        table += [total + pips for total in table]
+
+    return table
+
+
+_LOW_PIPS = _pipTable(_PIP_SUM[:_HALF])
+_HIGH_PIPS = _pipTable(_PIP_SUM[_HALF:])
+
+# Move ordering: heaviest Tiles first, so a Player sheds points early
+ORDERED_TILES = sorted(range(TILE_COUNT), key=lambda i: -_PIP_SUM[i])
+
+# Transposition table bound flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Zobrist keys. Ends are keyed as an unordered pair, since the Snake is the same either way round.
+_zobristRng = random.Random(0x5eed)
+ZOBRIST_HAND = [None] + [[_zobristRng.getrandbits(64) for _ in range(TILE_COUNT)] for _ in range(2)]
+ZOBRIST_ENDS = [[_zobristRng.getrandbits(64) for _ in range(7)] for _ in range(7)]
+ZOBRIST_DRAWN = [_zobristRng.getrandbits(64) for _ in range(TILE_COUNT + 1)]
+ZOBRIST_TURN = _zobristRng.getrandbits(64)
+
+for _pip1 in range(7):
+    for _pip2 in range(_pip1):
+        ZOBRIST_ENDS[_pip1][_pip2] = ZOBRIST_ENDS[_pip2][_pip1]
+
+# Deeper than any round: every turn plays a Tile, except passes, and two passes in a row end the round
+MAX_DEPTH = 2 * TILE_COUNT + 2
+
+# Table depth of a Position whose whole subtree was searched to the end of the round, so its value holds at any depth
+COMPLETE_DEPTH = MAX_DEPTH + 1
+
+
+def handPips(mask: int) -> int:
+    return _LOW_PIPS[mask & ((1 << _HALF) - 1)] + _HIGH_PIPS[mask >> _HALF]
+
+
+class Position(NamedTuple):
+    """A round of Game with everything known: both hands, the open pips of the Snake and the order
+    the boneyard will be drawn in. Hands are masks of Tile indices (see tileTable).
+    """
+
+    player1Hand: int
+    player2Hand: int
+    leftPip: int
+    rightPip: int
+    boneyard: Tuple[int, ...]
+    turn: int
+
+
+def positionFromGame(game: Game) -> Position:
+    """Get the Position of a Game's current round. The boneyard order is the order Game would draw it in, found by
+    running a copy of the Game's RNG. It is only the real order if nothing else uses the Game's RNG before the
+    draws, e.g. a RandomComputer.
+
+    Args:
+        game (Game): A Game after startRound(), at the start of a turn.
+
+    Returns:
+        Position: The current Position.
+    """
+
+    assert game.isStandard(), 'The solver only supports double-six Games of two Players'
+
+    rng = random.Random()
+    rng.setstate(game.rng.getstate())
+
+    deck = list(game.deck.deck)
+    boneyard = tuple(deck.pop(rng.randint(0, len(deck) - 1)).index for _ in range(len(deck)))
+
+    return Position(game.player1.handMask, game.player2.handMask, game.snake.leftPip, game.snake.rightPip,
+                    boneyard, game.turn)
+
+
+def roundValue(player1Hand: int, player2Hand: int) -> int:
+    """Points of a finished round for Player 1: positive if Player 1 wins, negative if Player 2 wins.
+    Follows Game.getRoundWinner().
+    """
+
+    player1Pips = handPips(player1Hand)
+    player2Pips = handPips(player2Hand)
+
+    if player1Hand == 0:
+        return player2Pips
+    elif player2Hand == 0:
+        return -player1Pips
+    elif player1Pips < player2Pips:
+        return player2Pips
+    else:
+        return -player1Pips
+
+
+class SolveResult(NamedTuple):
+    """Result of Solver.solve(). value is in points for Player 1 with best play from both Players.
+    If a limit stopped the search, it is the value of the deepest search that finished and exact is False.
+    """
+
+    value: int
+    move: Optional[Move]
+    exact: bool
+    depth: int
+    nodes: int
+    elapsed: float
+
+
+class SearchLimitReached(Exception):
+    pass
+
+
+class Solver:
+    """Alpha-beta search of a Position with full information. Each turn, the Player draws while they
+    have no legal move, then either plays a Tile or passes when the boneyard is empty, like Simulator.playTurn().
+    Drawing is not a choice, so the only branches are which Tile to play on which side.
+
+    Uses iterative deepening, a transposition table keyed by a Zobrist hash of (hands, open ends,
+    boneyard Tiles drawn, turn) and move ordering (table move first, then heaviest Tile first).
+    Positions past the depth limit are scored by the pip difference of the hands.
+    """
+
+    def __init__(self, nodeLimit: Optional[int] = None, timeLimit: Optional[float] = None):
+        """
+        Args:
+            nodeLimit (Optional[int], optional): Stop after this many nodes. Defaults to None.
+            timeLimit (Optional[float], optional): Stop after this many seconds. Defaults to None.
+        """
+
+        self.nodeLimit = nodeLimit
+        self.timeLimit = timeLimit
+        self.table: Dict[int, Tuple[int, int, int, Optional[Tuple[int, int]]]] = {}
+
+        self.nodes = 0
+        self.deadline = None
+        self.hitHorizon = False
+
+
+    def solve(self, position: Position) -> SolveResult:
+        """Find the value of a Position and the best move of the Player to move.
+
+        Args:
+            position (Position): The Position to solve.
+
+        Returns:
+            SolveResult: The value for Player 1, the best move (None if the Player has to pass) and search stats.
+        """
+
+        start = time.perf_counter()
+        self.nodes = 0
+        self.deadline = start + self.timeLimit if self.timeLimit is not None else None
+        self.setPosition(position)
+
+        best = None
+        depth = 2
+        while depth <= MAX_DEPTH:
+            self.hitHorizon = False
+            try:
+                value = self.search(depth, -10 ** 6, 10 ** 6)
+            except SearchLimitReached:
+                break
+
+            best = (value, depth, not self.hitHorizon)
+            if not self.hitHorizon:
+                break
+            depth = min(depth + 2, MAX_DEPTH) if depth < MAX_DEPTH else MAX_DEPTH + 1
+
+        elapsed = time.perf_counter() - start
+        if best is None:
+            return SolveResult(0, None, False, 0, self.nodes, elapsed)
+
+        value, depth, exact = best
+        sign = 1 if position.turn == 1 else -1
+        return SolveResult(sign * value, self.rootMove(position), exact, depth, self.nodes, elapsed)
+
+
+    def setPosition(self, position: Position):
+        self.hands = [0, position.player1Hand, position.player2Hand]
+        self.left = position.leftPip
+        self.right = position.rightPip
+        self.boneyard = position.boneyard
+        self.drawn = 0
+        self.turn = position.turn
+
+        self.hash = ZOBRIST_ENDS[self.left][self.right] ^ ZOBRIST_DRAWN[0]
+        for player in (1, 2):
+            for tile in range(TILE_COUNT):
+                if self.hands[player] >> tile & 1:
+                    self.hash ^= ZOBRIST_HAND[player][tile]
+        if self.turn == 2:
+            self.hash ^= ZOBRIST_TURN
+
+
+    def rootMove(self, position: Position) -> Optional[Move]:
+        """The best move stored for the Position by the last search. Table keys are taken before any forced draws.
+        """
+
+        self.setPosition(position)
+
+        entry = self.table.get(self.hash)
+        if entry is None or entry[3] is None:
+            return None
+
+        tile, side = entry[3]
+        return Move(TILES[tile], Orientation.LEFT if side == LEFT else Orientation.RIGHT)
+
+
+    def drawForcedTiles(self, player: int) -> int:
+        """Draw from the boneyard while the Player has no legal move. Returns the number of Tiles drawn.
+        """
+
+        ends = PIP_MASKS[self.left] | PIP_MASKS[self.right]
+        count = 0
+
+        while not self.hands[player] & ends and self.drawn < len(self.boneyard):
+            tile = self.boneyard[self.drawn]
+            self.hands[player] |= 1 << tile
+            self.hash ^= ZOBRIST_HAND[player][tile] ^ ZOBRIST_DRAWN[self.drawn] ^ ZOBRIST_DRAWN[self.drawn + 1]
+            self.drawn += 1
+            count += 1
+
+        return count
+
+
+    def undrawTiles(self, player: int, count: int):
+        for _ in range(count):
+            self.drawn -= 1
+            tile = self.boneyard[self.drawn]
+            self.hands[player] &= ~(1 << tile)
+            self.hash ^= ZOBRIST_HAND[player][tile] ^ ZOBRIST_DRAWN[self.drawn] ^ ZOBRIST_DRAWN[self.drawn + 1]
+
+
+    def search(self, depth: int, alpha: int, beta: int) -> int:
+        """Negamax with alpha-beta. The value is in points for the Player to move. The Position is the same on return.
+        """
+
+        self.nodes += 1
+        if self.nodes & 1023 == 0:
+            if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+                raise SearchLimitReached
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchLimitReached
+
+        player = self.turn
+        opponent = 3 - player
+        sign = 1 if player == 1 else -1
+        key = self.hash
+
+        alphaStart = alpha
+        tableMove = None
+        entry = self.table.get(key)
+        if entry is not None:
+            entryDepth, flag, entryValue, tableMove = entry
+            if entryDepth >= depth:
+                if flag == LOWER:
+                    alpha = max(alpha, entryValue)
+                elif flag == UPPER:
+                    beta = min(beta, entryValue)
+
+                if flag == EXACT or alpha >= beta:
+                    if entryDepth < COMPLETE_DEPTH:
+                        self.hitHorizon = True
+                    return entryValue
+
+        # Track whether this subtree reaches the depth limit anywhere
+        outerHitHorizon = self.hitHorizon
+        self.hitHorizon = False
+
+        drawCount = self.drawForcedTiles(player)
+        hands = self.hands
+        hand = hands[player]
+        left = self.left
+        right = self.right
+        leftMask = PIP_MASKS[left]
+        rightMask = PIP_MASKS[right]
+        legal = hand & (leftMask | rightMask)
+
+        if not legal:
+            # The boneyard is empty. Pass, or the round is blocked if the opponent is stuck too
+            if not hands[opponent] & (leftMask | rightMask):
+                value = sign * roundValue(hands[1], hands[2])
+            elif depth <= 1:
+                self.hitHorizon = True
+                value = sign * (handPips(hands[2]) - handPips(hands[1]))
+            else:
+                self.turn = opponent
+                self.hash ^= ZOBRIST_TURN
+                value = -self.search(depth - 1, -beta, -alpha)
+                self.turn = player
+                self.hash ^= ZOBRIST_TURN
+
+            self.undrawTiles(player, drawCount)
+            self.storeEntry(key, depth, value, alphaStart, beta, None, outerHitHorizon)
+            return value
+
+        moves = []
+        # The ends are hashed as an unordered pair, so the table move may be for the Snake the other way round
+        if tableMove is not None and 1 << tableMove[0] & (leftMask if tableMove[1] == LEFT else rightMask) & hand:
+            moves.append(tableMove)
+        else:
+            tableMove = None
+        for tile in ORDERED_TILES:
+            if legal >> tile & 1:
+                bit = 1 << tile
+                if bit & leftMask:
+                    moves.append((tile, LEFT))
+                if bit & rightMask and (left != right or not bit & leftMask):
+                    moves.append((tile, RIGHT))
+
+        bestValue = -10 ** 6
+        bestMove = None
+        ends = ZOBRIST_ENDS[left][right]
+
+        for move in moves:
+            if move == tableMove and bestMove is not None:
+                continue
+
+            tile, side = move
+            pip1, pip2 = TILE_PIPS[tile]
+            if side == LEFT:
+                newLeft, newRight = (pip2 if pip1 == left else pip1), right
+            else:
+                newLeft, newRight = left, (pip2 if pip1 == right else pip1)
+
+            newHand = hand & ~(1 << tile)
+
+            if newHand == 0:
+                value = handPips(hands[opponent])
+            elif depth <= 1:
+                self.hitHorizon = True
+                value = handPips(hands[opponent]) - handPips(newHand)
+            else:
+                hands[player] = newHand
+                self.left, self.right = newLeft, newRight
+                self.turn = opponent
+                self.hash ^= ZOBRIST_HAND[player][tile] ^ ends ^ ZOBRIST_ENDS[newLeft][newRight] ^ ZOBRIST_TURN
+
+                value = -self.search(depth - 1, -beta, -alpha)
+
+                hands[player] = hand
+                self.left, self.right = left, right
+                self.turn = player
+                self.hash ^= ZOBRIST_HAND[player][tile] ^ ends ^ ZOBRIST_ENDS[newLeft][newRight] ^ ZOBRIST_TURN
+
+            if value > bestValue:
+                bestValue = value
+                bestMove = move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        self.undrawTiles(player, drawCount)
+        self.storeEntry(key, depth, bestValue, alphaStart, beta, bestMove, outerHitHorizon)
+        return bestValue
+
+
+    def storeEntry(self, key: int, depth: int, value: int, alpha: int, beta: int, move: Optional[Tuple[int, int]],
+                   outerHitHorizon: bool):
+        """Store a searched Position and restore the depth limit flag of its parent.
+        """
+
+        if not self.hitHorizon:
+            depth = COMPLETE_DEPTH
+        self.hitHorizon = self.hitHorizon or outerHitHorizon
+
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+
+        self.table[key] = (depth, flag, value, move)
+
+
+def countMoveSequences(position: Position, table: Optional[Dict[int, int]] = None) -> int:
+    """Count the distinct ways a round can be played out from a Position: every sequence of moves
+    and passes until a Player empties their hand or the round is blocked. Counts of repeated Positions
+    are cached, so this runs in time proportional to the number of distinct Positions.
+
+    Args:
+        position (Position): The Position to count from.
+        table (Optional[Dict[int, int]], optional): Cache of counts by Zobrist hash. Defaults to a new one.
+
+    Returns:
+        int: The number of move sequences.
+    """
+
+    solver = Solver()
+    solver.setPosition(position)
+    table = table if table is not None else {}
+
+    def count() -> int:
+        key = solver.hash
+        if key in table:
+            return table[key]
+
+        player = solver.turn
+        opponent = 3 - player
+        hands = solver.hands
+        drawCount = solver.drawForcedTiles(player)
+        hand = hands[player]
+        left, right = solver.left, solver.right
+        leftMask, rightMask = PIP_MASKS[left], PIP_MASKS[right]
+        legal = hand & (leftMask | rightMask)
+        total = 0
+
+        if not legal:
+            if hands[opponent] & (leftMask | rightMask):
+                solver.turn = opponent
+                solver.hash ^= ZOBRIST_TURN
+                total = count()
+                solver.turn = player
+                solver.hash ^= ZOBRIST_TURN
+            else:
+                total = 1
+        else:
+            for tile in range(TILE_COUNT):
+                if not legal >> tile & 1:
+                    continue
+
+                pip1, pip2 = TILE_PIPS[tile]
+                bit = 1 << tile
+                sides = []
+                if bit & leftMask:
+                    sides.append((pip2 if pip1 == left else pip1, right))
+                if bit & rightMask and (left != right or not bit & leftMask):
+                    sides.append((left, pip2 if pip1 == right else pip1))
+
+                for newLeft, newRight in sides:
+                    if hand == bit:
+                        total += 1
+                        continue
+
+                    change = ZOBRIST_HAND[player][tile] ^ ZOBRIST_ENDS[left][right] ^ ZOBRIST_ENDS[newLeft][newRight] ^ ZOBRIST_TURN
+                    hands[player] = hand & ~bit
+                    solver.left, solver.right, solver.turn = newLeft, newRight, opponent
+                    solver.hash ^= change
+
+                    total += count()
+
+                    hands[player] = hand
+                    solver.left, solver.right, solver.turn = left, right, player
+                    solver.hash ^= change
+
+        solver.undrawTiles(player, drawCount)
+        table[key] = total
+        return total
+
+    return count()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve dealt rounds of Dominoes with full information.')
+    parser.add_argument('-n', '--rounds', type=int, default=10, help='Number of deals to solve.')
+    parser.add_argument('--seed', type=int, default=0, help='Master seed. Deal i is the first round of match i.')
+    parser.add_argument('--node-limit', type=int, default=None, help='Stop each search after this many nodes.')
+    parser.add_argument('--time-limit', type=float, default=None, help='Stop each search after this many seconds.')
+    parser.add_argument('--count', action='store_true', help='Also count the move sequences of each deal.')
+    args = parser.parse_args(argv)
+
+    from .simulator import matchSeed
+
+    for matchId in range(args.rounds):
+        game = Game(random.Random(matchSeed(args.seed, matchId)))
+        game.startRound()
+        position = positionFromGame(game)
+
+        result = Solver(args.node_limit, args.time_limit).solve(position)
+        line = 'Deal {}: value {:+d} for Player 1 ({}), best move {} {}, {} nodes in {:.2f}s'.format(
+            matchId, result.value, 'exact' if result.exact else 'depth {}'.format(result.depth),
+            result.move.tile if result.move else None, result.move.side.name if result.move else '',
+            result.nodes, result.elapsed)
+
+        if args.count:
+            line += ', {:,} move sequences'.format(countMoveSequences(position))
+
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
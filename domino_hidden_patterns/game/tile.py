@@ -1,54 +1,85 @@
-from enums.orientations import Orientation
+from .tileTable import DOUBLE_SIX, TileSet, tileSet
+
+from typing import Dict, Tuple
 
 class Tile:
-    
-    def __init__(self, pip1: int, pip2: int):
-        self.pip1 = pip1    
-        self.pip2 = pip2
-        
-        # self.Orientation: Orientation
-        # self.Orientation = None
-        
-        self.Orientation = Orientation.LEFT
-    
-    
-    def rotate(self, targetOrientation: Orientation):
-        """'Rotate' this Tile by swapping the values of pip1 and pip2 and the orientation.
+    """An immutable Domino Tile. There is a single shared instance of each Tile of a set (see tilesOf(), and
+    TILES for double-six), with pip1 <= pip2: Tile(5, 3) returns the same object as Tile(3, 5). Tiles are equal
+    only if they are the same instance, so Tiles of different sets never compare equal, and they hash by their
+    fixed index in their set. The orientation of a played Tile is held by the Snake (see snake.PlacedTile).
+    """
 
-        Args:
-            targetOrientation (Orientation): LEFT or RIGHT. Orientation is determined by the position
-            of pip1. E.g. Orientation.LEFT means pip1 is on the LEFT.
+    __slots__ = ('pip1', 'pip2', 'index', 'tileSet')
+
+    def __new__(cls, pip1: int, pip2: int, tileSet: TileSet = DOUBLE_SIX):
+        return tilesOf(tileSet)[tileSet.index[(pip1, pip2)]]
+
+
+    @classmethod
+    def _create(cls, tileSet: TileSet, index: int) -> 'Tile':
+        """Build the canonical instance of the Tile of a set with the given index. Only used by tilesOf().
         """
-        
-        if self.Orientation == targetOrientation:
-            # print("Cannot rotate Tile. Tile's orientation is already {}".format(targetOrientation.__str__()))
-            return
-        
-        pip1 = self.pip1
-        pip2 = self.pip2
-        self.pip1 = pip2
-        self.pip2 = pip1
-        
-        # self.Orientation = Orientation.LEFT if self.Orientation is not Orientation.LEFT else Orientation.RIGHT
-        
-        if self.Orientation == Orientation.LEFT:
-            self.Orientation = Orientation.RIGHT
-        elif self.Orientation == Orientation.RIGHT:
-            self.Orientation = Orientation.LEFT
-
-    
+
+        tile = object.__new__(cls)
+        object.__setattr__(tile, 'pip1', tileSet.pips[index][0])
+        object.__setattr__(tile, 'pip2', tileSet.pips[index][1])
+        object.__setattr__(tile, 'index', index)
+        object.__setattr__(tile, 'tileSet', tileSet)
+
+        return tile
+
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError('Tile is immutable')
+
+
+    def __reduce__(self) -> Tuple:
+        # Copies and unpickled Tiles resolve to the canonical instance
+        return (_canonicalTile, (self.tileSet.maxPip, self.index))
+
+
     def __str__(self):
         return '[{}, {}]'.format(self.pip1, self.pip2)
-    
-    
+
+
     def __eq__(self, __value: object) -> bool:
-        """Equality operator overload for Tile comparison. Checks the values of pip1 and pip2.
+        """Equality operator overload for Tile comparison. Every Tile is the canonical instance of its set, so Tiles
+        are equal if they are the same object: the same pips, in either order, of the same set.
 
         Args:
             __value (object): The other Tile to compare.
 
         Returns:
-            bool: Returns True if pip1 == pother.pip1 and pip2 == other.pip2 or pip1 == other.pip2 and pip2 == other.pip1
+            bool: Returns True if both are the same Tile of the same set.
         """
-        return self.pip1 == __value.pip1 and self.pip2 == __value.pip2 or self.pip1 == __value.pip2 and self.pip2 == __value.pip1
-    
+
+        if not isinstance(__value, Tile):
+            return NotImplemented
+
+        return self is __value
+
+
+    def __hash__(self) -> int:
+        return self.index
+
+
+_TILES: Dict[int, Tuple[Tile, ...]] = {}
+
+
+def tilesOf(tileSet: TileSet) -> Tuple[Tile, ...]:
+    """Get the canonical Tiles of a set in index order: tilesOf(tileSet)[i] has the pips tileSet.pips[i].
+    """
+
+    tiles = _TILES.get(tileSet.maxPip)
+    if tiles is None:
+        tiles = _TILES[tileSet.maxPip] = tuple(Tile._create(tileSet, index) for index in range(tileSet.count))
+
+    return tiles
+
+
+def _canonicalTile(maxPip: int, index: int) -> Tile:
+    return tilesOf(tileSet(maxPip))[index]
+
+
+# The canonical double-six Tiles, in index order. TILES[i] has the pips TILE_PIPS[i]
+TILES: Tuple[Tile, ...] = tilesOf(DOUBLE_SIX)
@@ -0,0 +1,70 @@
+from itertools import combinations_with_replacement
+from typing import Dict, NamedTuple, Tuple
+
+# Largest pip of each supported set: double-six (28 Tiles), double-nine (55) and double-twelve (91)
+MAX_PIPS = (6, 9, 12)
+
+
+class TileSet(NamedTuple):
+    """The fixed indices of the Tiles of a double-N set. Tiles are numbered in the order Deck.generateDeck()
+    creates them, e.g. for double-six 0 => (0, 0), 1 => (0, 1), 6 => (0, 6), 7 => (1, 1), 27 => (6, 6).
+    Hands, the deck and the Snake are masks of these indices, so every set is a bitmask of at most 91 bits.
+    """
+
+    maxPip: int
+    pips: Tuple[Tuple[int, int], ...]  # pips[i] are the (pip1, pip2) of Tile i, pip1 <= pip2
+    count: int
+    index: Dict[Tuple[int, int], int]  # (pip1, pip2) in either order => Tile index
+    pipMasks: Tuple[int, ...]  # Mask of every Tile containing a given pip value
+    orientedOffset: int  # See ORIENTED_OFFSET
+
+
+_TILE_SETS: Dict[int, TileSet] = {}
+
+
+def tileSet(maxPip: int = 6) -> TileSet:
+    """Get the shared TileSet of the double-N set with the given largest pip, e.g. tileSet(9) for double-nine.
+
+    Raises:
+        ValueError: If maxPip is not one of MAX_PIPS.
+    """
+
+    if maxPip not in _TILE_SETS:
+        if maxPip not in MAX_PIPS:
+            raise ValueError('No double-{} set, the largest pip must be one of {}'.format(maxPip, MAX_PIPS))
+
+        pips = tuple(combinations_with_replacement(range(0, maxPip + 1), 2))
+
+        index = {}
+        for i, (pip1, pip2) in enumerate(pips):
+            index[(pip1, pip2)] = i
+            index[(pip2, pip1)] = i
+
+        pipMasks = tuple(sum(1 << i for i, tilePips in enumerate(pips) if pip in tilePips) for pip in range(0, maxPip + 1))
+        _TILE_SETS[maxPip] = TileSet(maxPip, pips, len(pips), index, pipMasks, len(pips))
+
+    return _TILE_SETS[maxPip]
+
+
+DOUBLE_SIX = tileSet(6)
+
+# Every Tile of a double-six set has a fixed index 0-27, in the same order Deck.generateDeck() creates them.
+# E.g. 0 => (0, 0), 1 => (0, 1), 6 => (0, 6), 7 => (1, 1), 27 => (6, 6)
+TILE_PIPS: Tuple[Tuple[int, int], ...] = DOUBLE_SIX.pips
+TILE_COUNT = DOUBLE_SIX.count
+
+TILE_INDEX = DOUBLE_SIX.index
+
+# Oriented indices describe a placed Tile: the Tile index if pip1 <= pip2, else the Tile index + 28.
+# Doubles are always < 28. Other sets offset by their own Tile count, e.g. 55 for double-nine.
+ORIENTED_OFFSET = DOUBLE_SIX.orientedOffset
+
+# Mask of every Tile containing a given pip value, e.g. PIP_MASKS[6] has the 7 sixes set
+PIP_MASKS = DOUBLE_SIX.pipMasks
+
+
+def tileIndex(pip1: int, pip2: int) -> int:
+    """Get the fixed index of the Tile with the given pips, in either order.
+    """
+
+    return TILE_INDEX[(pip1, pip2)]
@@ -1,11 +1,11 @@
-from game import Game
-from player import Player
-from deck import Deck
-from snake import Snake
-from tile import Tile
-from enums.orientations import Orientation
-from encoder import Encoder
-from computer import Computer
+from .game import Game
+from .player import Player
+from .deck import Deck
+from .snake import Snake
+from .tile import Tile
+from .enums.orientations import Orientation
+from .computer import Computer
+from .moves import legalMoves
 
 from typing import Tuple
 
@@ -32,10 +32,10 @@ class UserGameText:
         print("--------------------\n")
     
     
-    def getValidMove(self) -> Tuple[Tile, Orientation]:
-        validMove = False
+    def getValidMove(self, player: Player) -> Tuple[Tile, Orientation]:
+        moves = legalMoves(player.hand, self.game.snake)
         
-        while not validMove:
+        while True:
             userMove = input("Select tile in hand to place and which side of the snake to place it on e.g. [1,3];left\n> ")
             userMove = userMove.split(';')
             userMove = (int(userMove[0][1]), int(userMove[0][3]), userMove[1])
@@ -44,23 +44,14 @@ class UserGameText:
             # print(userMove)
             userTile = Tile(userMove[0], userMove[1])
             
-            if not self.game.snake.canAddTile(userTile):
-                print("Cannot add [{}, {}] to either endpoint".format(userMove[0], userMove[1]))
+            for move in moves:
+                if move.tile == userTile and move.side is side:
+                    return move
             
-            if side is Orientation.LEFT:
-                if self.game.snake.canAddTileLeft(userTile):
-                    validMove = True
-                else:
-                    print("Cannot add [{}, {}] to endpoint {}".format(userMove[0], userMove[1], side.__str__()))      
-                    continue
-            elif side is Orientation.RIGHT:
-                if self.game.snake.canAddTileRight(userTile):
-                    validMove = True
-                else:
-                    print("Cannot add [{}, {}] to endpoint {}".format(userMove[0], userMove[1], side.__str__()))
-                    continue
-        
-        return (userTile, side)
+            if not any(move.tile == userTile for move in moves):
+                print("Cannot add [{}, {}] to either endpoint".format(userMove[0], userMove[1]))
+            else:
+                print("Cannot add [{}, {}] to endpoint {}".format(userMove[0], userMove[1], side.__str__()))
     
     
     def inputTurn(self, player: Player):
@@ -75,21 +66,11 @@ class UserGameText:
                 self.game.drawUntilValidTile(player)
         
         
-        validMove = self.getValidMove()
+        validMove = self.getValidMove(player)
         userTile, side = validMove
         
         self.game.playTile(player, userTile, side)
         # print("Successfully added [{}, {}] to the {}".format(userTile.pip1, userTile.pip2, side))
-        
-        # Win check
-        if self.game.checkRoundWin():
-            roundWinner = self.game.getRoundWinner()
-            roundWinner.player.points += roundWinner.pointsToGain
-            print("This round won by Player {}. Gained {} points.".format(
-                roundWinner.player.id, roundWinner.pointsToGain))
-            if self.game.checkMatchWin():
-                matchWinner = self.game.getMatchWinner()
-                print("This match has been won by Player {} with {} points!".format(matchWinner.id, matchWinner.points))
     
     
     def inputTurnComp(self, player: Player, computer: Computer):
@@ -103,34 +84,39 @@ class UserGameText:
         
         
         
-        # validMove = self.getValidMove()
-        userTile, side = computer.getFirstPlayableTile()
+        # validMove = self.getValidMove(player)
+        userTile, side = computer.getMove()
         
         self.game.playTile(player, userTile, side)
         # print("Successfully added [{}, {}] to the {}".format(userTile.pip1, userTile.pip2, side))
+    
+    
+    def finishRound(self):
+        """Score the round once it is won or blocked and print the result. Called once per round, after the
+        turn loop, like Simulator.playRound().
+        """
         
-        # Win check
-        if self.game.checkRoundWin():
-            roundWinner = self.game.getRoundWinner()
-            roundWinner.player.points += roundWinner.pointsToGain
-            print("This round won by Player {}. Gained {} points.".format(
-                roundWinner.player.id, roundWinner.pointsToGain))
-            if self.game.checkMatchWin():
-                matchWinner = self.game.getMatchWinner()
-                print("This match has been won by Player {} with {} points!".format(matchWinner.id, matchWinner.points))
+        if not self.game.checkRoundWin():
+            print("Neither player can draw or place any tiles therefore this round is a tie.")
+        
+        roundWinner = self.game.scoreRound()
+        print("This round won by Player {}. Gained {} points.".format(
+            roundWinner.player.id, roundWinner.pointsToGain))
+        if self.game.checkMatchWin():
+            matchWinner = self.game.getMatchWinner()
+            print("This match has been won by Player {} with {} points!".format(matchWinner.id, matchWinner.points))
         
         
         
 
 
 
-encoder = Encoder()
+def main():
+    """Development text view of a single Computer vs Computer match. Use the simulator to generate data.
+    """
     
-for i in range(10):
     ug = UserGameText()
     
-    roundCounter = 0
-    
     while not ug.game.checkMatchWin():
         ug.game.startRound()
         ug.printRoundInfo()
@@ -138,31 +124,19 @@ for i in range(10):
         computer1 = Computer(ug.game.player1, ug.game)
         computer2 = Computer(ug.game.player2, ug.game)
         
-        turnCounter = 0
-        
         while not ug.game.checkRoundWin():
             if ug.game.turn == 1:
-                encoder.recordTurnStartData(ug.game, turnCounter)
                 ug.printTurn(ug.game.player1)
                 ug.inputTurnComp(ug.game.player1, computer1)
-                encoder.recordTurnEndData(ug.game, turnCounter)
             else:
-                encoder.recordTurnStartData(ug.game, turnCounter)
                 ug.printTurn(ug.game.player2)
                 ug.inputTurnComp(ug.game.player2, computer2)
-                encoder.recordTurnEndData(ug.game, turnCounter)
             if ug.game.isTie():
-                print("Neither player can draw or place any tiles therefore this round is a tie.")
                 break
             ug.game.skipTurn()
-            turnCounter += 1
-            
-        encoder.recordRoundData(ug.game, roundCounter)
-        roundCounter += 1
         
-    encoder.recordMatchData(ug.game, i)
+        ug.finishRound()
+
 
-encoder.saveDfToCSV(encoder.matchDf, 'match.csv')
-encoder.saveDfToCSV(encoder.roundDf, 'round.csv')
-encoder.saveDfToCSV(encoder.turnStartDf, 'turnStart.csv')
-encoder.saveDfToCSV(encoder.turnEndDf, 'turnEnd.csv')
\ No newline at end of file
+if __name__ == '__main__':
+    main()
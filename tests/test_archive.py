@@ -0,0 +1,129 @@
+import os
+import shutil
+
+import pytest
+
+from domino_hidden_patterns.game.archive import TURN_DTYPE, Archive, ArchiveEncoder, snakeIndices
+from domino_hidden_patterns.game.compact import CompactEncoder, hexToIndices
+from domino_hidden_patterns.game.eventLog import NO_TILE, SIDE_LEFT
+from domino_hidden_patterns.game.simulator import Simulator, generate, loadEncoder
+
+SEED = 13
+MATCH_COUNT = 4
+
+
+@pytest.fixture(scope='module')
+def archive(tmp_path_factory) -> Archive:
+    directory = tmp_path_factory.mktemp('archive')
+    generate(MATCH_COUNT, str(directory), seed=SEED, shardSize=3, encoderType=loadEncoder('archive'), fileFormat='bin')
+    return Archive(str(directory))
+
+
+@pytest.fixture(scope='module')
+def compact() -> CompactEncoder:
+    encoder = CompactEncoder()
+    Simulator(seed=SEED, encoder=encoder).run(MATCH_COUNT)
+    return encoder
+
+
+def testMatchesEqualCompactTables(archive, compact):
+    matches = compact.matchDf
+
+    assert len(archive.matches) == len(matches) == MATCH_COUNT
+    for record, row in zip(archive.matches, matches.itertuples(index=False)):
+        for column in matches.columns:
+            assert record[column] == getattr(row, column), column
+
+
+def testRoundsEqualCompactTables(archive, compact):
+    rounds = compact.roundDf
+    turnEnds = compact.turnEndDf
+    # turnId restarts at 0 with every round
+    turnCounts = (turnEnds['turnId'] == 0).cumsum().value_counts(sort=False).sort_index().tolist()
+
+    assert len(archive.rounds) == len(rounds)
+    for record, row, turnCount in zip(archive.rounds, rounds.itertuples(index=False), turnCounts):
+        assert record['roundId'] == row.roundId
+        assert record['initialTurn'] == row.initialTurn
+        assert record['player1Points'] == row.player1Points
+        assert record['player2Points'] == row.player2Points
+        assert record['initialTile'] == row.initialTileIndex
+        assert record['winner'] == row.winner
+        assert record['snakeLeftKey'] == row.snakeLeftKey
+        assert snakeIndices(record) == hexToIndices(row.snakeIndices)
+        assert record['turnCount'] == turnCount
+
+
+def testTurnsEqualCompactTables(archive, compact):
+    starts = compact.turnStartDf
+    ends = compact.turnEndDf
+
+    assert len(archive.turns) == len(ends)
+    for record, start, end in zip(archive.turns, starts.itertuples(index=False), ends.itertuples(index=False)):
+        for column in ('turnId', 'playerTurn', 'deckMask', 'player1Mask', 'player2Mask', 'boardMask', 'snakeLeftKey',
+                       'tilesDrawnCount', 'passedTurn'):
+            assert record[column] == getattr(end, column), column
+        assert record['startDeckMask'] == start.deckMask
+        assert record['startPlayer1Mask'] == start.player1Mask
+        assert record['startPlayer2Mask'] == start.player2Mask
+
+        snake = hexToIndices(end.snakeIndices)
+        assert snakeIndices(record) == snake
+        if record['tilePlayed'] != NO_TILE:
+            assert record['tilePlayed'] == (snake[0] if record['side'] == SIDE_LEFT else snake[-1])
+
+
+def testLookupsFollowTheOffsetIndex(archive):
+    position = 0
+
+    for match in archive.matches:
+        matchId = int(match['matchId'])
+        rounds = archive.roundsOf(matchId)
+        assert len(rounds) == match['roundCount']
+        assert archive.match(matchId) == match
+
+        for roundId, record in enumerate(rounds):
+            assert archive.round(matchId, roundId) == record
+            turns = archive.turnsOf(matchId, roundId)
+            assert len(turns) == record['turnCount']
+
+            for turnId, turn in enumerate(turns):
+                assert turn == archive.turns[position]
+                assert archive.turn(matchId, roundId, turnId) == turn
+                assert turn['matchId'] == matchId and turn['roundId'] == roundId and turn['turnId'] == turnId
+                position += 1
+
+    assert position == len(archive.turns)
+
+
+def testMissingRecordsRaiseKeyError(archive):
+    matchId = int(archive.matches[-1]['matchId'])
+    roundCount = int(archive.matches[-1]['roundCount'])
+    turnCount = int(archive.round(matchId, 0)['turnCount'])
+
+    with pytest.raises(KeyError):
+        archive.match(matchId + 1)
+    with pytest.raises(KeyError):
+        archive.roundsOf(-1)
+    with pytest.raises(KeyError):
+        archive.round(matchId, roundCount)
+    with pytest.raises(KeyError):
+        archive.turnsOf(matchId, -1)
+    with pytest.raises(KeyError):
+        archive.turn(matchId, 0, turnCount)
+
+
+def testTruncatedArchiveIsIncomplete(archive, tmp_path):
+    directory = tmp_path / 'truncated'
+    shutil.copytree(os.path.dirname(archive.matches.filename), str(directory))
+
+    with open(str(directory / 'turn.bin'), 'r+b') as f:
+        f.truncate((len(archive.turns) - 1) * TURN_DTYPE.itemsize)
+
+    with pytest.raises(ValueError, match='incomplete'):
+        Archive(str(directory))
+
+
+def testStreamOnlyWritesBin(tmp_path):
+    with pytest.raises(ValueError, match='bin'):
+        ArchiveEncoder().stream(str(tmp_path), 'csv')
@@ -0,0 +1,12 @@
+import pytest
+
+from domino_hidden_patterns.game.batchEngine import findMismatches
+from domino_hidden_patterns.game.simulator import matchSeed
+
+
+@pytest.mark.parametrize('policy', ['first', 'greedy'])
+def testBatchEngineMatchesGame(policy):
+    seeds = [matchSeed(42, i) for i in range(500)]
+
+    assert findMismatches(seeds, policy) == []
+
@@ -0,0 +1,35 @@
+from domino_hidden_patterns.game.benchmark import BenchmarkResult, compareToBaseline, mergeBaseline
+
+
+def result(name: str, opsPerSec: float) -> BenchmarkResult:
+    return BenchmarkResult(name, 100, opsPerSec, 1e6 / opsPerSec, 2e6 / opsPerSec, None)
+
+
+def testMissingBaselineCountsAsRegression():
+    baseline = mergeBaseline([result('a', 100.0)], None)
+
+    regressions = compareToBaseline([result('a', 90.0), result('b', 50.0)], baseline, 0.3)
+
+    assert regressions == [('b', 0.0)]
+
+
+def testSlowdownBeyondToleranceIsRegression():
+    baseline = mergeBaseline([result('a', 100.0)], None)
+
+    assert compareToBaseline([result('a', 60.0)], baseline, 0.3) == [('a', 0.6)]
+
+
+def testOutlierSampleIsNoRegression():
+    baseline = mergeBaseline([result('a', 100.0)], None)
+    # One slow sample halved the throughput, but the median latency is the same
+    slowed = result('a', 50.0)._replace(p50Us=1e4)
+
+    assert compareToBaseline([slowed], baseline, 0.3) == []
+
+
+def testMergeKeepsBenchmarksThatDidNotRun():
+    baseline = mergeBaseline([result('a', 100.0), result('b', 200.0)], None)
+
+    merged = mergeBaseline([result('b', 300.0), result('c', 400.0)], baseline)
+
+    assert [(entry['name'], entry['opsPerSec']) for entry in merged['results']] == [('a', 100.0), ('b', 300.0), ('c', 400.0)]
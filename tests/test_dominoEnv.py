@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from domino_hidden_patterns.game.dominoEnv import ACTION_COUNT, OBSERVATION_SIZE, DominoEnv, VectorDominoEnv
+from domino_hidden_patterns.game.simulator import matchSeed
+
+SEED = 17
+ENV_COUNT = 4
+STEP_COUNT = 600
+
+
+@pytest.mark.parametrize('opponent', ['first', 'greedy'])
+def testVectorEnvMatchesDominoEnv(opponent):
+    vector = VectorDominoEnv(ENV_COUNT, opponent, seed=SEED)
+    observations, info = vector.reset()
+    masks = info['action_mask']
+
+    # Env k of the vector plays episode e of the vector's seed like a DominoEnv reset with matchSeed(SEED, e)
+    envs = [DominoEnv(opponent) for _ in range(ENV_COUNT)]
+    for k, env in enumerate(envs):
+        observation, envInfo = env.reset(seed=matchSeed(SEED, k))
+        np.testing.assert_array_equal(observations[k], observation)
+        np.testing.assert_array_equal(masks[k], envInfo['action_mask'])
+    episodeCount = ENV_COUNT
+
+    assert observations.shape == (ENV_COUNT, OBSERVATION_SIZE)
+    assert masks.shape == (ENV_COUNT, ACTION_COUNT)
+
+    rng = np.random.default_rng(SEED)
+    finished = 0
+    for _ in range(STEP_COUNT):
+        actions = np.array([rng.choice(np.flatnonzero(mask)) for mask in masks])
+        observations, rewards, terminated, truncated, info = vector.step(actions)
+        masks = info['action_mask']
+        assert not truncated.any()
+
+        for k, env in enumerate(envs):
+            observation, reward, done, _, envInfo = env.step(actions[k])
+            assert reward == pytest.approx(rewards[k])
+            assert done == terminated[k]
+
+            if done:
+                np.testing.assert_array_equal(info['final_observation'][k], observation)
+                assert info['winner'][k] == envInfo['winner']
+                assert info['points'][k] == envInfo['points']
+
+                # Finished rounds are dealt the next episodes in env order
+                observation, envInfo = env.reset(seed=matchSeed(SEED, episodeCount))
+                episodeCount += 1
+                finished += 1
+
+            np.testing.assert_array_equal(observations[k], observation)
+            np.testing.assert_array_equal(masks[k], envInfo['action_mask'])
+
+    assert finished > ENV_COUNT
+
+
+def testResetIsSeeded():
+    first, second = DominoEnv(), DominoEnv()
+    np.testing.assert_array_equal(first.reset(seed=5)[0], second.reset(seed=5)[0])
+    assert [tile.index for tile in first.game.player1.hand] == [tile.index for tile in second.game.player1.hand]
+
+
+def testResetSeedsNpRandom():
+    pytest.importorskip('gymnasium')
+
+    first, second = DominoEnv(), DominoEnv()
+    first.reset(seed=5)
+    second.reset(seed=5)
+    assert first.np_random.integers(2 ** 31) == second.np_random.integers(2 ** 31)
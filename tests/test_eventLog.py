@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+from domino_hidden_patterns.game.computer import HighestPipComputer, RandomComputer
+from domino_hidden_patterns.game.encoder import Encoder
+from domino_hidden_patterns.game.eventLog import (EventLogEncoder, deriveTurnTables, encodeTurnState, iterRounds,
+                                                  readEventCSVs)
+from domino_hidden_patterns.game.simulator import Simulator, generate, loadEncoder
+
+
+def record(encoder: Encoder, seed: int, matchCount: int = 6) -> Encoder:
+    Simulator(RandomComputer, HighestPipComputer, seed, encoder).run(matchCount)
+    return encoder
+
+
+@pytest.mark.parametrize('seed', [1, 7])
+def testDerivedTurnTablesEqualEncoder(seed):
+    strings = record(Encoder(), seed)
+    events = record(EventLogEncoder(), seed)
+
+    turnStart, turnEnd = deriveTurnTables(events.dealDf, events.turnDf)
+
+    assert len(turnStart) > 0
+    pd.testing.assert_frame_equal(turnStart, strings.turnStartDf, check_dtype=False)
+    pd.testing.assert_frame_equal(turnEnd, strings.turnEndDf, check_dtype=False)
+    pd.testing.assert_frame_equal(events.roundDf, strings.roundDf)
+    pd.testing.assert_frame_equal(events.matchDf, strings.matchDf)
+
+
+def testReplayerRandomAccessMatchesIteration():
+    events = record(EventLogEncoder(), 3)
+
+    for replayer in iterRounds(events.dealDf, events.turnDf):
+        states = list(replayer.iterStates())
+        for turnId in reversed(range(len(states))):
+            start, end = states[turnId]
+            assert encodeTurnState(replayer.getTurnState(turnId)) == encodeTurnState(start)
+            assert encodeTurnState(replayer.getTurnState(turnId, end=True), end=True) == encodeTurnState(end, end=True)
+
+
+def testDerivedTurnTablesEqualRecordedCSVs(tmp_path):
+    generate(5, str(tmp_path / 'strings'), seed=9, shardSize=2)
+    generate(5, str(tmp_path / 'events'), seed=9, shardSize=2, encoderType=loadEncoder('events'))
+
+    turnStart, turnEnd = deriveTurnTables(*readEventCSVs(str(tmp_path / 'events')))
+
+    for table, derived in (('turnStart', turnStart), ('turnEnd', turnEnd)):
+        recorded = pd.read_csv(str(tmp_path / 'strings' / '{}.csv'.format(table)), keep_default_na=False)
+        derivedCSV = tmp_path / '{}.csv'.format(table)
+        derived.to_csv(str(derivedCSV), index=False)
+        pd.testing.assert_frame_equal(pd.read_csv(str(derivedCSV), keep_default_na=False), recorded)
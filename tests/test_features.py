@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+import pytest
+
+from domino_hidden_patterns.game.features import PAD, defaultCacheDir, extractFeatures, loadFeatures
+from domino_hidden_patterns.game.simulator import generate, loadEncoder
+from domino_hidden_patterns.game.tileTable import TILE_COUNT
+
+
+def testExtractsDoubleSixStrings(tmp_path):
+    generate(3, str(tmp_path), seed=5)
+
+    arrays = extractFeatures(str(tmp_path))
+
+    assert len(arrays['winner']) == len(arrays['placedCount']) > 0
+
+
+@pytest.mark.parametrize('maxPip', [9, 12])
+def testLargerSetsRaiseValueError(tmp_path, maxPip):
+    generate(2, str(tmp_path), seed=5, maxPip=maxPip)
+
+    with pytest.raises(ValueError, match='only support double-six sets'):
+        extractFeatures(str(tmp_path))
+
+
+def testCachesUnderXdgCacheHome(tmp_path, monkeypatch):
+    dataset = tmp_path / 'dataset'
+    cacheHome = tmp_path / 'cache'
+    generate(2, str(dataset), seed=5)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(cacheHome))
+
+    features = loadFeatures(str(dataset))
+
+    assert defaultCacheDir() == str(cacheHome / 'domino_hidden_patterns' / 'featureCache')
+    assert os.path.dirname(features.winner.filename).startswith(defaultCacheDir())
+    assert features.roundCount > 0
+
+
+@pytest.mark.parametrize('encoding', ['compact', 'events'])
+def testArchiveMatchesOtherEncodings(tmp_path, encoding):
+    archiveDir, otherDir = str(tmp_path / 'archive'), str(tmp_path / encoding)
+    generate(4, archiveDir, seed=5, encoderType=loadEncoder('archive'), fileFormat='bin')
+    generate(4, otherDir, seed=5, encoderType=loadEncoder(encoding))
+
+    archive, other = extractFeatures(archiveDir), extractFeatures(otherDir)
+
+    # Archives have no board layout
+    for name in sorted(set(archive) - {'boardLayout'}):
+        np.testing.assert_array_equal(archive[name], other[name], err_msg=name)
+    assert (archive['boardLayout'] == PAD).all()
+    assert archive['boardLayout'].shape == (len(archive['winner']), TILE_COUNT, 3)
@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+from domino_hidden_patterns.game.game import Game
+from domino_hidden_patterns.game.simulator import Simulator
+from domino_hidden_patterns.game.tile import Tile, tilesOf
+from domino_hidden_patterns.game.tileTable import tileSet
+
+
+def tiles(*pips, maxPip: int = 6):
+    return [Tile(pip1, pip2, tileSet(maxPip)) for pip1, pip2 in pips]
+
+
+def dealt(playerCount: int, hands: dict, maxPip: int = 6) -> Game:
+    game = Game(random.Random(0), maxPip, playerCount)
+    game.startRound({id: tiles(*pips, maxPip=maxPip) for id, pips in hands.items()})
+    return game
+
+
+def testTilesOfDifferentSetsAreNotEqual():
+    assert Tile(0, 7, tileSet(9)) != Tile(1, 1)
+    assert Tile(0, 7, tileSet(9)).index == Tile(1, 1).index
+    assert Tile(3, 5, tileSet(12)) == Tile(5, 3, tileSet(12))
+    assert Tile(3, 5, tileSet(12)) != Tile(3, 5)
+    assert len({Tile(2, 4), Tile(2, 4, tileSet(9)), Tile(4, 2)}) == 2
+
+
+def testEmptyHandWinsAndScoresEveryOtherHand():
+    game = dealt(3, {'1': [(1, 2), (3, 3)], '2': [], '3': [(0, 6), (5, 5)]})
+
+    winner = game.getRoundWinner()
+
+    assert winner.player.id == '2'
+    assert winner.pointsToGain == 3 + 6 + 6 + 10
+
+
+def testEmptyHandBeatsHandOfNoPips():
+    game = dealt(2, {'1': [(0, 0)], '2': []})
+
+    assert game.getRoundWinner() == (game.player2, 0)
+
+
+def testBlockedRoundGoesToFewestPips():
+    game = dealt(4, {'1': [(4, 4)], '2': [(6, 6)], '3': [(0, 1), (1, 2)], '4': [(5, 6)]})
+
+    winner = game.getRoundWinner()
+
+    assert winner.player.id == '3'
+    assert winner.pointsToGain == 8 + 12 + 11
+
+
+def testLaterPlayerWinsTie():
+    game = dealt(3, {'1': [(1, 3)], '2': [(5, 5)], '3': [(0, 4)]})
+
+    winner = game.getRoundWinner()
+
+    assert winner.player.id == '3'
+    assert winner.pointsToGain == 4 + 10
+
+
+def testScoreRoundAwardsTheWinnerAndTheyStartTheNextRound():
+    game = dealt(3, {'1': [(6, 6)], '2': [(1, 1)], '3': [(2, 3)]})
+
+    game.scoreRound()
+
+    assert game.playerScores == {'1': 0, '2': 12 + 5, '3': 0}
+    assert game.player2.points == 17
+
+    game.startRound()
+    assert game.turn == 2
+    assert [player.points for player in game.players] == [0, 17, 0]
+
+
+@pytest.mark.parametrize('playerCount', [2, 3, 4])
+def testSkipTurnVisitsEveryPlayerInOrder(playerCount):
+    game = Game(random.Random(0), playerCount=playerCount)
+    game.startRound()
+    first = game.turn
+
+    turns = []
+    for _ in range(2 * playerCount):
+        turns.append(game.turn)
+        game.skipTurn()
+
+    expected = [(first - 1 + i) % playerCount + 1 for i in range(2 * playerCount)]
+    assert turns == expected
+
+
+@pytest.mark.parametrize('maxPip, tileCount', [(6, 28), (9, 55), (12, 91)])
+@pytest.mark.parametrize('playerCount, handSize', [(2, 7), (3, 5), (4, 5)])
+def testDealsFromTheWholeSet(maxPip, tileCount, playerCount, handSize):
+    game = Game(random.Random(maxPip * 10 + playerCount), maxPip, playerCount)
+    game.startRound()
+
+    hands = [list(player.hand) for player in game.players]
+    startTile = game.snake.getStartTile().tile
+    everyTile = [tile for hand in hands for tile in hand] + list(game.deck.deck) + [startTile]
+
+    assert all(len(hand) == handSize for hand in hands)
+    assert sorted(tile.index for tile in everyTile) == list(range(tileCount))
+    assert all(tile is tilesOf(tileSet(maxPip))[tile.index] for tile in everyTile)
+    assert game.deck.deckMask == sum(1 << tile.index for tile in game.deck.deck)
+    for player, hand in zip(game.players, hands):
+        assert player.handMask == sum(1 << tile.index for tile in hand)
+        assert player.countPipsInHand() == sum(tile.pip1 + tile.pip2 for tile in hand)
+
+
+@pytest.mark.parametrize('maxPip, playerCount', [(9, 3), (12, 4)])
+def testRoundsOfLargerGamesAwardTheOtherHands(maxPip, playerCount):
+    simulator = Simulator(seed=maxPip, maxPip=maxPip, playerCount=playerCount)
+
+    for roundId in range(10):
+        game = Game(random.Random(roundId), maxPip, playerCount)
+        simulator.playRound(game, roundId)
+        winner = game.lastRoundWinner
+
+        assert winner.pointsToGain == sum(player.countPipsInHand() for player in game.players if player is not winner.player)
+        assert game.playerScores[winner.player.id] == winner.pointsToGain
+        assert winner.player.countTilesInHand() == 0 or game.isTie()
@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from domino_hidden_patterns.game.computer import Computer, RandomComputer
+from domino_hidden_patterns.game.game import Game
+from domino_hidden_patterns.game.gameState import GameState, LEFT, RIGHT
+from domino_hidden_patterns.game.simulator import Simulator
+from domino_hidden_patterns.game.tileTable import TILE_COUNT, TILE_PIPS
+
+
+def midRoundStates(seeds: range):
+    """Yield (Game, 'draw' or 'pass' or 'play') after every turn of a round of random play from each seed, with
+    what the last turn did.
+    """
+
+    for seed in seeds:
+        game = Game(random.Random(seed))
+        game.startRound()
+        simulator = Simulator(seed=seed)
+        computers = {1: RandomComputer(game.player1, game), 2: Computer(game.player2, game)}
+
+        while True:
+            player = game.player1 if game.turn == 1 else game.player2
+            simulator.playTurn(game, player, computers[game.turn])
+            if game.checkRoundWin() or game.isTie():
+                break
+
+            if game.hasPassedThisTurn:
+                turn = 'pass'
+            elif game.drawCountCurrent > 0:
+                turn = 'draw'
+            else:
+                turn = 'play'
+
+            game.skipTurn()
+            yield game, turn
+
+
+def fullState(state: GameState):
+    """key() and the complete hand orders, which also keep the played Tiles.
+    """
+
+    return state.key(), [order[:] for order in state.handOrders]
+
+
+def testRoundTripsMidRoundAfterDrawsAndPasses():
+    seen = set()
+
+    for game, turn in midRoundStates(range(40)):
+        seen.add(turn)
+        state = GameState.fromGame(game)
+
+        restored = Game(random.Random(0))
+        state.restore(restored)
+
+        assert GameState.fromGame(restored) == state
+        for original, copy in zip(game.players, restored.players):
+            assert [tile.index for tile in copy.hand] == [tile.index for tile in original.hand]
+        assert restored.deck.deckMask == game.deck.deckMask
+        assert sorted(tile.index for tile in restored.deck.deck) == sorted(tile.index for tile in game.deck.deck)
+        assert restored.snake.encodedLayout == game.snake.encodedLayout
+        assert restored.snake.encodedIndices == game.snake.encodedIndices
+        assert restored.snake.layout.encoded == game.snake.layout.encoded
+        assert restored.turn == game.turn
+
+    assert seen == {'draw', 'pass', 'play'}
+
+
+@pytest.mark.parametrize('seed', range(20))
+def testUnmakeUndoesRandomSequences(seed):
+    rng = random.Random(seed)
+    for turns, (game, _) in enumerate(midRoundStates(range(seed, seed + 1))):
+        if turns == seed % 5:
+            break
+    state = GameState.fromGame(game)
+    history = []
+
+    for _ in range(60):
+        history.append(fullState(state))
+
+        moves = state.legalMoves()
+        deck = [tile for tile in range(TILE_COUNT) if state.deckMask >> tile & 1]
+        actions = ['pass'] + (['play'] * 3 if moves else []) + (['draw'] if deck else [])
+        action = rng.choice(actions)
+
+        if action == 'play':
+            state.play(*rng.choice(moves))
+        elif action == 'draw':
+            state.draw(rng.choice(deck))
+        else:
+            state.passTurn()
+
+        # Undo every so often to also check unmake() in the middle of a sequence
+        if rng.random() < 0.2:
+            state.unmake()
+            assert fullState(state) == history.pop()
+
+    while history:
+        state.unmake()
+        assert fullState(state) == history.pop()
+
+    assert state == GameState.fromGame(game)
+    with pytest.raises(IndexError):
+        state.unmake()
+
+
+def testLegalMovesMatchPlayableTiles():
+    for game, _ in midRoundStates(range(10)):
+        state = GameState.fromGame(game)
+        hand = state.hands[state.turn]
+        expected = []
+        for tile in range(TILE_COUNT):
+            if not hand >> tile & 1:
+                continue
+            if state.left in TILE_PIPS[tile]:
+                expected.append((tile, LEFT))
+            # With both ends the same pip, RIGHT gives the same Snake ends as LEFT
+            if state.right in TILE_PIPS[tile] and not (state.left == state.right and state.left in TILE_PIPS[tile]):
+                expected.append((tile, RIGHT))
+
+        assert state.legalMoves() == expected
@@ -0,0 +1,76 @@
+import random
+
+import numpy as np
+import pytest
+
+from domino_hidden_patterns.game.handEquity import (HAND_COUNT, HAND_SIZE, TABLE_FILE, EquityTable, buildTable,
+                                                    handFromRank, handRank, iterHands)
+from domino_hidden_patterns.game.tileTable import TILE_COUNT
+
+
+def testRankAndUnrankAreInverses():
+    rng = random.Random(0)
+
+    for _ in range(2000):
+        mask = sum(1 << tile for tile in rng.sample(range(TILE_COUNT), HAND_SIZE))
+        assert handFromRank(handRank(mask)) == mask
+
+    for rank in [0, 1, HAND_COUNT - 1] + rng.sample(range(HAND_COUNT), 2000):
+        assert handRank(handFromRank(rank)) == rank
+
+    assert handFromRank(0) == (1 << HAND_SIZE) - 1
+    assert handFromRank(HAND_COUNT - 1) == ((1 << HAND_SIZE) - 1) << (TILE_COUNT - HAND_SIZE)
+
+
+@pytest.mark.parametrize('mask', [0, (1 << 6) - 1, (1 << 8) - 1, ((1 << HAND_SIZE) - 1) << TILE_COUNT - 6])
+def testRankRejectsMasksThatAreNotHands(mask):
+    with pytest.raises(ValueError):
+        handRank(mask)
+
+
+def testIterHandsVisitsEveryHandInRankOrder():
+    count = 0
+    previous = -1
+
+    for rank, mask in enumerate(iterHands(0, HAND_COUNT)):
+        assert mask > previous
+        previous = mask
+        count += 1
+
+        if rank % 997 == 0:
+            assert bin(mask).count('1') == HAND_SIZE
+            assert handRank(mask) == rank
+
+    assert count == HAND_COUNT
+    assert previous == handFromRank(HAND_COUNT - 1)
+    assert list(iterHands(500000, 100)) == [handFromRank(rank) for rank in range(500000, 500100)]
+
+
+def tableOf(directory) -> np.ndarray:
+    return np.load(str(directory / TABLE_FILE))
+
+
+def testBuildTableDoesNotDependOnWorkersChunksOrResuming(tmp_path):
+    buildTable(str(tmp_path / 'single'), roundsPerHand=4, seed=5, workers=1, chunkSize=64, handCount=300)
+    buildTable(str(tmp_path / 'pool'), roundsPerHand=4, seed=5, workers=3, chunkSize=50, handCount=300)
+
+    # Resume after a partial run over fewer hands, then after a run with fewer rounds per hand
+    buildTable(str(tmp_path / 'resumed'), roundsPerHand=2, seed=5, chunkSize=100, handCount=200)
+    result = buildTable(str(tmp_path / 'resumed'), roundsPerHand=2, seed=5, chunkSize=100, handCount=300)
+    assert result.handCount == 100
+    result = buildTable(str(tmp_path / 'resumed'), roundsPerHand=4, seed=5, chunkSize=100, handCount=300)
+    assert result.handCount == 300
+    assert result.roundCount == 600
+
+    expected = tableOf(tmp_path / 'single')
+    assert (expected['rounds'][:300] == 4).all()
+    assert (expected['rounds'][300:] == 0).all()
+    assert np.array_equal(tableOf(tmp_path / 'pool'), expected)
+    assert np.array_equal(tableOf(tmp_path / 'resumed'), expected)
+
+    # A finished table has nothing left to play
+    assert buildTable(str(tmp_path / 'single'), roundsPerHand=4, seed=5, handCount=300).handCount == 0
+
+    table = EquityTable(str(tmp_path / 'single'))
+    assert table.lookup(handFromRank(0)).rounds == 4
+    assert table.lookup(handFromRank(300)).rounds == 0
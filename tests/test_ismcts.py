@@ -0,0 +1,110 @@
+import random
+
+import pytest
+
+from domino_hidden_patterns.game.ismcts import (DeterminizedRound, ISMCTSComputer, Observation, SearchProblem,
+                                                determinize, isConsistent)
+from domino_hidden_patterns.game.moves import legalMoves
+from domino_hidden_patterns.game.simulator import Simulator
+from domino_hidden_patterns.game.tileTable import tileIndex
+
+
+def maskOf(*tiles) -> int:
+    mask = 0
+    for tile in tiles:
+        mask |= 1 << tile
+    return mask
+
+
+class ProblemRecorder(ISMCTSComputer):
+    """Plays the first legal move instead of searching, and keeps each SearchProblem with the opponent's
+    real hand at that turn.
+    """
+
+    problems = []
+
+    def search(self):
+        problem = self.getProblem()
+        opponent = self.game.player2 if self.opponentId == 2 else self.game.player1
+        ProblemRecorder.problems.append((problem, opponent.handMask))
+
+        return legalMoves(self.player.hand, self.game.snake)[0]
+
+
+@pytest.fixture(scope='module')
+def recordedProblems():
+    ProblemRecorder.problems = []
+    Simulator(ProblemRecorder, ProblemRecorder, seed=11).run(15)
+
+    return ProblemRecorder.problems
+
+
+def testWinnerWhenOpponentOnlyHoldsDoubleBlank():
+    # Player 1 played their last Tile and Player 2 is left with [0, 0], a win worth 0 points
+    blank = maskOf(tileIndex(0, 0))
+
+    assert DeterminizedRound([0, 0, blank], 0, 0, [], 1).winner() == 1
+    assert DeterminizedRound([0, blank, 0], 0, 0, [], 1).winner() == 2
+
+
+def testWinnerOfBlockedRound():
+    low = maskOf(tileIndex(0, 1))
+    high = maskOf(tileIndex(5, 6))
+
+    assert DeterminizedRound([0, low, high], 2, 2, [], 1).winner() == 1
+    assert DeterminizedRound([0, high, low], 2, 2, [], 1).winner() == 2
+    # A tie goes to Player 2, like Game.getRoundWinner()
+    assert DeterminizedRound([0, maskOf(tileIndex(1, 2)), maskOf(tileIndex(0, 3))], 4, 4, [], 1).winner() == 2
+
+
+def testRecordedGamesHaveObservations(recordedProblems):
+    assert len(recordedProblems) > 100
+    assert any(problem.observations for problem, _ in recordedProblems)
+
+
+def testRealOpponentHandIsConsistent(recordedProblems):
+    for problem, opponentHand in recordedProblems:
+        assert isConsistent(problem, opponentHand)
+
+
+def testDeterminizeMatchesTheObservations(recordedProblems):
+    rng = random.Random(3)
+
+    for problem, _ in recordedProblems:
+        for _ in range(5):
+            round = determinize(problem, rng)
+            opponentHand = round.hands[3 - problem.playerId]
+
+            assert round.hands[problem.playerId] == problem.hand
+            assert bin(opponentHand).count('1') == problem.opponentHandSize
+            assert opponentHand | maskOf(*round.boneyard) == problem.unknown
+            assert not opponentHand & maskOf(*round.boneyard)
+            assert isConsistent(problem, opponentHand)
+
+
+def tightProblem(observations, opponentDraws, unknown=maskOf(*range(20)), size=5) -> SearchProblem:
+    hand = maskOf(*range(20, 27))
+    return SearchProblem(1, hand, size, unknown, 0, 0, tuple(observations), opponentDraws)
+
+
+def testDeterminizeStaysConsistentWhenRejectionFails():
+    # Only Tiles 16-19 are clear of the void pips and at most one void Tile may have been drawn since,
+    # so nearly every uniform sample is rejected
+    problem = tightProblem([Observation(maskOf(*range(16)), 2)], 3)
+    rng = random.Random(5)
+
+    for _ in range(200):
+        opponentHand = determinize(problem, rng).hands[2]
+        assert isConsistent(problem, opponentHand)
+        assert bin(opponentHand & maskOf(*range(16))).count('1') <= 1
+
+
+def testDeterminizeBacktracksOverOverlappingObservations():
+    # One Tile of {0, 1} and one of {1, 2} at most: taking Tile 1 first leaves too few Tiles
+    unknown = maskOf(0, 1, 2, 3)
+    problem = tightProblem([Observation(maskOf(0, 1), 0), Observation(maskOf(1, 2), 0)], 1, unknown, 3)
+    rng = random.Random(7)
+
+    for _ in range(100):
+        opponentHand = determinize(problem, rng, tries=1).hands[2]
+        assert opponentHand == maskOf(0, 2, 3)
@@ -0,0 +1,218 @@
+import asyncio
+import filecmp
+import os
+
+import pytest
+
+from domino_hidden_patterns.game.computer import Computer
+from domino_hidden_patterns.game.server import ComputerSeat, GameClient, GameServer
+from domino_hidden_patterns.game.simulator import generate, loadEncoder
+
+SEED = 21
+TIMEOUT = 10.0  # Seconds a test waits for the server before failing
+
+
+def firstMove(turn):
+    return turn['moves'][0]
+
+
+def sameFiles(first: str, second: str) -> bool:
+    names = sorted(os.listdir(first))
+    assert names == sorted(os.listdir(second))
+    return all(filecmp.cmp(os.path.join(first, name), os.path.join(second, name), shallow=False) for name in names)
+
+
+def runWithServer(test, path=None, **kwargs):
+    """Start a GameServer on a free TCP port, or on a Unix socket if path is given, and run
+    test(server, connect) against it. connect() opens a GameClient to the server.
+    """
+
+    async def run():
+        server = GameServer(SEED, **kwargs)
+        await server.start(port=0, path=path)
+        port = None if path is not None else server.server.sockets[0].getsockname()[1]
+
+        async def connect() -> GameClient:
+            return await GameClient.connect(port=port, path=path)
+
+        try:
+            return await asyncio.wait_for(test(server, connect), TIMEOUT)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+async def receiveType(client: GameClient, messageType: str):
+    """Skip messages until one of the type arrives.
+    """
+
+    while True:
+        message = await client.receive()
+        if message is None or message['type'] == messageType:
+            return message
+
+
+def assertFinished(matchOver):
+    assert matchOver is not None and matchOver['type'] == 'matchOver'
+    assert max(matchOver['scores'].values()) >= 100
+    assert matchOver['scores'][str(matchOver['winner'])] == max(matchOver['scores'].values())
+
+
+@pytest.mark.parametrize('seat', [1, 2])
+@pytest.mark.parametrize('unix', [False, True])
+def testClientPlaysComputerInEitherSeat(tmp_path, seat, unix):
+    async def test(server, connect):
+        client = await connect()
+        await client.join('greedy', seat)
+        matchOver = await client.play(firstMove)
+        await client.close()
+        return client.messages, matchOver
+
+    messages, matchOver = runWithServer(test, path=str(tmp_path / 'server.sock') if unix else None)
+
+    assertFinished(matchOver)
+    roundStarts = [message for message in messages if message['type'] == 'roundStart']
+    assert roundStarts and all(message['player'] == seat for message in roundStarts)
+    assert any(message['type'] == 'turn' for message in messages)
+    assert not any(message['type'] in ('error', 'timeout') for message in messages)
+
+
+def testPairedClientsPlayOneTable():
+    async def test(server, connect):
+        first = await connect()
+        await first.join('client')
+        assert (await first.receive())['type'] == 'waiting'
+
+        second = await connect()
+        await second.join('client')
+        results = await asyncio.gather(first.play(firstMove), second.play(firstMove))
+
+        for client in (first, second):
+            await client.close()
+        return first.messages, second.messages, results
+
+    firstMessages, secondMessages, (firstOver, secondOver) = runWithServer(test)
+
+    assertFinished(firstOver)
+    assert firstOver == secondOver
+
+    # Seats go in the order the clients joined, and both see the same Table
+    firstStart = next(message for message in firstMessages if message['type'] == 'roundStart')
+    secondStart = next(message for message in secondMessages if message['type'] == 'roundStart')
+    assert (firstStart['player'], secondStart['player']) == (1, 2)
+    assert firstStart['table'] == secondStart['table']
+    assert firstStart['startTile'] == secondStart['startTile']
+
+    # Each client sees the other's draws without the Tile
+    for messages, player in ((firstMessages, 1), (secondMessages, 2)):
+        for message in messages:
+            if message['type'] == 'drawn':
+                assert ('tile' in message) == (message['player'] == player)
+
+
+def testTimeoutPlaysFirstLegalMove(tmp_path):
+    # A client that never answers records the same match as one that always plays the first legal move
+    outputs = {}
+    for name, chooseMove in (('silent', lambda turn: None), ('first', firstMove)):
+        recordDir = str(tmp_path / name)
+
+        async def test(server, connect):
+            client = await connect()
+            await client.join('greedy')
+            matchOver = await client.play(chooseMove)
+            await client.close()
+            return client.messages, matchOver
+
+        outputs[name] = runWithServer(test, moveTimeout=0.01, recordDir=recordDir)
+
+    silentMessages, matchOver = outputs['silent']
+    assertFinished(matchOver)
+    assert matchOver == outputs['first'][1]
+
+    turns = [message for message in silentMessages if message['type'] == 'turn']
+    timeouts = [message for message in silentMessages if message['type'] == 'timeout']
+    assert len(timeouts) == len(turns) > 0
+    assert all(timeout['move'] == turn['moves'][0] for turn, timeout in zip(turns, timeouts))
+
+    assert sameFiles(str(tmp_path / 'silent' / 'table-000000'), str(tmp_path / 'first' / 'table-000000'))
+
+
+def testMalformedMessagesGetErrors():
+    async def test(server, connect):
+        client = await connect()
+        errors = []
+
+        for line in (b'not json\n', b'[1, 2]\n'):
+            client.writer.write(line)
+            await client.writer.drain()
+            errors.append(await client.receive())
+
+        await client.send({'type': 'move', 'tile': [0, 0], 'side': 'left'})
+        errors.append(await client.receive())
+
+        await client.join('nobody')
+        errors.append(await client.receive())
+
+        await client.join('greedy')
+        turn = await receiveType(client, 'turn')
+        illegal = [pips for pips in ([pip1, pip2] for pip1 in range(7) for pip2 in range(pip1, 7))
+                   if all(sorted(move[0]) != pips for move in turn['moves'])][0]
+        await client.send({'type': 'move', 'tile': illegal, 'side': 'left', 'turn': turn['turn']})
+        errors.append(await receiveType(client, 'error'))
+
+        # The turn is still open for a legal move
+        tile, side = turn['moves'][0]
+        await client.send({'type': 'move', 'tile': tile, 'side': side, 'turn': turn['turn']})
+        played = await receiveType(client, 'played')
+        await client.close()
+        return errors, played
+
+    errors, played = runWithServer(test)
+
+    assert [error['type'] for error in errors] == ['error'] * 5
+    assert 'JSON' in errors[0]['message'] and 'JSON' in errors[1]['message']
+    assert 'join' in errors[2]['message']
+    assert 'greedy' in errors[3]['message']
+    assert 'Not a legal move' in errors[4]['message']
+    assert played['player'] == 1
+
+
+def testDisconnectFinishesTable(tmp_path):
+    recordDir = str(tmp_path / 'record')
+
+    async def test(server, connect):
+        client = await connect()
+        await client.join('greedy')
+        await receiveType(client, 'turn')
+        assert list(server.tables) == [0]
+
+        await client.close()
+        while server.tables:
+            await asyncio.sleep(0.01)
+
+    runWithServer(test, recordDir=recordDir, encoding='compact')
+
+    # The Table played the match out with first legal moves and recorded it
+    recorded = os.path.join(recordDir, 'table-000000')
+    assert os.path.getsize(os.path.join(recorded, 'match.csv')) > 0
+
+
+@pytest.mark.parametrize('encoding, fileFormat', [('strings', 'csv'), ('compact', 'jsonl'), ('archive', 'bin')])
+def testComputerTableRecordsLikeGenerate(tmp_path, encoding, fileFormat):
+    recordDir = str(tmp_path / 'server')
+
+    async def run():
+        server = GameServer(SEED, recordDir=recordDir, encoding=encoding, fileFormat=fileFormat)
+        try:
+            await server.playTable((ComputerSeat(Computer, server.executor), ComputerSeat(Computer, server.executor)))
+        finally:
+            await server.close()
+        assert not server.tables
+
+    asyncio.run(run())
+
+    generated = str(tmp_path / 'generated')
+    generate(1, generated, seed=SEED, encoderType=loadEncoder(encoding), fileFormat=fileFormat)
+
+    assert sameFiles(os.path.join(recordDir, 'table-000000'), generated)
@@ -0,0 +1,42 @@
+import filecmp
+import os
+
+import pandas as pd
+import pytest
+
+from domino_hidden_patterns.game.simulator import ENCODERS, generate, loadEncoder
+
+# The archive encoding is written as fixed-size records, and only it can be
+COMBINATIONS = [(encoding, fileFormat) for encoding in ENCODERS
+                for fileFormat in (('bin',) if encoding == 'archive' else ('csv', 'jsonl', 'parquet'))]
+
+
+def sameFiles(first: str, second: str) -> bool:
+    names = sorted(os.listdir(first))
+    assert names == sorted(os.listdir(second))
+    return all(filecmp.cmp(os.path.join(first, name), os.path.join(second, name), shallow=False) for name in names)
+
+
+@pytest.mark.parametrize('encoding, fileFormat', COMBINATIONS)
+def testOutputDoesNotDependOnWorkersOrShards(tmp_path, encoding, fileFormat):
+    outputs = {}
+    for workers in (1, 3):
+        for shardSize in (2, 5):
+            outputDir = str(tmp_path / '{}-{}'.format(workers, shardSize))
+            generate(9, outputDir, seed=3, workers=workers, shardSize=shardSize,
+                     encoderType=loadEncoder(encoding), fileFormat=fileFormat)
+            outputs[(workers, shardSize)] = outputDir
+
+    # The same shards give byte-identical files whatever the worker count
+    for shardSize in (2, 5):
+        assert sameFiles(outputs[(1, shardSize)], outputs[(3, shardSize)])
+
+    if fileFormat != 'parquet':
+        assert sameFiles(outputs[(1, 2)], outputs[(1, 5)])
+        return
+
+    # Parquet files keep each shard's row groups and dictionaries, so only their rows match across shard sizes
+    for name in sorted(os.listdir(outputs[(1, 2)])):
+        first = pd.read_parquet(os.path.join(outputs[(1, 2)], name))
+        second = pd.read_parquet(os.path.join(outputs[(1, 5)], name))
+        pd.testing.assert_frame_equal(first, second)
@@ -0,0 +1,35 @@
+import random
+
+from domino_hidden_patterns.game.deck import Deck
+from domino_hidden_patterns.game.enums.orientations import Orientation
+from domino_hidden_patterns.game.snake import Snake
+
+
+def testEncodingsMatchTheTilesAfterEveryPlay():
+    rng = random.Random(3)
+
+    for _ in range(100):
+        deck = Deck(rng)
+        snake = Snake()
+        snake.setStartPiece(deck)
+
+        while True:
+            moves = [(tile, side) for tile in deck.deck for side in (Orientation.LEFT, Orientation.RIGHT)
+                     if (snake.canAddTileLeft(tile) if side is Orientation.LEFT else snake.canAddTileRight(tile))]
+            if not moves:
+                break
+
+            tile, side = rng.choice(moves)
+            deck.deck.remove(tile)
+            snake.addTile(tile, side)
+
+            # Skip some reads so that several plays are caught up at once
+            if rng.random() < 0.5:
+                continue
+
+            placed = sorted(snake.snake.items())
+            assert snake.encodedLayout == ' '.join(tile.encode(key) for key, tile in placed)
+            assert snake.encodedIndices == ''.join('{:02x}'.format(tile.orientedIndex) for _, tile in placed)
+
+            layout = snake.layout
+            assert layout.encoded == ' '.join(laid.encode(key) for key, laid in enumerate(layout.tiles, layout.leftKey))
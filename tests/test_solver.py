@@ -0,0 +1,128 @@
+import random
+
+import pytest
+
+from domino_hidden_patterns.game.enums.orientations import Orientation
+from domino_hidden_patterns.game.solver import Position, Solver
+from domino_hidden_patterns.game.tileTable import TILE_COUNT, TILE_PIPS
+
+
+def pips(hand: frozenset) -> int:
+    return sum(TILE_PIPS[tile][0] + TILE_PIPS[tile][1] for tile in hand)
+
+
+def withHand(hands: dict, player: int, hand: frozenset) -> dict:
+    hands = dict(hands)
+    hands[player] = hand
+    return hands
+
+
+def moves(hand: frozenset, left: int, right: int):
+    """Every (tile, new left pip, new right pip) of a hand, playing a Tile on both sides if it fits both.
+    """
+
+    for tile in sorted(hand):
+        pip1, pip2 = TILE_PIPS[tile]
+        if left in (pip1, pip2):
+            yield tile, pip2 if pip1 == left else pip1, right
+        if right in (pip1, pip2):
+            yield tile, left, pip2 if pip1 == right else pip1
+
+
+def drawn(hands: dict, left: int, right: int, boneyard: tuple, turn: int):
+    """Draw from the boneyard in order while the Player to move has no move.
+    """
+
+    hand = hands[turn]
+    while not any(moves(hand, left, right)) and boneyard:
+        hand = hand | {boneyard[0]}
+        boneyard = boneyard[1:]
+
+    return withHand(hands, turn, hand), boneyard
+
+
+def minimax(hands: dict, left: int, right: int, boneyard: tuple, turn: int) -> int:
+    """Points for Player 1 with best play from both Players, by trying every line of play.
+    """
+
+    hands, boneyard = drawn(hands, left, right, boneyard, turn)
+    opponent = 3 - turn
+    best = max if turn == 1 else min
+    values = []
+
+    for tile, newLeft, newRight in moves(hands[turn], left, right):
+        hand = hands[turn] - {tile}
+        if not hand:
+            values.append(pips(hands[opponent]) if turn == 1 else -pips(hands[opponent]))
+        else:
+            values.append(minimax(withHand(hands, turn, hand), newLeft, newRight, boneyard, opponent))
+
+    if values:
+        return best(values)
+
+    if any(moves(hands[opponent], left, right)):
+        return minimax(hands, left, right, boneyard, opponent)
+
+    # Blocked: the lower pip total wins the other Player's pips, ties go to Player 2
+    player1Pips, player2Pips = pips(hands[1]), pips(hands[2])
+    return player2Pips if player1Pips < player2Pips else -player1Pips
+
+
+def randomPosition(rng: random.Random, handSize: int, boneyardSize: int) -> Position:
+    tiles = rng.sample(range(TILE_COUNT), 2 * handSize + boneyardSize + 1)
+    hand1, hand2 = tiles[:handSize], tiles[handSize:2 * handSize]
+    boneyard = tuple(tiles[2 * handSize:-1])
+    left, right = TILE_PIPS[tiles[-1]]
+
+    return Position(sum(1 << tile for tile in hand1), sum(1 << tile for tile in hand2), left, right, boneyard,
+                    rng.choice((1, 2)))
+
+
+def bruteForce(position: Position) -> int:
+    hands = {player: frozenset(tile for tile in range(TILE_COUNT) if mask >> tile & 1)
+             for player, mask in ((1, position.player1Hand), (2, position.player2Hand))}
+    return minimax(hands, position.leftPip, position.rightPip, position.boneyard, position.turn)
+
+
+@pytest.mark.parametrize('handSize, boneyardSize', [(1, 0), (2, 2), (3, 0), (3, 3), (4, 2), (5, 4)])
+def testSolverValueMatchesMinimax(handSize, boneyardSize):
+    rng = random.Random(handSize * 100 + boneyardSize)
+
+    for _ in range(40):
+        position = randomPosition(rng, handSize, boneyardSize)
+        result = Solver().solve(position)
+
+        assert result.exact
+        assert result.value == bruteForce(position), position
+
+
+def testBestMoveReachesTheValue():
+    rng = random.Random(1)
+
+    for _ in range(60):
+        position = randomPosition(rng, 3, 2)
+        result = Solver().solve(position)
+        hands = {player: frozenset(tile for tile in range(TILE_COUNT) if mask >> tile & 1)
+                 for player, mask in ((1, position.player1Hand), (2, position.player2Hand))}
+        turn = position.turn
+        hands, boneyard = drawn(hands, position.leftPip, position.rightPip, position.boneyard, turn)
+
+        if result.move is None:
+            assert not any(moves(hands[turn], position.leftPip, position.rightPip))
+            continue
+
+        tile = result.move.tile.index
+        pip1, pip2 = TILE_PIPS[tile]
+        left, right = position.leftPip, position.rightPip
+        if result.move.side is Orientation.LEFT:
+            left = pip2 if pip1 == left else pip1
+        else:
+            right = pip2 if pip1 == right else pip1
+
+        hand = hands[turn] - {tile}
+        if not hand:
+            value = pips(hands[3 - turn]) if turn == 1 else -pips(hands[3 - turn])
+        else:
+            value = minimax(withHand(hands, turn, hand), left, right, boneyard, 3 - turn)
+
+        assert value == result.value, position
@@ -0,0 +1,25 @@
+import random
+
+from domino_hidden_patterns.game import user
+from domino_hidden_patterns.game.game import Game
+
+
+def testMainScoresEveryRoundOnce(monkeypatch, capsys):
+    counts = {'startRound': 0, 'scoreRound': 0}
+
+    for name in counts:
+        original = getattr(Game, name)
+
+        def counted(self, *args, name=name, original=original, **kwargs):
+            counts[name] += 1
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(Game, name, counted)
+
+    random.seed(0)
+    for _ in range(30):
+        user.main()
+    capsys.readouterr()
+
+    assert counts['startRound'] > 30
+    assert counts['scoreRound'] == counts['startRound']